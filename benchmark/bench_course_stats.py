@@ -0,0 +1,86 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from course_stats import HISTOGRAM_BINS, HISTOGRAM_RANGE, PASS_SCORE, STATS_COLUMNS
+from data_manager import DataManager
+from synthetic import make_courses_data
+
+
+def expected_stats(scores):
+    """原本的做法：每次由整門課程的分數重新計算（以 float64 計算，與 CourseStats 相同）"""
+    scores = scores.astype(float).dropna()
+    counts, _ = np.histogram(scores, bins=HISTOGRAM_BINS, range=HISTOGRAM_RANGE)
+    return {
+        'mean': scores.mean(),
+        'median': scores.median(),
+        'p90': np.percentile(scores, 90),
+        'std': scores.std(),
+        'pass_rate': (scores >= PASS_SCORE).mean(),
+        'histogram': counts.tolist(),
+    }
+
+
+def actual_stats(stats):
+    return {
+        'mean': stats.mean(),
+        'median': stats.median(),
+        'p90': stats.percentile(90),
+        'std': stats.std(),
+        'pass_rate': stats.pass_rate(),
+        'histogram': stats.histogram()[0],
+    }
+
+
+def check(manager, course_ids):
+    for course_id in course_ids:
+        rows = manager.course_rows(course_id)
+        for column in STATS_COLUMNS:
+            expected = expected_stats(rows[column])
+            actual = actual_stats(manager.course_stats.get(course_id, column))
+            for name, value in expected.items():
+                if name == 'histogram':
+                    assert value == actual[name], (course_id, column, name)
+                else:
+                    assert math.isclose(value, actual[name], rel_tol=1e-9, abs_tol=1e-9), \
+                        (course_id, column, name, value, actual[name])
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    manager = DataManager.from_dataframe(make_courses_data(num_rows, students_per_course=5000))
+    df = manager.all_courses_data
+    rng = np.random.default_rng(0)
+    course_ids = rng.choice(df['課程代碼'].unique(), size=10, replace=False)
+    check(manager, course_ids)
+
+    # 修改成績後統計應隨之更新，而不是重新建立
+    course_id = course_ids[0]
+    stats = manager.course_stats.courses[course_id]
+    rows = manager.indexes['課程代碼'].get(course_id)
+    start = time.perf_counter()
+    for row in rng.choice(rows, size=200):
+        record = df.iloc[row]
+        manager.update_grades(record['學號'], record['課程代碼'], *rng.integers(0, 101, size=3).tolist())
+    edit_time = (time.perf_counter() - start) / 200
+    assert manager.course_stats.courses[course_id] is stats, "統計被重新建立"
+    check(manager, course_ids[:1])
+    print("統計結果與 pandas / numpy 相同")
+    print(f"修改一筆成績（含統計更新）平均 {edit_time * 1000:.2f} 毫秒")
+
+    rows = manager.course_rows(course_id)
+    start = time.perf_counter()
+    expected_stats(rows['總成績'])
+    old = time.perf_counter() - start
+    start = time.perf_counter()
+    actual_stats(manager.course_stats.get(course_id, '總成績'))
+    new = time.perf_counter() - start
+    print(f"{len(rows)} 人的課程：重新計算 {old * 1000:.2f} 毫秒，讀取統計 {new * 1000:.3f} 毫秒")
+
+
+if __name__ == "__main__":
+    main()
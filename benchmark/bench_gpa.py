@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+
+
+# 原本逐列 apply 使用的換算函式（保留作為比較基準）
+def legacy_grade_to_GPA(grade):
+    gpa_mapping = {
+        (90, 100): 4.3,
+        (85, 90): 4.0,
+        (80, 85): 3.7,
+        (77, 80): 3.3,
+        (73, 77): 3.0,
+        (70, 73): 2.7,
+        (67, 70): 2.4,
+        (63, 67): 2.0,
+        (60, 63): 1.7,
+        (50, 60): 1.0,
+        (0, 50): 0,
+    }
+    for key, value in gpa_mapping.items():
+        if grade >= key[0] and grade < key[1]:
+            return value
+
+
+def make_scores(num_rows, seed=42):
+    """產生與 add_column 相同算法的總成績欄位"""
+    rng = np.random.default_rng(seed)
+    midterm = rng.integers(0, 101, size=num_rows)
+    final = rng.integers(0, 101, size=num_rows)
+    casual = rng.integers(0, 101, size=num_rows)
+    return pd.Series(np.round(midterm * 0.3 + final * 0.3 + casual * 0.4, 2))
+
+
+def best_of(func, repeat):
+    """執行多次並回傳最短耗時（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    # 不經過 __init__，避免讀取 save_data 的資料檔
+    manager = DataManager.__new__(DataManager)
+    manager.set_gpa_table(DataManager.GPA_TABLE)
+
+    print(f"{'列數':>10} {'apply (秒)':>12} {'向量化 (秒)':>12} {'加速倍數':>10}")
+    for num_rows in (10_000, 100_000, 1_000_000):
+        scores = make_scores(num_rows)
+        repeat = 1 if num_rows >= 1_000_000 else 3
+
+        legacy_time = best_of(lambda: scores.apply(legacy_grade_to_GPA), repeat)
+        vector_time = best_of(lambda: manager.grades_to_GPA(scores), repeat)
+
+        # 確認兩種算法結果一致（舊版在 100 分時回傳 None，不列入比較）
+        legacy = scores.apply(legacy_grade_to_GPA)
+        vector = manager.grades_to_GPA(scores)
+        defined = scores < 100
+        assert np.allclose(legacy[defined].astype(float), vector[defined.values])
+        assert np.all(vector[~defined.values] == 4.3)
+
+        print(f"{num_rows:>10} {legacy_time:>12.4f} {vector_time:>12.4f} {legacy_time / vector_time:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import grade_import
+from course_stats import STATS_COLUMNS
+from data_manager import DataManager
+from synthetic import make_courses_data
+
+
+def make_import_file(roster, path, rng, num_errors=20):
+    """以課程名單產生匯入檔：全部學生的新成績，打亂順序並混入幾筆錯誤"""
+    table = pd.DataFrame({'學號': roster['學號'].to_numpy()})
+    for column in grade_import.SCORE_COLUMNS:
+        table[column] = rng.integers(0, 101, size=len(table)).astype(object)
+    table = table.sample(frac=1, random_state=0).reset_index(drop=True)
+    bad = rng.choice(len(table), size=num_errors, replace=False)
+    table.loc[bad[:5], '期中考'] = 'abc'
+    table.loc[bad[5:10], '期末考'] = 120
+    table.loc[bad[10:15], '學號'] = '999999999'
+    table.loc[bad[15:], '學號'] = ''
+    table.to_csv(path, index=False)
+    return len(bad)
+
+
+def main():
+    students_per_course = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    data = make_courses_data(students_per_course * 20, students_per_course=students_per_course)
+    # 同一學生在同一課程只會有一筆
+    data = data.drop_duplicates(subset=['學號', '課程代碼']).reset_index(drop=True)
+    manager = DataManager.from_dataframe(data)
+    course_id = manager.all_courses_data['課程代碼'].iat[0]
+    roster = manager.course_rows(course_id)
+    for column in STATS_COLUMNS:
+        manager.course_stats.get(course_id, column)  # 建立統計，確認匯入後會重新建立
+
+    rng = np.random.default_rng(0)
+    path = os.path.join(tempfile.mkdtemp(), 'import.csv')
+    num_errors = make_import_file(roster, path, rng)
+
+    start = time.perf_counter()
+    table = grade_import.read_grade_file(path)
+    read_time = time.perf_counter() - start
+    start = time.perf_counter()
+    preview = grade_import.prepare_import(manager, course_id, table)
+    prepare_time = time.perf_counter() - start
+    assert len(preview.errors) == num_errors, preview.errors
+    start = time.perf_counter()
+    manager.import_grades(course_id, preview.changes)
+    commit_time = time.perf_counter() - start
+
+    # 結果必須與完整重算相同
+    expected = DataManager.from_dataframe(manager.all_courses_data[data.columns].copy())
+    pd.testing.assert_frame_equal(expected.all_courses_data, manager.all_courses_data)
+    for column in manager.SORT_COLUMNS:
+        assert np.array_equal(expected.sort_orders[column], manager.sort_orders[column]), column
+    for column in STATS_COLUMNS:
+        assert manager.course_stats.get(course_id, column).slots == \
+            expected.course_stats.get(course_id, column).slots, column
+
+    print(f"課程 {len(roster)} 人，匯入檔 {len(table)} 列（{preview.summary()}）")
+    print(f"讀檔 {read_time * 1000:.0f} 毫秒，檢查與比對 {prepare_time * 1000:.0f} 毫秒，"
+          f"寫入 {commit_time * 1000:.0f} 毫秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from synthetic import make_courses_data
+
+
+def main():
+    print(f"{'列數':>10} {'完整重算 (毫秒)':>16} {'局部重算 (毫秒)':>16}")
+    for num_rows in (10_000, 100_000, 1_000_000):
+        manager = DataManager.from_dataframe(make_courses_data(num_rows))
+        df = manager.all_courses_data
+        row = df.iloc[num_rows // 2]
+
+        # 完整重算：原本 on_save 的做法
+        full = df.copy()
+        mask = (full['學號'] == row['學號']) & (full['課程代碼'] == row['課程代碼'])
+        full.loc[mask, ['期中考', '期末考', '平時成績']] = [91, 35, 77]
+        start = time.perf_counter()
+        full = manager.add_column(full)
+        full_time = time.perf_counter() - start
+
+        # 局部重算：只更新該列並重排該課程
+        start = time.perf_counter()
+        manager.update_grades(row['學號'], row['課程代碼'], 91, 35, 77)
+        incremental_time = time.perf_counter() - start
+
+        # 兩種做法的結果必須完全相同
+        pd.testing.assert_frame_equal(full, manager.all_courses_data)
+
+        print(f"{num_rows:>10} {full_time * 1000:>16.2f} {incremental_time * 1000:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
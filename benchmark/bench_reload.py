@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import ALL_COURSES_PATH, DataManager
+from file_watcher import FileWatcher
+from synthetic import make_courses_data
+
+
+def edit_csv(path, rng, num_changes=50, num_deletes=30, insert=True):
+    """模擬教務處更新修課檔：修改成績、刪除與新增修課紀錄、新增一門課程（insert 為 False 時只改成績）"""
+    df = pd.read_csv(path, encoding='utf-8-sig', dtype={'學號': str})
+    changed = rng.choice(len(df), size=num_changes, replace=False)
+    df.loc[changed, '期末考'] = rng.integers(0, 101, size=num_changes)
+    df = df.drop(index=rng.choice(np.setdiff1d(np.arange(len(df)), changed), size=num_deletes, replace=False))
+    if not insert:
+        write_csv(df, path)
+        return
+    # 把一部分學生加到另一門課程，並開一門新課程
+    added = df.sample(20, random_state=1).copy()
+    added['課程代碼'] = df['課程代碼'].iloc[0]
+    added = added[~added['學號'].isin(df.loc[df['課程代碼'] == df['課程代碼'].iloc[0], '學號'])]
+    new_course = df.sample(15, random_state=2).copy()
+    new_course['課程代碼'], new_course['課程名稱'] = 'N000001', '新開課程'
+    write_csv(pd.concat([df, added, new_course], ignore_index=True), path)
+
+
+def write_csv(df, path):
+    tmp_path = path + '.tmp'
+    df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, path)
+
+
+def compare(a, b):
+    """兩份資料依 (學號, 課程代碼) 排序後逐欄比較（不比較型別）"""
+    key = ['學號', '課程代碼', '期中考', '期末考', '平時成績']
+    a = a.sort_values(key, kind='stable').reset_index(drop=True)
+    b = b.sort_values(key, kind='stable').reset_index(drop=True)
+    assert len(a) == len(b), (len(a), len(b))
+    for column in b.columns:
+        x, y = a[column].to_numpy(), b[column].to_numpy()
+        if x.dtype.kind in 'biuf':
+            assert np.allclose(x.astype(float), y.astype(float)), column
+        else:
+            assert (x.astype(str) == y.astype(str)).all(), column
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(0)
+    data = make_courses_data(num_rows).drop_duplicates(subset=['學號', '課程代碼']).reset_index(drop=True)
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        os.makedirs('save_data')
+        data.to_csv(ALL_COURSES_PATH, index=False, encoding='utf-8-sig')
+        manager = DataManager(load_accounts=False)
+        watcher = FileWatcher(manager.watched_paths())
+
+        # 已儲存與尚未儲存的修改都要保留
+        saved, unsaved = data[['學號', '課程代碼']].iloc[[5, 6]].itertuples(index=False, name=None)
+        manager.update_grades(*saved, 1, 2, 3)
+        manager.save_grades([saved])
+        manager.update_grades(*unsaved, 4, 5, 6)
+        watcher.changed()
+
+        for name, num_deletes, insert in (('只改成績', 0, False), ('新增與刪除列', 30, True)):
+            edit_csv(ALL_COURSES_PATH, rng, num_deletes=num_deletes, insert=insert)
+            changed = watcher.changed()
+            # 與 main.py 相同：背景執行緒讀取並比對，主執行緒只套用差異
+            start = time.perf_counter()
+            courses_file = manager.read_courses_file(changed)
+            read_time = time.perf_counter() - start
+            start = time.perf_counter()
+            courses = manager.reload_changed(changed, courses_file)
+            elapsed = time.perf_counter() - start
+            print(f"{name}：{len(data)} 列，受影響課程 {len(courses)} 門，"
+                  f"背景讀取與比對 {read_time * 1000:.0f} 毫秒，主執行緒套用 {elapsed * 1000:.0f} 毫秒")
+
+        manager.save_grades([unsaved])
+        start = time.perf_counter()
+        fresh = DataManager(load_accounts=False)
+        print(f"完整重新載入 {(time.perf_counter() - start) * 1000:.0f} 毫秒")
+        compare(manager.all_courses_data, fresh.all_courses_data)
+        for key, scores in ((saved, (1, 2, 3)), (unsaved, (4, 5, 6))):
+            row = manager.enrollment(*key)
+            assert (row['期中考'], row['期末考'], row['平時成績']) == scores, key
+        # 受影響課程的排序已更新，其他課程沿用的排序也正確
+        others = [course_id for course_id in fresh.indexes['課程代碼'].keys if course_id not in courses]
+        for course_id in courses[:20] + others[:20]:
+            for column in manager.SORT_COLUMNS:
+                keys = [(column, True)]
+                assert (manager.sorted_course_rows(course_id, keys)[column].to_numpy() ==
+                        fresh.sorted_course_rows(course_id, keys)[column].to_numpy()).all()
+        print("與完整重新載入的結果相同")
+
+
+if __name__ == "__main__":
+    main()
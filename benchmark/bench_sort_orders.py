@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from synthetic import make_courses_data
+
+# 教師畫面可選的排序方式：(欄位, 是否遞增)，同分時依學號
+SORT_MODES = {
+    'id': [('學號', True)],
+    'mid': [('期中考', False), ('學號', True)],
+    'final': [('期末考', False), ('學號', True)],
+    'casual': [('平時成績', False), ('學號', True)],
+    'avg': [('總成績', False), ('學號', True)],
+    'avg_only': [('總成績', False)],
+}
+
+
+def expected_order(manager, course_id, keys):
+    """原本的做法：篩選課程再以 pandas 穩定排序"""
+    df = manager.all_courses_data
+    rows = df[df['課程代碼'] == course_id]
+    return rows.sort_values(by=[c for c, _ in keys], ascending=[a for _, a in keys], kind='stable')
+
+
+def check(manager, course_ids):
+    for course_id in course_ids:
+        for keys in SORT_MODES.values():
+            expected = expected_order(manager, course_id, keys)
+            actual = manager.sorted_course_rows(course_id, keys)
+            assert np.array_equal(expected.index.to_numpy(), actual.index.to_numpy()), (course_id, keys)
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    start = time.perf_counter()
+    manager = DataManager.from_dataframe(make_courses_data(num_rows, students_per_course=400))
+    print(f"{num_rows} 列，載入（含建立排序）{time.perf_counter() - start:.2f} 秒")
+    df = manager.all_courses_data
+    rng = np.random.default_rng(0)
+    course_ids = rng.choice(df['課程代碼'].unique(), size=20, replace=False)
+    check(manager, course_ids)
+
+    # 修改成績後，排序應隨之更新
+    for row in rng.choice(manager.indexes['課程代碼'].get(course_ids[0]), size=30):
+        record = df.iloc[row]
+        manager.update_grades(record['學號'], record['課程代碼'], *rng.integers(0, 101, size=3).tolist())
+    check(manager, course_ids[:1])
+    print("排序結果與 pandas sort_values 相同")
+
+    course_id = course_ids[1]
+    for mode, keys in SORT_MODES.items():
+        start = time.perf_counter()
+        expected_order(manager, course_id, keys)
+        old = time.perf_counter() - start
+        start = time.perf_counter()
+        manager.sorted_course_rows(course_id, keys)
+        new = time.perf_counter() - start
+        print(f"{mode:>9}：篩選並排序 {old * 1000:7.1f} 毫秒，預先排序 {new * 1000:6.2f} 毫秒")
+
+
+if __name__ == "__main__":
+    main()
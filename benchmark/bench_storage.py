@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from data_manager import DataManager
+from synthetic import make_courses_data
+
+
+def write_accounts(data_dir):
+    """建立最小的帳號檔，讓 DataManager 可以完整初始化"""
+    with open(os.path.join(data_dir, 'student_data.csv'), 'w', encoding='utf-8-sig') as f:
+        f.write('學號,密碼,姓名\n400000001,1234,學生1\n')
+    with open(os.path.join(data_dir, 'teacher_data.csv'), 'w', encoding='utf-8-sig') as f:
+        f.write('帳號,密碼,姓名\n001,1234,教師1\n')
+
+
+def timed_load():
+    start = time.perf_counter()
+    manager = DataManager()
+    return manager, time.perf_counter() - start
+
+
+def check_sort_orders(manager):
+    """由快取載入（並重播日誌）的課程內排序須與重新建立的結果相同"""
+    loaded = {column: orders.copy() for column, orders in manager.sort_orders.items()}
+    manager.build_sort_orders()
+    for column, orders in loaded.items():
+        assert np.array_equal(orders, manager.sort_orders[column]), column
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        os.makedirs('save_data')
+        write_accounts('save_data')
+        make_courses_data(num_rows).to_csv(
+            os.path.join('save_data', 'all_courses_data.csv'), index=False, encoding='utf-8-sig')
+
+        # 第一次：解析 CSV、計算衍生欄位並建立快取
+        _, csv_time = timed_load()
+        # 第二次：快取有效，直接以 memory map 開啟
+        manager, cache_time = timed_load()
+        assert manager.storage.is_fresh()
+        check_sort_orders(manager)
+
+        # 快取之後的修改寫在日誌中：開啟快取後重播日誌，受影響課程的排序須重新排列
+        for student_id, course_id in manager.all_courses_data[['學號', '課程代碼']].iloc[[0, 1, 2]].itertuples(
+                index=False, name=None):
+            manager.update_grades(student_id, course_id, 100, 0, 100)
+            manager.save_grades([(student_id, course_id)])
+        check_sort_orders(DataManager())
+
+        # 模擬外部修改 CSV，快取應視為過期
+        with open(os.path.join('save_data', 'all_courses_data.csv'), 'a', encoding='utf-8') as f:
+            f.write('')
+        os.utime(os.path.join('save_data', 'all_courses_data.csv'))
+        assert not manager.storage.is_fresh()
+        os.chdir(ROOT)
+
+    print(f"{num_rows} 列")
+    print(f"CSV 匯入並重算：{csv_time:.2f} 秒")
+    print(f"由快取開啟：    {cache_time:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
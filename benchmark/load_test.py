@@ -0,0 +1,141 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from credentials import CredentialStore, hash_password
+from data_manager import DataManager
+from server import GradeServer
+from synthetic import make_courses_data
+
+PASSWORD = 'load-test'
+
+
+def make_accounts(df):
+    """以模擬資料建立帳號：教師以姓名為帳號；雜湊成本設為 1，讓測試著重在查詢"""
+    encoded = hash_password(PASSWORD, iterations=1)
+    students, teachers = CredentialStore(), CredentialStore()
+    for student_id, name in df[['學號', '姓名']].drop_duplicates('學號').itertuples(index=False):
+        students.accounts[student_id] = (name, encoded)
+    for teacher in df['教師'].unique():
+        teachers.accounts[teacher] = (teacher, encoded)
+    return students, teachers
+
+
+class Client:
+    """模擬一個使用者：登入後以同一條連線反覆送出要求"""
+
+    def __init__(self, port, role, account):
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        self.role = role
+        self.account = account
+        self.token = None
+
+    def request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+        self.conn.request(method, path, body=data, headers=headers)
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def login(self):
+        status, payload = self.request('POST', '/login', {'role': self.role, 'account': self.account,
+                                                          'password': PASSWORD})
+        assert status == 200, payload
+        self.token = payload['token']
+
+
+def run_client(client, courses, stop, write_ratio, results, rng):
+    client.login()
+    while not stop.is_set():
+        if client.role == 'student':
+            name, method, path, body = 'courses', 'GET', f'/students/{quote(client.account)}/courses', None
+        else:
+            course_id = rng.choice(list(courses))
+            action = rng.random()
+            if action < write_ratio:
+                roster = courses[course_id]
+                student_id = rng.choice(roster)
+                body = {'學號': student_id, '期中考': rng.randint(0, 100), '期末考': rng.randint(0, 100),
+                        '平時成績': rng.randint(0, 100)}
+                name, method, path = 'update', 'POST', f'/courses/{quote(course_id)}/grades'
+            elif action < 0.5 + write_ratio / 2:
+                sort = rng.choice(['總成績', '期中考', '學號', 'GPA'])
+                name, method, path, body = 'roster', 'GET', f'/courses/{quote(course_id)}/roster?sort={quote(sort)}', None
+            else:
+                name, method, path, body = 'stats', 'GET', f'/courses/{quote(course_id)}/stats', None
+        start = time.perf_counter()
+        status, _ = client.request(method, path, body)
+        results[name].append((time.perf_counter() - start, status))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以大量模擬用戶端對本機成績服務做壓力測試")
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--teachers', type=float, default=0.3, help="教師用戶端的比例")
+    parser.add_argument('--duration', type=float, default=10, help="測試秒數")
+    parser.add_argument('--write-ratio', type=float, default=0.05, help="教師要求中修改成績的比例")
+    parser.add_argument('--rows', type=int, default=100_000, help="模擬資料的列數")
+    args = parser.parse_args()
+
+    df = make_courses_data(args.rows).drop_duplicates(subset=['學號', '課程代碼']).reset_index(drop=True)
+    datas = DataManager.from_dataframe(df)
+    datas.student_accounts, datas.teacher_accounts = make_accounts(df)
+    server = GradeServer(('127.0.0.1', 0), datas)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rng = random.Random(0)
+    teacher_courses = {teacher: {course_id: rows['學號'].tolist() for course_id, rows in group.groupby('課程代碼')}
+                       for teacher, group in df.groupby('教師')}
+    student_ids = df['學號'].unique().tolist()
+    results = defaultdict(list)
+    stop = threading.Event()
+    threads = []
+    num_teachers = int(args.clients * args.teachers)
+    for i in range(args.clients):
+        if i < num_teachers:
+            teacher = rng.choice(list(teacher_courses))
+            client, courses = Client(port, 'teacher', teacher), teacher_courses[teacher]
+        else:
+            client, courses = Client(port, 'student', rng.choice(student_ids)), None
+        thread = threading.Thread(target=run_client, args=(client, courses, stop, args.write_ratio, results,
+                                                           random.Random(i)), daemon=True)
+        threads.append(thread)
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    total = sum(len(items) for items in results.values())
+    print(f"{args.clients} 個用戶端，{args.duration:.0f} 秒共 {total} 個要求，每秒 {total / args.duration:.0f} 個")
+    print(f"{'API':>8} {'次數':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'錯誤':>5}")
+    for name, items in sorted(results.items()):
+        latencies = np.array([latency for latency, _ in items]) * 1000
+        errors = sum(status != 200 for _, status in items)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{name:>8} {len(items):>7} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {errors:>5}")
+        assert errors == 0, f"{name} 有 {errors} 個錯誤"
+
+    # 修改成績依序執行，結果必須與完整重算相同
+    expected = DataManager.from_dataframe(datas.all_courses_data[df.columns].copy())
+    pd.testing.assert_frame_equal(expected.all_courses_data, datas.all_courses_data)
+    print("修改後的資料與完整重算相同")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from synthetic import make_courses_data
+
+
+def legacy_layout(df):
+    """原本的欄位型別：字串為每列一個 Python 物件，數值為 int64 / float64"""
+    columns = {}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype.kind in 'iu':
+            values = values.astype(np.int64)
+        elif values.dtype.kind == 'f':
+            values = values.astype(np.float64)
+        else:
+            values = values.astype(object)
+        columns[column] = values
+    return df.assign(**columns).astype({column: object for column, values in columns.items()
+                                        if values.dtype == object})
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    compact = DataManager.from_dataframe(make_courses_data(num_rows)).all_courses_data
+    legacy = legacy_layout(compact)
+    before = legacy.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+
+    print(f"{'欄位':<8} {'原本型別':>10} {'位元組/列':>10} {'目前型別':>10} {'位元組/列':>10}")
+    for column in compact.columns:
+        print(f"{column:<8} {str(legacy[column].dtype):>10} {before[column] / num_rows:>10.1f} "
+              f"{str(compact[column].dtype):>10} {after[column] / num_rows:>10.1f}")
+    print(f"{num_rows} 列合計：原本 {before.sum() / 2**20:.0f} MB（{before.sum() / num_rows:.0f} 位元組/列），"
+          f"目前 {after.sum() / 2**20:.0f} MB（{after.sum() / num_rows:.0f} 位元組/列）")
+
+
+if __name__ == "__main__":
+    main()
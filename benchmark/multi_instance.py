@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager, SCORE_COLUMNS
+from synthetic import make_courses_data
+
+
+def scores(manager, key):
+    row = manager.enrollment(*key)
+    return tuple(float(row[column]) for column in SCORE_COLUMNS)
+
+
+def check_merge(keys):
+    """兩個 DataManager（各自的檔案鎖與日誌序號）模擬兩個同時執行的程式"""
+    a, b = DataManager(load_accounts=False), DataManager(load_accounts=False)
+    x, y, z = keys[:3]
+
+    # 不同格：雙方的修改都保留，沒有衝突
+    a.update_grades(*x, 11, *scores(a, x)[1:])
+    b.update_grades(*x, scores(b, x)[0], 22, scores(b, x)[2])
+    assert a.save_grades([x]) == []
+    assert b.save_grades([x]) == []
+    assert scores(b, x)[:2] == (11, 22), scores(b, x)
+
+    # 同一格改成不同的值：後儲存者保留自己的值並收到衝突
+    a.update_grades(*y, 10, *scores(a, y)[1:])
+    b.update_grades(*y, 20, *scores(b, y)[1:])
+    assert a.save_grades([y]) == []
+    conflicts = b.save_grades([y])
+    assert [(c.column, c.theirs, c.mine) for c in conflicts] == [('期中考', 10, 20)], conflicts
+    print("衝突：", conflicts[0])
+
+    # a 壓縮後日誌被清空，b 下次儲存時重新載入並保留尚未儲存的修改
+    a.save_grades([x])  # 合併 b 的修改
+    a.compact()
+    b.update_grades(*z, 33, *scores(b, z)[1:])
+    assert b.save_grades([z]) == []
+    assert scores(b, y)[0] == 20 and scores(b, x)[:2] == (11, 22)
+    a.save_grades([x])
+    fresh = DataManager(load_accounts=False)
+    for key in (x, y, z):
+        assert scores(a, key) == scores(b, key) == scores(fresh, key), key
+    # 合併後的衍生欄位與完整重算相同
+    expected = fresh.add_column(fresh.all_courses_data[[c for c in fresh.all_courses_data.columns
+                                                        if c not in fresh.DERIVED_COLUMNS]])
+    for manager in (a, b):
+        assert np.allclose(manager.all_courses_data['總成績'], expected['總成績'])
+        assert (manager.all_courses_data['GPA排名'].to_numpy() == expected['GPA排名'].to_numpy()).all()
+
+
+def worker(args):
+    """一個程式：反覆修改自己負責的修課紀錄並儲存，偶爾壓縮；回傳最後寫入的成績"""
+    keys, seed, rounds = args
+    rng = random.Random(seed)
+    manager = DataManager(load_accounts=False)
+    last = {}
+    for i in range(rounds):
+        key = rng.choice(keys)
+        values = tuple(float(rng.randint(0, 100)) for _ in SCORE_COLUMNS)
+        manager.update_grades(*key, *values)
+        assert manager.save_grades([key]) == []
+        last[key] = values
+        if i % 40 == 39:
+            manager.compact()
+    return last
+
+
+def check_processes(keys, processes=4, rounds=200):
+    """多個行程同時修改不同的修課紀錄，最後重新載入時所有修改都在"""
+    parts = [(keys[i::processes], i, rounds) for i in range(processes)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(worker, parts)
+    elapsed = time.perf_counter() - start
+    fresh = DataManager(load_accounts=False)
+    expected = {key: values for last in results for key, values in last.items()}
+    wrong = [key for key, values in expected.items() if scores(fresh, key) != values]
+    assert not wrong, wrong[:5]
+    print(f"{processes} 個行程各儲存 {rounds} 次：{elapsed:.1f} 秒，{len(expected)} 筆修改全部保留")
+
+
+def check_compaction_latency(keys, rounds=50):
+    """背景壓縮寫檔期間，本程式與其他程式的儲存不需等待寫檔完成"""
+    a, b = DataManager(load_accounts=False), DataManager(load_accounts=False)
+    for key in keys[:rounds]:
+        a.update_grades(*key, 1, 2, 3)
+        a.save_grades([key])
+    start = time.perf_counter()
+    a.compact(background=True)
+    # 另一個程式的背景壓縮在寫檔期間直接略過
+    b.compact(background=True)
+    assert b.compaction is None
+    saves = []
+    for i, key in enumerate(keys[rounds:rounds * 2]):
+        manager = (a, b)[i % 2]
+        manager.update_grades(*key, 4, 5, 6)
+        save_start = time.perf_counter()
+        manager.save_grades([key])
+        saves.append(time.perf_counter() - save_start)
+    a.compaction.join()
+    elapsed = time.perf_counter() - start
+    print(f"背景壓縮 {elapsed:.2f} 秒，期間儲存最久 {max(saves) * 1000:.0f} 毫秒")
+    assert max(saves) < elapsed / 2, "儲存等待了壓縮寫檔"
+    fresh = DataManager(load_accounts=False)
+    for key in keys[rounds:rounds * 2]:
+        assert scores(fresh, key) == (4, 5, 6), key
+
+
+def main():
+    data = make_courses_data(20_000).drop_duplicates(subset=['學號', '課程代碼']).reset_index(drop=True)
+    keys = list(data[['學號', '課程代碼']].sample(200, random_state=0).itertuples(index=False, name=None))
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        os.makedirs('save_data')
+        data.to_csv(os.path.join('save_data', 'all_courses_data.csv'), index=False, encoding='utf-8-sig')
+        check_merge(keys)
+        check_processes(keys[3:])
+
+    data = make_courses_data(300_000).drop_duplicates(subset=['學號', '課程代碼']).reset_index(drop=True)
+    keys = list(data[['學號', '課程代碼']].sample(100, random_state=0).itertuples(index=False, name=None))
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        os.makedirs('save_data')
+        data.to_csv(os.path.join('save_data', 'all_courses_data.csv'), index=False, encoding='utf-8-sig')
+        check_compaction_latency(keys)
+
+
+if __name__ == "__main__":
+    main()
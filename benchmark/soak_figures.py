@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rendering
+from data_manager import DataManager
+from matplotlib import _pylab_helpers
+from synthetic import make_courses_data
+
+# 暖機後 RSS 允許成長的上限（MB），超過即視為記憶體持續累積
+RSS_GROWTH_LIMIT_MB = 50
+# 教師畫面的成績分布圖（與 main.py 的 CHART_COLUMNS 相同）
+HISTOGRAMS = (('期中考', "期中考成績分布"), ('期末考', "期末考成績分布"),
+              ('平時成績', "平時成績分布"), ('總成績', "總成績分布"))
+
+
+def current_rss_mb():
+    """目前行程的常駐記憶體（MB）"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def render_views(manager, figures, course_id, student_id):
+    """依序繪製學生與教師畫面的每一種圖表（與畫面切換時相同的呼叫），每次產生一張"""
+    enrollment = manager.enrollment(student_id, course_id)
+    student_rows = manager.student_rows(student_id)
+    yield rendering.grade_table(figures, enrollment, '課程')
+    yield rendering.grade_chart(figures, enrollment, '課程')
+    yield rendering.all_courses_table(figures, student_rows)
+    yield rendering.all_courses_chart(figures, student_rows)
+    for column, title in HISTOGRAMS:
+        yield rendering.score_histogram(figures, manager.course_stats.get(course_id, column), title)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="反覆切換畫面，確認 Figure 不會累積")
+    parser.add_argument('--rounds', type=int, default=200, help="每一輪繪製全部 8 種畫面")
+    parser.add_argument('--warmup', type=int, default=10, help="暖機輪數，之後的 RSS 作為基準")
+    args = parser.parse_args()
+
+    manager = DataManager.from_dataframe(make_courses_data(9_000))
+    df = manager.all_courses_data
+    figures = rendering.FigureManager()
+
+    start = time.perf_counter()
+    baseline = None
+    peak = 0.0
+    count = 0
+    for i in range(args.rounds):
+        row = df.iloc[(i * 97) % len(df)]
+        for fig in render_views(manager, figures, row['課程代碼'], row['學號']):
+            figures.rasterize(fig)
+            count += 1
+        if i + 1 == args.warmup:
+            baseline = current_rss_mb()
+        elif baseline is not None:
+            peak = max(peak, current_rss_mb())
+    elapsed = time.perf_counter() - start
+
+    print(f"繪製 {count} 張圖，耗時 {elapsed:.1f} 秒")
+    print(f"建立過的 Figure：{figures.created}，pyplot 中的 Figure：{len(_pylab_helpers.Gcf.figs)}")
+    if baseline is not None:
+        print(f"暖機後 RSS：{baseline:.1f} MB，之後最高：{peak:.1f} MB")
+        assert peak - baseline < RSS_GROWTH_LIMIT_MB, "RSS 持續成長"
+    assert figures.created == 1, "Figure 沒有被重複使用"
+    assert not _pylab_helpers.Gcf.figs, "有 Figure 登記在 pyplot 中"
+
+
+if __name__ == "__main__":
+    main()
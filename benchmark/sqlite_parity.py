@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from credentials import STUDENT_DATA_PATH, TEACHER_DATA_PATH
+from data_manager import ALL_COURSES_PATH
+from sqlite_store import DATABASE_PATH, check_parity, migrate
+from synthetic import make_courses_data
+
+
+def main():
+    """以模擬資料建立資料庫，確認資料庫的查詢結果與 DataManager 相同"""
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    data = make_courses_data(num_rows).drop_duplicates(subset=['學號', '課程代碼']).reset_index(drop=True)
+    # 資料庫的學分以課程為單位保存，模擬資料的學分改為每門課程相同
+    data['學分'] = data.groupby('課程代碼')['學分'].transform('first')
+    # 沒有教師的課程：兩種保存方式都須以空值保存
+    data.loc[data['課程代碼'] == data['課程代碼'].iloc[0], '教師'] = None
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        os.makedirs('save_data')
+        data.to_csv(ALL_COURSES_PATH, index=False, encoding='utf-8-sig')
+        students = data[['學號', '姓名']].drop_duplicates('學號').assign(密碼='1234')
+        students[['學號', '密碼', '姓名']].to_csv(STUDENT_DATA_PATH, index=False, encoding='utf-8-sig')
+        teachers = data[['教師']].dropna().drop_duplicates().assign(帳號=lambda df: df['教師'], 姓名=lambda df: df['教師'])
+        teachers.assign(密碼='1234')[['帳號', '密碼', '姓名']].to_csv(TEACHER_DATA_PATH, index=False,
+                                                                   encoding='utf-8-sig')
+
+        start = time.perf_counter()
+        count = migrate(DATABASE_PATH, iterations=1)
+        print(f"匯入 {count} 筆選課資料，耗時 {time.perf_counter() - start:.1f} 秒")
+        start = time.perf_counter()
+        courses = check_parity(DATABASE_PATH)
+        print(f"{courses} 門課程的資料與排名皆與 DataManager 相同，耗時 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
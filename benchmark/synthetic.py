@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+
+def make_courses_data(num_rows, students_per_course=45, seed=42):
+    """產生與 all_courses_data.csv 相同欄位的模擬選課資料"""
+    rng = np.random.default_rng(seed)
+    num_courses = max(1, num_rows // students_per_course)
+    num_students = max(num_rows // 5, students_per_course)
+
+    course_index = np.arange(num_rows) % num_courses
+    student_index = rng.integers(0, num_students, size=num_rows)
+
+    return pd.DataFrame({
+        '學號': np.char.add('4', np.char.zfill(student_index.astype(str), 8)),
+        '姓名': np.char.add('學生', (student_index + 1).astype(str)),
+        '課程代碼': np.char.add('C', np.char.zfill(course_index.astype(str), 6)),
+        '課程名稱': np.char.add('課程', course_index.astype(str)),
+        '學分': rng.integers(1, 4, size=num_rows),
+        '教師': np.char.add('教師', (course_index % 40 + 1).astype(str)),
+        '期中考': rng.integers(0, 101, size=num_rows),
+        '期末考': rng.integers(0, 101, size=num_rows),
+        '平時成績': rng.integers(0, 101, size=num_rows),
+    })
@@ -1,171 +1,167 @@
-import pandas as pd
-import random
-import numpy as np
+import argparse
 import os
+import time
 
-random.seed(42)
-
-
-def grade_to_GPA(grade):
-    if grade >= 90:
-        return 4.3
-    elif grade >= 85:
-        return 4.0
-    elif grade >= 80:
-        return 3.7
-    elif grade >= 77:
-        return 3.3
-    elif grade >= 73:
-        return 3.0
-    elif grade >= 70:
-        return 2.7
-    elif grade >= 67:
-        return 2.4
-    elif grade >= 63:
-        return 2.0
-    elif grade >= 60:
-        return 1.7
-    elif grade >= 50:
-        return 1.0
-    else:
-        return 0
-
-# 讀取學生資料
+import numpy as np
+import pandas as pd
 
+STUDENT_DATA_PATH = os.path.join('build_id_and_password_data', 'student_data.csv')
+TEACHER_DATA_PATH = os.path.join('build_id_and_password_data', 'teacher_data.csv')
+COURSE_NAME_PATH = os.path.join('build_course_data', 'course_name.csv')
+OUTPUT_PATH = os.path.join('build_course_data', 'all_courses_data.csv')
+COLUMNS = ['學號', '姓名', '課程代碼', '課程名稱', '學分', '教師', '期中考', '期末考', '平時成績']
+DEFAULT_CHUNK_ROWS = 1_000_000
 
-def load_student_data():
-    df = pd.read_csv(r'build_id_and_password_data\student_data.csv',
-                     encoding='utf-8-sig', dtype={'學號': str, '密碼': str})
-    return df
 
-# 讀取教師資料
+# 讀取學生資料（只需要學號與姓名）
 
 
-def load_teacher_data():
-    df = pd.read_csv(r'build_id_and_password_data\teacher_data.csv',
-                     encoding='utf-8-sig', dtype={'帳號': str})
-    return df
-
-# 根據指定數量隨機選取學生
+def load_student_data(path=STUDENT_DATA_PATH):
+    return pd.read_csv(path, encoding='utf-8-sig', usecols=['學號', '姓名'], dtype={'學號': str})
 
+# 讀取教師資料
 
-def select_random_students(df, num_students, random_state=None):
-    return df.sample(n=num_students, replace=False, random_state=random_state)
 
-# 生成課程資料並返回教師與學生資料
+def load_teacher_data(path=TEACHER_DATA_PATH):
+    return pd.read_csv(path, encoding='utf-8-sig', dtype={'帳號': str})
 
+# 從文件中讀取課程代碼、名稱和學分
 
-def create_course_data(course_code, course_name, credits, teacher, students_df):
-    students_df['課程代碼'] = course_code
-    students_df['課程名稱'] = course_name
-    students_df['學分'] = credits
-    students_df['教師'] = teacher
-    np.random.seed(42)
-    # 生成隨機分數（0到100）
-    students_df['期中考'] = np.random.randint(0, 101, size=len(students_df))
-    students_df['期末考'] = np.random.randint(0, 101, size=len(students_df))
-    students_df['平時成績'] = np.random.randint(0, 101, size=len(students_df))
 
-    # 選擇欄位並重新排序
-    course_df = students_df[['學號', '姓名', '課程代碼',
-                             '課程名稱', '學分', '教師', '期中考', '期末考', '平時成績']]
+def load_course_names_and_credits(path=COURSE_NAME_PATH):
+    df = pd.read_csv(path, encoding='utf8', dtype={'課程代碼': str, '課程名稱': str})
+    return df.astype({'學分': int})[['課程代碼', '課程名稱', '學分']]
 
-    # 返回教師與學生的資料
-    return teacher, course_df
 
-# 從文件中讀取課程代碼、名稱和學分
+def make_students(num_students):
+    """模擬學生：學號為 4 加上 8 位流水號，姓名為「學生N」"""
+    numbers = np.arange(1, num_students + 1)
+    return pd.DataFrame({'學號': np.char.add('4', np.char.zfill(numbers.astype(str), 8)),
+                         '姓名': np.char.add('學生', numbers.astype(str))})
 
 
-def load_course_names_and_credits(filename):
-    courses = []
-    df = pd.read_csv(filename, encoding='utf8')
-    for _, row in df.iterrows():
-        course_code = row['課程代碼']
-        course_name = row['課程名稱']
-        credits = int(row['學分'])
-        courses.append((course_code, course_name, credits))
+def make_courses(catalog, num_courses):
+    """課程數超過課程清單時，依序重複清單並在代碼與名稱後加上班別"""
+    repeat = np.arange(num_courses) // len(catalog)
+    courses = catalog.iloc[np.arange(num_courses) % len(catalog)].reset_index(drop=True)
+    extra = repeat > 0
+    suffix = (repeat[extra] + 1).astype(str)
+    courses.loc[extra, '課程代碼'] = np.char.add(courses.loc[extra, '課程代碼'].to_numpy().astype(str), suffix)
+    courses.loc[extra, '課程名稱'] = np.char.add(
+        np.char.add(courses.loc[extra, '課程名稱'].to_numpy().astype(str), ' 第'), np.char.add(suffix, '班'))
     return courses
 
-# 生成課程與教師的對應表
-
 
-def create_courses_data(courses, teachers):
-    courses_data = []
-    teacher_count = len(teachers)
-    for i, (course_code, course_name, credits) in enumerate(courses):
-        teacher = teachers[i % teacher_count]  # 保證每位教師至少一門課程
-        courses_data.append((course_code, course_name, credits, teacher))
-    return courses_data
+def assign_teachers(courses, teachers, rng):
+    """教師隨機排列後依序分配，保證每位教師至少一門課程（課程數足夠時）"""
+    order = rng.permutation(len(teachers))
+    return courses.assign(教師=teachers[order[np.arange(len(courses)) % len(teachers)]])
+
+
+def sample_students(sizes, num_students, rng):
+    """每門課程各抽 sizes[i] 位不重複的學生，回傳 (課程位置, 學生位置)
+
+    一次抽出全部名額後，把同一門課程中重複的學生重新抽，直到沒有重複為止。"""
+    course_positions = np.repeat(np.arange(len(sizes)), sizes)
+    student_positions = rng.integers(0, num_students, size=len(course_positions))
+    while True:
+        codes = course_positions.astype(np.int64) * num_students + student_positions
+        order = np.argsort(codes, kind='stable')
+        duplicated = np.zeros(len(codes), dtype=bool)
+        duplicated[order[1:]] = codes[order[1:]] == codes[order[:-1]]
+        count = int(duplicated.sum())
+        if count == 0:
+            return course_positions, student_positions
+        student_positions[duplicated] = rng.integers(0, num_students, size=count)
+
+
+def course_chunks(sizes, chunk_rows):
+    """把課程依序分為多段，每段的修課人數合計約 chunk_rows 列"""
+    ends = np.searchsorted(np.cumsum(sizes), np.arange(chunk_rows, sizes.sum(), chunk_rows), side='right')
+    bounds = np.unique(np.concatenate([[0], ends, [len(sizes)]]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def generate(students, courses, output_path, min_size=40, max_size=50, seed=42,
+             chunk_rows=DEFAULT_CHUNK_ROWS):
+    """產生每門課程的修課名單與隨機分數，分段寫入 CSV，回傳總列數
+
+    一次只保留一段課程的資料，因此記憶體用量與總列數無關。"""
+    if max_size > len(students):
+        raise ValueError(f"每門課程最多 {max_size} 人，但只有 {len(students)} 位學生")
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(min_size, max_size + 1, size=len(courses))
+    student_ids = students['學號'].to_numpy(dtype=object)
+    student_names = students['姓名'].to_numpy(dtype=object)
+    course_columns = {column: courses[column].to_numpy() for column in ['課程代碼', '課程名稱', '學分', '教師']}
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    total = 0
+    start = time.perf_counter()
+    chunks = course_chunks(sizes, chunk_rows)
+    with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, (first, last) in enumerate(chunks):
+            course_positions, student_positions = sample_students(sizes[first:last], len(students), rng)
+            course_positions += first
+            num_rows = len(course_positions)
+            chunk = pd.DataFrame({
+                '學號': student_ids[student_positions],
+                '姓名': student_names[student_positions],
+                **{column: values[course_positions] for column, values in course_columns.items()},
+                '期中考': rng.integers(0, 101, size=num_rows),
+                '期末考': rng.integers(0, 101, size=num_rows),
+                '平時成績': rng.integers(0, 101, size=num_rows),
+            }, columns=COLUMNS)
+            chunk.to_csv(f, index=False, header=(i == 0))
+            total += num_rows
+            print(f"{i + 1}/{len(chunks)}：{total} 列，{time.perf_counter() - start:.1f} 秒")
+    os.replace(tmp_path, output_path)
+    return total
+
+
+def courses_teacher_table(courses):
+    """課程與教師的對應表，依教師編號與課程代碼排序"""
+    teacher_numbers = courses['教師'].str.extract(r'(\D+)(\d+)')
+    return courses.assign(教師名稱=teacher_numbers[0], 流水號=teacher_numbers[1].astype(int)) \
+        .sort_values(by=['教師名稱', '流水號', '課程代碼']).drop(columns=['教師名稱', '流水號'])
 
 # 主程序
 
 
 def main():
-    # 讀取學生資料
-    students_df = load_student_data()
-
-    # 讀取教師資料
-    teachers_df = load_teacher_data()
-    teachers_list = teachers_df['姓名'].tolist()
-    random.shuffle(teachers_list)  # 隨機排列教師
-
-    # 讀取課程名稱和學分
-    courses = load_course_names_and_credits(
-        r'build_course_data\course_name.csv')
-
-    # 創建課程與教師對應表
-    courses_data = create_courses_data(courses, teachers_list)
-
-    # 用於存儲所有課程資料的 DataFrame
-    all_courses_df = pd.DataFrame()
-    courses_teacher_df = pd.DataFrame(columns=['課程代碼', '課程名稱', '學分', '教師'])
-
-    # 為每門課程添加資料
-    for course_code, course_name, credits, teacher in courses_data:
-        random_state = random.randint(0, 100)
-        num_students = random.randint(40, 50)  # 確保每門課程有 40~50 個學生
-        selected_students = select_random_students(
-            students_df, num_students, random_state=random_state)
-        teacher_name, course_df = create_course_data(
-            course_code, course_name, credits, teacher, selected_students)
-
-        # 添加到總的資料框中
-        all_courses_df = pd.concat(
-            [all_courses_df, course_df], ignore_index=True)
-
-        # 添加課程與教師對應的資料到 DataFrame
-        courses_teacher_df = pd.concat([courses_teacher_df, pd.DataFrame([{
-            '課程代碼': course_code,
-            '課程名稱': course_name,
-            '學分': credits,
-            '教師': teacher
-        }])], ignore_index=True)
-
-    # 分離教師名稱和流水號
-    courses_teacher_df[['教師名稱', '流水號']
-                       ] = courses_teacher_df['教師'].str.extract(r'(\D+)(\d+)')
-    courses_teacher_df['流水號'] = courses_teacher_df['流水號'].astype(int)
-
-    # 根據教師名稱和流水號排序
-    courses_teacher_df = courses_teacher_df.sort_values(
-        by=['教師名稱', '流水號', '課程代碼'])
-
-    # 刪除額外的列
-    courses_teacher_df = courses_teacher_df.drop(columns=['教師名稱', '流水號'])
-
-    # 確保目錄存在
-    output_dir = 'build_course_data'
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    # 保存所有課程資料到一個 CSV 文件
-    all_courses_df.to_csv(os.path.join(
-        output_dir, 'all_courses_data.csv'), index=False, encoding='utf-8-sig')
-    print("已創建 all_courses_data.csv")
-
-    # # 保存課程與教師對應表到 CSV 文件
-    # courses_teacher_df.to_csv(os.path.join(output_dir, 'courses_teacher.csv'), index=False, encoding='utf-8-sig')
-    # print("已創建 courses_teacher.csv")
+    parser = argparse.ArgumentParser(description="產生模擬的修課資料（all_courses_data.csv）")
+    parser.add_argument('--students', type=int, default=None,
+                        help="模擬學生數（預設讀取 --student-file 的學生）")
+    parser.add_argument('--student-file', default=STUDENT_DATA_PATH)
+    parser.add_argument('--teacher-file', default=TEACHER_DATA_PATH)
+    parser.add_argument('--course-file', default=COURSE_NAME_PATH)
+    parser.add_argument('--courses', type=int, default=None,
+                        help="課程數（預設為課程清單的課程數，超過時重複清單並加上班別）")
+    parser.add_argument('--per-course', type=int, nargs=2, default=(40, 50), metavar=('MIN', 'MAX'),
+                        help="每門課程的修課人數範圍")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="每次寫入的列數")
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--course-teacher-output', default=None, help="另外輸出課程與教師的對應表")
+    args = parser.parse_args()
+
+    if args.students is not None:
+        students = make_students(args.students)
+    else:
+        students = load_student_data(args.student_file)
+    teachers = load_teacher_data(args.teacher_file)['姓名'].to_numpy(dtype=object)
+    catalog = load_course_names_and_credits(args.course_file)
+    courses = make_courses(catalog, args.courses or len(catalog))
+    courses = assign_teachers(courses, teachers, np.random.default_rng(args.seed))
+
+    start = time.perf_counter()
+    total = generate(students, courses, args.output, *args.per_course, seed=args.seed, chunk_rows=args.chunk_rows)
+    print(f"已創建 {args.output}：{len(courses)} 門課程，{total} 列，耗時 {time.perf_counter() - start:.1f} 秒")
+
+    if args.course_teacher_output:
+        courses_teacher_table(courses).to_csv(args.course_teacher_output, index=False, encoding='utf-8-sig')
+        print(f"已創建 {args.course_teacher_output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from credentials import DEFAULT_ITERATIONS, HASH_COLUMN, PLAIN_COLUMN, hash_password
+
+DEPARTMENT_CODES_PATH = os.path.join('build_id_and_password_data', 'department_codes.csv')
+STUDENT_DATA_PATH = os.path.join('build_id_and_password_data', 'student_data.csv')
+TEACHER_DATA_PATH = os.path.join('build_id_and_password_data', 'teacher_data.csv')
+# 每班座號 01~99
+SEATS_PER_CLASS = 99
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def load_departments(path=DEPARTMENT_CODES_PATH):
+    """讀取學院與學系代碼（學系代碼可能以 0 開頭或含英文字母，以字串讀取）"""
+    return pd.read_csv(path, encoding='utf-8-sig', dtype=str)
+
+
+def student_slots(num_students, capacity, rng):
+    """從 0 ~ capacity - 1 中不重複地抽出 num_students 個編號，由小到大排列"""
+    if num_students > capacity:
+        raise ValueError(f"學號組合最多 {capacity} 個，不足 {num_students} 位學生；"
+                         "請以 --degrees、--years、--classes 增加組合")
+    if num_students * 4 >= capacity:
+        slots = rng.permutation(capacity)[:num_students]
+    else:
+        # 名額遠少於組合數時先多抽一些再去除重複，不需要排列全部組合
+        slots = np.unique(rng.integers(0, capacity, size=num_students * 2))
+        while len(slots) < num_students:
+            slots = np.unique(np.concatenate([slots, rng.integers(0, capacity, size=num_students)]))
+        slots = rng.permutation(slots)[:num_students]
+    return np.sort(slots)
+
+
+def compose_student_ids(slots, departments, degrees, years, num_classes):
+    """將編號拆為 (學系, 學制, 入學年, 班級, 座號)，組成「學制 入學年 學系 班級 座號 學院」格式的學號
+
+    編號依學系（CSV 中的順序）、學制、入學年、班級、座號排列，排序後的編號即依學系分組輸出。"""
+    slots, seat = np.divmod(slots, SEATS_PER_CLASS)
+    slots, class_number = np.divmod(slots, num_classes)
+    slots, year = np.divmod(slots, len(years))
+    department, degree = np.divmod(slots, len(degrees))
+    parts = [
+        np.asarray(degrees, dtype=str)[degree],
+        np.asarray(years, dtype=str)[year],
+        departments['Department Code'].to_numpy(dtype=str)[department],
+        class_number.astype(str),
+        np.char.zfill((seat + 1).astype(str), 2),
+        departments['College Code'].to_numpy(dtype=str)[department],
+    ]
+    ids = parts[0]
+    for part in parts[1:]:
+        ids = np.char.add(ids, part)
+    return ids
+
+
+def random_passwords(count, rng):
+    """4 位數字的模擬密碼"""
+    return rng.integers(1000, 10000, size=count).astype(str)
+
+
+def student_chunks(num_students, departments, degrees, years, num_classes, rng, chunk_rows):
+    """依學號順序分段產生學生帳號 DataFrame（學號、姓名、密碼）"""
+    capacity = len(departments) * len(degrees) * len(years) * num_classes * SEATS_PER_CLASS
+    slots = student_slots(num_students, capacity, rng)
+    for first in range(0, num_students, chunk_rows):
+        part = slots[first:first + chunk_rows]
+        numbers = np.arange(first + 1, first + len(part) + 1).astype(str)
+        yield pd.DataFrame({'學號': compose_student_ids(part, departments, degrees, years, num_classes),
+                            '姓名': np.char.add('學生', numbers),
+                            PLAIN_COLUMN: random_passwords(len(part), rng)})
+
+
+def teacher_chunks(num_teachers, rng, chunk_rows):
+    """分段產生教師帳號 DataFrame（帳號為補零的流水號，至少 3 位）"""
+    width = max(3, len(str(num_teachers)))
+    for first in range(0, num_teachers, chunk_rows):
+        numbers = np.arange(first + 1, min(first + chunk_rows, num_teachers) + 1).astype(str)
+        yield pd.DataFrame({'帳號': np.char.zfill(numbers, width),
+                            '姓名': np.char.add('教師', numbers),
+                            PLAIN_COLUMN: random_passwords(len(numbers), rng)})
+
+
+def write_accounts(path, account_column, chunks, iterations=None, executor=None, password_path=None):
+    """分段寫入帳號檔，回傳筆數
+
+    iterations 為 None 時寫入明文密碼（與原本的格式相同）；否則直接寫入雜湊後的密碼，
+    格式與 `python credentials.py migrate` 的結果相同，明文密碼可另外寫到 password_path。"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    password_file = open(password_path, 'w', encoding='utf-8-sig', newline='') if password_path else None
+    total = 0
+    start = time.perf_counter()
+    try:
+        with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+            for chunk in chunks:
+                if password_file is not None:
+                    chunk[[account_column, PLAIN_COLUMN]].to_csv(password_file, index=False, header=(total == 0))
+                if iterations is not None:
+                    # 雜湊計算量大，分散到多個行程
+                    hashes = list(executor.map(hash_password, chunk[PLAIN_COLUMN], repeat(iterations),
+                                               chunksize=256))
+                    chunk = pd.DataFrame({account_column: chunk[account_column], '姓名': chunk['姓名'],
+                                          HASH_COLUMN: hashes})
+                else:
+                    chunk = chunk[[account_column, PLAIN_COLUMN, '姓名']]
+                chunk.to_csv(f, index=False, header=(total == 0))
+                total += len(chunk)
+                print(f"{path}：{total} 筆，{time.perf_counter() - start:.1f} 秒")
+    finally:
+        if password_file is not None:
+            password_file.close()
+    os.replace(tmp_path, path)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="產生模擬的學生與教師帳號")
+    parser.add_argument('--departments', default=DEPARTMENT_CODES_PATH, help="學院與學系代碼 CSV")
+    parser.add_argument('--students', type=int, default=None, help="學生數（預設每個學系 45 人）")
+    parser.add_argument('--teachers', type=int, default=40, help="教師數")
+    parser.add_argument('--degrees', nargs='+', default=['4'], help="學制代碼（4 學士、6 碩士、8 博士）")
+    parser.add_argument('--years', type=int, nargs=2, default=(10, 12), metavar=('FIRST', 'LAST'),
+                        help="入學年（民國年後兩位）範圍")
+    parser.add_argument('--classes', type=int, default=3, choices=range(1, 11), metavar='1-10',
+                        help="每個學系每年的班級數")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="每次寫入的筆數")
+    parser.add_argument('--student-output', default=STUDENT_DATA_PATH)
+    parser.add_argument('--teacher-output', default=TEACHER_DATA_PATH)
+    parser.add_argument('--hash', action='store_true', help="直接寫入雜湊後的密碼")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="PBKDF2 迭代次數")
+    parser.add_argument('--workers', type=int, default=None, help="雜湊的平行行程數")
+    parser.add_argument('--password-dir', default=None,
+                        help="搭配 --hash：另外將明文密碼寫到此資料夾（供登入測試使用）")
+    args = parser.parse_args(argv)
+
+    departments = load_departments(args.departments)
+    num_students = args.students if args.students is not None else 45 * len(departments)
+    years = [f'{year:02d}' for year in range(args.years[0], args.years[1] + 1)]
+    rng = np.random.default_rng(args.seed)
+    iterations = args.iterations if args.hash else None
+
+    def password_path(name):
+        if args.password_dir is None:
+            return None
+        os.makedirs(args.password_dir, exist_ok=True)
+        return os.path.join(args.password_dir, name)
+
+    with ProcessPoolExecutor(max_workers=args.workers) if args.hash else nullcontext() as executor:
+        if num_students:
+            start = time.perf_counter()
+            students = student_chunks(num_students, departments, args.degrees, years, args.classes, rng,
+                                      args.chunk_rows)
+            count = write_accounts(args.student_output, '學號', students, iterations, executor,
+                                   password_path('student_passwords.csv'))
+            print(f"學生資料已保存到 '{args.student_output}'：{count} 筆，耗時 {time.perf_counter() - start:.1f} 秒")
+        if args.teachers:
+            start = time.perf_counter()
+            teachers = teacher_chunks(args.teachers, rng, args.chunk_rows)
+            count = write_accounts(args.teacher_output, '帳號', teachers, iterations, executor,
+                                   password_path('teacher_passwords.csv'))
+            print(f"教師資料已保存到 '{args.teacher_output}'：{count} 筆，耗時 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
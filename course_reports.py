@@ -0,0 +1,118 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from course_stats import STATS_COLUMNS
+
+# 名單的欄位與排序（總成績由高到低，同分依學號）
+ROSTER_COLUMNS = ['總成績排名', '學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
+ROSTER_ORDER = [('總成績', False), ('學號', True)]
+HISTOGRAM_TITLES = {'期中考': "期中考成績分布", '期末考': "期末考成績分布",
+                    '平時成績': "平時成績分布", '總成績': "總成績分布"}
+SUMMARY_PERCENTILES = (25, 75)
+
+# 工作行程中的資料與 Figure（由 init_worker 建立）
+datas = None
+figures = None
+
+
+def init_worker():
+    """工作行程初始化：各自開啟欄位式快取（memory map，與其他行程共用檔案頁面）並重播日誌，
+    之後每個工作只需傳送課程代碼，不必把整份資料傳給每個工作"""
+    global datas, figures
+    import rendering
+    from data_manager import DataManager
+    datas = DataManager(load_accounts=False)
+    figures = rendering.FigureManager(pool_size=1)
+
+
+def course_summary(manager, course_id):
+    """課程各項成績的統計（取自 course_stats）"""
+    summary = {}
+    for column in STATS_COLUMNS:
+        stats = manager.course_stats.get(course_id, column)
+        values = {
+            '平均數': stats.mean(),
+            '中位數': stats.median(),
+            '標準差': stats.std(),
+            '最低分': stats.percentile(0),
+            '最高分': stats.percentile(100),
+            **{f'第{q}百分位數': stats.percentile(q) for q in SUMMARY_PERCENTILES},
+            '及格率': stats.pass_rate(),
+        }
+        summary[column] = {'人數': len(stats), **{name: round(value, 4) for name, value in values.items()}}
+    return summary
+
+
+def export_course(task):
+    """工作行程：輸出一門課程的報告（名單 CSV、四張分布圖、統計 JSON），回傳 (課程代碼, 資料夾)"""
+    import rendering
+    course_id, output_dir = task
+    course_dir = os.path.join(output_dir, str(course_id))
+    os.makedirs(course_dir, exist_ok=True)
+
+    roster = datas.sorted_course_rows(course_id, ROSTER_ORDER)
+    roster[ROSTER_COLUMNS].to_csv(os.path.join(course_dir, 'roster.csv'), index=False, encoding='utf-8-sig')
+
+    for column in STATS_COLUMNS:
+        stats = datas.course_stats.get(course_id, column)
+        if len(stats) == 0:
+            continue
+        image = figures.rasterize(rendering.score_histogram(figures, stats, HISTOGRAM_TITLES[column]))
+        image.save(os.path.join(course_dir, f'{column}分布.png'))
+
+    with open(os.path.join(course_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        info = {'課程代碼': course_id, '課程名稱': roster['課程名稱'].iat[0] if len(roster) else '',
+                '教師': roster['教師'].iat[0] if len(roster) else '', '統計': course_summary(datas, course_id)}
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return course_id, course_dir
+
+
+def select_courses(manager, teacher=None):
+    """要輸出的課程：指定教師的課程，或全校所有課程"""
+    if teacher is not None:
+        return list(dict.fromkeys(manager.teacher_rows(teacher)['課程代碼']))
+    return list(manager.indexes['課程代碼'].keys)
+
+
+def export(course_ids, output_dir, workers=None):
+    """以行程池輸出各課程的報告，回傳完成的課程數"""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(course_id, output_dir) for course_id in course_ids]
+    count = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        for _ in pool.imap_unordered(export_course, tasks):
+            count += 1
+            if count % 50 == 0 or count == len(tasks):
+                elapsed = time.perf_counter() - start
+                print(f"{count}/{len(tasks)}，每秒 {count / elapsed:.1f} 門課程")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批次輸出課程報告（名單、成績分布圖與統計）")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--teacher', help="只輸出此教師的課程")
+    group.add_argument('--all', action='store_true', help="輸出全校所有課程")
+    parser.add_argument('--output', default='reports', help="輸出資料夾")
+    parser.add_argument('--workers', type=int, default=None, help="工作行程數（預設為 CPU 核心數）")
+    args = parser.parse_args()
+
+    from data_manager import DataManager
+    # 主行程先載入一次：快取過期時由這裡重建，工作行程即可直接 memory map
+    manager = DataManager(load_accounts=False)
+    course_ids = select_courses(manager, args.teacher)
+    if not course_ids:
+        print(f"找不到教師 {args.teacher} 的課程")
+        return
+    start = time.perf_counter()
+    count = export(course_ids, args.output, args.workers)
+    print(f"輸出 {count} 門課程的報告到 {args.output}，耗時 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
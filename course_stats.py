@@ -0,0 +1,216 @@
+import math
+
+# 統計的分數欄位
+STATS_COLUMNS = ('期中考', '期末考', '平時成績', '總成績')
+# 直方圖的範圍與組數（與原本 ax.hist(bins=10, range=(0, 100)) 相同）
+HISTOGRAM_RANGE = (0, 100)
+HISTOGRAM_BINS = 10
+# 及格分數
+PASS_SCORE = 60
+# 計數的格數：低於範圍、範圍內每 1 分一格（含上限 100 分）、高於範圍
+SLOT_COUNT = HISTOGRAM_RANGE[1] - HISTOGRAM_RANGE[0] + 3
+
+
+class ScoreStats:
+    """單一課程、單一欄位的分數統計
+
+    保存筆數、總和、平方和與直方圖各組人數，分數依所在的 1 分區間計數：以 Fenwick 樹
+    保存各格人數的前綴和，每格另以 {分數: 人數} 保存確切的分數。修改一筆分數只需
+    O(log 格數) 更新，百分位數與及格率以樹找出所在的格，再排序該格內的分數，
+    與人數無關。缺值不列入統計。
+    """
+
+    def __init__(self, values=()):
+        self.tree = [0] * (SLOT_COUNT + 1)  # Fenwick 樹（由 1 起算）
+        self.slots = [{} for _ in range(SLOT_COUNT)]
+        self.sorted_slots = {}  # 格 -> 排序後的 (分數, 人數)，該格改變時丟棄
+        self.bins = [0] * HISTOGRAM_BINS
+        scores = [float(value) for value in values if not math.isnan(value)]
+        self.total = math.fsum(scores)
+        self.total_squares = math.fsum(score * score for score in scores)
+        self.count = len(scores)
+        # 先計數再一次建立 Fenwick 樹：O(筆數 + 格數)
+        for score in scores:
+            slot = self.slots[self.slot_of(score)]
+            slot[score] = slot.get(score, 0) + 1
+            self.update_bin(score, 1)
+        for i, slot in enumerate(self.slots, start=1):
+            self.tree[i] += sum(slot.values())
+            parent = i + (i & -i)
+            if parent <= SLOT_COUNT:
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def slot_of(score):
+        """分數所屬的計數格：0 為低於範圍，最後一格為高於範圍"""
+        low, high = HISTOGRAM_RANGE
+        if score < low:
+            return 0
+        if score > high:
+            return SLOT_COUNT - 1
+        return int(score - low) + 1
+
+    @staticmethod
+    def bin_of(score):
+        """分數所屬的組別，超出範圍時回傳 None；最後一組包含上限"""
+        low, high = HISTOGRAM_RANGE
+        if score < low or score > high:
+            return None
+        return min(int((score - low) * HISTOGRAM_BINS / (high - low)), HISTOGRAM_BINS - 1)
+
+    def update_bin(self, score, delta):
+        index = self.bin_of(score)
+        if index is not None:
+            self.bins[index] += delta
+
+    def update_tree(self, slot, delta):
+        i = slot + 1
+        while i <= SLOT_COUNT:
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_before(self, slot):
+        """位於 slot 之前各格的人數"""
+        count, i = 0, slot
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def add(self, score):
+        if math.isnan(score):
+            return
+        slot_index = self.slot_of(score)
+        slot = self.slots[slot_index]
+        slot[score] = slot.get(score, 0) + 1
+        self.sorted_slots.pop(slot_index, None)
+        self.update_tree(slot_index, 1)
+        self.count += 1
+        self.total += score
+        self.total_squares += score * score
+        self.update_bin(score, 1)
+
+    def remove(self, score):
+        if math.isnan(score):
+            return
+        slot_index = self.slot_of(score)
+        slot = self.slots[slot_index]
+        if slot[score] == 1:
+            del slot[score]
+        else:
+            slot[score] -= 1
+        self.sorted_slots.pop(slot_index, None)
+        self.update_tree(slot_index, -1)
+        self.count -= 1
+        self.total -= score
+        self.total_squares -= score * score
+        self.update_bin(score, -1)
+
+    def replace(self, old_score, new_score):
+        """一位學生的分數由 old_score 改為 new_score"""
+        self.remove(float(old_score))
+        self.add(float(new_score))
+
+    def copy(self):
+        """複本（供其他執行緒讀取，不受之後的修改影響）"""
+        other = ScoreStats.__new__(ScoreStats)
+        other.count = self.count
+        other.total = self.total
+        other.total_squares = self.total_squares
+        other.tree = list(self.tree)
+        other.slots = [dict(slot) for slot in self.slots]
+        other.sorted_slots = dict(self.sorted_slots)
+        other.bins = list(self.bins)
+        return other
+
+    def nth(self, k):
+        """由小到大第 k 個分數（由 0 起算）：在 Fenwick 樹上往下找到所在的格，再排序格內的分數"""
+        position, remaining = 0, k
+        step = 1 << (SLOT_COUNT.bit_length() - 1)
+        while step:
+            if position + step <= SLOT_COUNT and self.tree[position + step] <= remaining:
+                position += step
+                remaining -= self.tree[position]
+            step >>= 1
+        items = self.sorted_slots.get(position)
+        if items is None:
+            items = self.sorted_slots[position] = sorted(self.slots[position].items())
+        for score, count in items:
+            if remaining < count:
+                return score
+            remaining -= count
+        raise IndexError(k)
+
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def median(self):
+        return self.percentile(50)
+
+    def percentile(self, q):
+        """第 q 百分位數（線性內插，與 numpy.percentile 預設相同）"""
+        if not self.count:
+            return math.nan
+        position = (self.count - 1) * q / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, self.count - 1)
+        low_score, high_score = self.nth(lower), self.nth(upper)
+        return low_score + (high_score - low_score) * (position - lower)
+
+    def std(self, ddof=1):
+        """標準差（預設為樣本標準差，與 pandas 相同）"""
+        if self.count <= ddof:
+            return math.nan
+        variance = (self.total_squares - self.total * self.total / self.count) / (self.count - ddof)
+        return math.sqrt(max(variance, 0.0))
+
+    def pass_rate(self, pass_score=PASS_SCORE):
+        """分數達到 pass_score 的比例"""
+        if not self.count:
+            return math.nan
+        slot = self.slot_of(pass_score)
+        failed = self.count_before(slot) + sum(count for score, count in self.slots[slot].items()
+                                               if score < pass_score)
+        return 1 - failed / self.count
+
+    def histogram(self):
+        """(各組人數, 組界)，格式同 numpy.histogram"""
+        low, high = HISTOGRAM_RANGE
+        step = (high - low) / HISTOGRAM_BINS
+        return list(self.bins), [low + step * i for i in range(HISTOGRAM_BINS + 1)]
+
+
+class CourseStats:
+    """各課程的分數統計
+
+    第一次查詢某門課程時才由 DataManager 取出資料建立，之後隨成績修改更新，
+    因此只有看過的課程佔用記憶體。
+    """
+
+    def __init__(self, datas):
+        self.datas = datas
+        self.courses = {}  # 課程代碼 -> {欄位: ScoreStats}
+
+    def get(self, course_id, column):
+        """課程某欄位的統計"""
+        stats = self.courses.get(course_id)
+        if stats is None:
+            rows = self.datas.course_rows(course_id)
+            stats = {name: ScoreStats(rows[name].to_numpy(dtype=float)) for name in STATS_COLUMNS}
+            self.courses[course_id] = stats
+        return stats[column]
+
+    def update(self, course_id, old_values, new_values):
+        """一位學生的成績改變：old_values、new_values 為 {欄位: 分數}"""
+        stats = self.courses.get(course_id)
+        if stats is None:
+            return
+        for column in STATS_COLUMNS:
+            stats[column].replace(old_values[column], new_values[column])
+
+    def discard(self, course_id):
+        """多列一起改變時，丟棄統計，下次查詢再重新建立"""
+        self.courses.pop(course_id, None)
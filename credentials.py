@@ -0,0 +1,150 @@
+import argparse
+import csv
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+
+# PBKDF2 預設迭代次數（雜湊成本），可依硬體效能調整
+DEFAULT_ITERATIONS = 100_000
+# 雜湊後的密碼欄位名稱
+HASH_COLUMN = '密碼雜湊'
+# 尚未轉換的明文密碼欄位名稱
+PLAIN_COLUMN = '密碼'
+# 讀取明文舊檔時暫存雜湊的迭代次數
+LEGACY_ITERATIONS = 1
+
+STUDENT_DATA_PATH = os.path.join('save_data', 'student_data.csv')
+TEACHER_DATA_PATH = os.path.join('save_data', 'teacher_data.csv')
+
+
+def hash_password(password, iterations=DEFAULT_ITERATIONS, salt=None):
+    """以加鹽的 PBKDF2-SHA256 雜湊密碼，回傳 '演算法$迭代次數$鹽$雜湊' 格式的字串"""
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def hash_iterations(encoded, default=DEFAULT_ITERATIONS):
+    """雜湊字串中的迭代次數，格式不符時回傳 default"""
+    parts = encoded.split('$')
+    if len(parts) == 4 and parts[1].isdigit():
+        return int(parts[1])
+    return default
+
+
+def verify_password(password, encoded):
+    """檢查密碼是否與雜湊字串相符"""
+    try:
+        algorithm, iterations, salt, digest = encoded.split('$')
+    except ValueError:
+        return False
+    if algorithm != 'pbkdf2_sha256':
+        return False
+    candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'),
+                                    bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(candidate.hex(), digest)
+
+
+class CredentialStore:
+    """帳號密碼資料：帳號 -> (姓名, 密碼雜湊)，以字典查詢帳號為 O(1)"""
+
+    def __init__(self):
+        self.accounts = {}
+        self.legacy_count = 0
+        # 檔案中雜湊的迭代次數，不存在的帳號以相同成本計算雜湊
+        self.iterations = DEFAULT_ITERATIONS
+        self._dummy_hash = None
+
+    @classmethod
+    def load(cls, path, account_column):
+        """讀取帳號資料檔，只保留雜湊後的密碼
+
+        尚未轉換的舊檔（明文 '密碼' 欄位）會在讀取時以低成本的加鹽雜湊保存，
+        記憶體中不保留明文；請使用 `python credentials.py migrate` 轉換檔案。
+        """
+        store = cls()
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                encoded = row.get(HASH_COLUMN)
+                if not encoded:
+                    encoded = hash_password(row[PLAIN_COLUMN], iterations=LEGACY_ITERATIONS)
+                    store.legacy_count += 1
+                if not store.accounts:
+                    # 同一個檔案的雜湊以相同次數計算，以第一筆為準
+                    store.iterations = hash_iterations(encoded)
+                store.accounts[row[account_column]] = (row['姓名'], encoded)
+        if store.legacy_count:
+            print(f"{path} 有 {store.legacy_count} 筆明文密碼，請執行 python credentials.py migrate 轉換")
+        return store
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def __contains__(self, account):
+        return account in self.accounts
+
+    def verify(self, account, password):
+        """驗證帳號密碼，成功時回傳姓名，失敗回傳 None"""
+        entry = self.accounts.get(account)
+        if entry is None:
+            # 帳號不存在時仍計算一次雜湊，避免由回應時間判斷帳號是否存在
+            if self._dummy_hash is None:
+                self._dummy_hash = hash_password('', iterations=self.iterations)
+            verify_password(password, self._dummy_hash)
+            return None
+        name, encoded = entry
+        return name if verify_password(password, encoded) else None
+
+
+def _hash_row(args):
+    password, iterations = args
+    return hash_password(password, iterations=iterations)
+
+
+def migrate_csv(path, account_column, iterations=DEFAULT_ITERATIONS, workers=None):
+    """將明文密碼檔轉換為雜湊密碼檔（原地寫回），回傳轉換的筆數"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows or PLAIN_COLUMN not in rows[0]:
+        return 0
+
+    # 雜湊計算量大，分散到多個行程
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(
+            _hash_row, ((row[PLAIN_COLUMN], iterations) for row in rows), chunksize=64))
+
+    # 先寫入暫存檔再取代，避免中途失敗而損毀原檔
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([account_column, '姓名', HASH_COLUMN])
+        for row, encoded in zip(rows, hashes):
+            writer.writerow([row[account_column], row['姓名'], encoded])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帳號密碼工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate = subparsers.add_parser('migrate', help="將明文密碼檔轉換為雜湊密碼檔")
+    migrate.add_argument('--students', default=STUDENT_DATA_PATH, help="學生帳號檔")
+    migrate.add_argument('--teachers', default=TEACHER_DATA_PATH, help="教師帳號檔")
+    migrate.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="PBKDF2 迭代次數")
+    migrate.add_argument('--workers', type=int, default=None, help="平行處理的行程數")
+    args = parser.parse_args()
+
+    for path, account_column in ((args.students, '學號'), (args.teachers, '帳號')):
+        count = migrate_csv(path, account_column, args.iterations, args.workers)
+        if count:
+            print(f"已轉換 {path}：{count} 筆")
+        else:
+            print(f"{path} 已是雜湊格式，略過")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,998 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from course_stats import STATS_COLUMNS, CourseStats
+from credentials import CredentialStore, STUDENT_DATA_PATH, TEACHER_DATA_PATH
+from file_lock import FileLock
+from grade_journal import GradeJournal, SCORE_COLUMNS
+from storage import ColumnarStorage, PositionIndex
+
+ALL_COURSES_PATH = os.path.join('save_data', 'all_courses_data.csv')
+JOURNAL_PATH = os.path.join('save_data', 'all_courses_data.journal')
+CACHE_DIR = os.path.join('save_data', 'cache')
+# 多個程式同時開啟時，讀寫 save_data 前先取得此檔案鎖
+LOCK_PATH = os.path.join('save_data', 'all_courses_data.lock')
+# 同一時間只有一個程式壓縮日誌；與上面的資料鎖分開，寫檔期間不阻擋儲存
+COMPACTION_LOCK_PATH = os.path.join('save_data', 'all_courses_data.compact.lock')
+
+
+def exact_floats(values):
+    """轉為 float64；float32 取最短的十進位表示（4.3 而不是 4.300000190734863），供顯示、日誌與 JSON 使用"""
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return values.astype(str).astype(float)
+    return values.astype(float)
+
+
+def exact_values(df):
+    """DataFrame 中的 float32 欄位以 exact_floats 轉換，其餘欄位不變"""
+    columns = {column: exact_floats(df[column]) for column in df.columns if df[column].dtype == np.float32}
+    return df.assign(**columns) if columns else df
+
+
+class DataLoadError(Exception):
+    """資料檔讀取失敗；可能在背景執行緒中發生，由介面負責顯示訊息"""
+
+
+class GradeConflict:
+    """儲存時發現其他程式也修改了同一格成績：保留本程式的值，並回報給使用者"""
+
+    def __init__(self, student_id, course_id, column, theirs, mine):
+        self.student_id = student_id
+        self.course_id = course_id
+        self.column = column
+        self.theirs = theirs
+        self.mine = mine
+
+    def __str__(self):
+        return (f"{self.student_id} 的{self.column}：其他使用者改為 {format(self.theirs, 'g')}，"
+                f"已以您的 {format(self.mine, 'g')} 儲存")
+
+
+class CoursesFileChanges:
+    """基底 CSV 與目前資料的比對結果（read_courses_file 在背景執行緒建立，sync_courses_file 套用）
+
+    old、indexes 為比對時的資料與索引，套用前若已被換掉須重新比對。列的位置不變時 updates
+    為 {欄位: (列位置, 新值)}；有新增或刪除的列時 frame、frame_indexes 為新的資料表與索引。"""
+
+    def __init__(self, old, indexes, new):
+        self.old = old
+        self.indexes = indexes
+        self.new = new
+        self.deleted = self.changed = np.empty(0, dtype=np.intp)
+        self.inserted_courses = []
+        self.updates = {}
+        self.frame = self.frame_indexes = None
+
+
+class DataManager:
+    # 建立索引的欄位（鍵 -> 列位置）；(學號, 課程代碼) 的查詢由學號索引再比對課程代碼
+    INDEX_COLUMNS = ('學號', '姓名', '課程代碼', '課程名稱', '教師')
+    ENROLLMENT_KEY = ('學號', '課程代碼')
+    # 以 Categorical 保存的字串欄位。姓名幾乎每位學生都不同，與學號的鍵數相同時，pandas 取單列
+    # （df.iloc[row]）會逐一比較兩欄的鍵清單，每次數十毫秒，因此姓名維持字串
+    CATEGORY_COLUMNS = ('學號', '課程代碼', '課程名稱', '教師')
+    # add_column 產生的衍生欄位，存檔時不寫入
+    DERIVED_COLUMNS = ['總成績', 'GPA', '期中考排名', '期末考排名', '平時成績排名',
+                       '總排名', '總人數', '總成績排名', 'GPA排名']
+    # 日誌累積到此筆數時，於背景將日誌併回基底 CSV
+    COMPACT_THRESHOLD = 500
+    # 預先排序的欄位：每門課程各保留一份依此欄遞增排列的列順序
+    SORT_COLUMNS = ('學號', '期中考', '期末考', '平時成績', '總成績', 'GPA')
+    # 精簡的欄位型別：總成績與 GPA 用 float32，排名與人數用 int32；
+    # 成績見 score_array，字串欄位見 categorize_strings
+    COLUMN_DTYPES = {'學分': np.int8, '總成績': np.float32, 'GPA': np.float32,
+                     '期中考排名': np.int32, '期末考排名': np.int32, '平時成績排名': np.int32, '總排名': np.int32,
+                     '總人數': np.int32, '總成績排名': np.int32, 'GPA排名': np.int32}
+
+    # GPA 換算表（4.3 制）：(分數下限, GPA)，分數 >= 下限即取得該 GPA，由高到低排列
+    GPA_TABLE = (
+        (90, 4.3),
+        (85, 4.0),
+        (80, 3.7),
+        (77, 3.3),
+        (73, 3.0),
+        (70, 2.7),
+        (67, 2.4),
+        (63, 2.0),
+        (60, 1.7),
+        (50, 1.0),
+        (0, 0),
+    )
+
+    def __init__(self, gpa_table=None, storage=None, load_accounts=True):
+        self.set_gpa_table(gpa_table or self.GPA_TABLE)
+        # 預設使用欄位式快取，CSV 僅作為匯入與匯出格式
+        self.storage = storage or ColumnarStorage(ALL_COURSES_PATH, CACHE_DIR, self.DERIVED_COLUMNS)
+        self.journal = GradeJournal(JOURNAL_PATH)
+        self.lock = FileLock(LOCK_PATH)
+        self.compaction_lock = FileLock(COMPACTION_LOCK_PATH)
+        self.journal_seq = 0  # 已套用的日誌序號，之後只需套用其他程式新寫入的紀錄
+        self.pending = {}  # (學號, 課程代碼) -> 尚未儲存的修改前的成績，儲存時用來判斷衝突
+        self.conflicts = []  # 合併時發現、尚未回報的 GradeConflict
+        self.compaction = None  # 背景壓縮的執行緒
+        self.versions = {}  # 課程代碼 -> 資料版本，衍生欄位重算時遞增
+        self.course_stats = CourseStats(self)
+        self.load_all_courses_data()
+
+        # 匯出等工具程式只需要成績資料，不讀取帳號
+        if load_accounts:
+            self.student_accounts = self.load_student_accounts()
+            self.teacher_accounts = self.load_teacher_accounts()
+
+    @classmethod
+    def from_dataframe(cls, df, gpa_table=None):
+        """以現有的成績資料建立 DataManager（不讀取檔案），供工具程式與效能測試使用"""
+        manager = cls.__new__(cls)
+        manager.set_gpa_table(gpa_table or cls.GPA_TABLE)
+        manager.storage = None
+        manager.journal = None
+        manager.lock = None
+        manager.pending = {}
+        manager.conflicts = []
+        manager.versions = {}
+        manager.course_stats = CourseStats(manager)
+        manager.all_courses_data = manager.add_column(df)
+        manager.build_indexes(manager.all_courses_data)
+        manager.categorize_strings(manager.all_courses_data)
+        manager.build_sort_orders()
+        return manager
+
+    def add_column(self, df):
+        # 成績先轉為精簡型別，總成績一律由保存的值計算
+        self.compact_columns(df)
+        # 計算總成績
+        df['總成績'] = self.total_score(df['期中考'], df['期末考'], df['平時成績'])
+
+        # 計算 GPA
+        df['GPA'] = self.grades_to_GPA(df['總成績'])
+
+        # 計算排名
+        df['期中考排名'] = df.groupby('課程代碼')['期中考'].rank(ascending=False, method='min').astype(int)
+        df['期末考排名'] = df.groupby('課程代碼')['期末考'].rank(ascending=False, method='min').astype(int)
+        df['平時成績排名'] = df.groupby('課程代碼')['平時成績'].rank(ascending=False, method='min').astype(int)
+        df['總排名'] = df.groupby('課程代碼')['總成績'].rank(ascending=False, method='min').astype(int)
+
+        df['總人數'] = df.groupby('課程代碼')['學號'].transform('count')
+
+        df['期中考排名'] = df['期中考排名'].astype(int)
+        df['期末考排名'] = df['期末考排名'].astype(int)
+        df['平時成績排名'] = df['平時成績排名'].astype(int)
+        df['總成績排名'] = df['總排名'].astype(int)
+
+        # 計算 GPA 排名
+        df['GPA排名'] = df.groupby('課程名稱')['GPA'].rank(
+            ascending=False, method='min').astype(int)
+        df['GPA排名'] = df['GPA排名'].astype(int)
+
+        self.compact_columns(df)
+        return df
+
+    @staticmethod
+    def score_array(values):
+        """成績欄的精簡型別：都是整數時用 int16，有小數或空值時用 float32"""
+        values = np.asarray(values)
+        if values.dtype.kind in 'iu' or (values.dtype.kind == 'f' and np.all(values == np.round(values))):
+            return values.astype(np.int16, copy=False)
+        return values.astype(np.float32, copy=False)
+
+    def compact_columns(self, df):
+        """將成績與衍生欄位轉為精簡的數值型別（已存在的欄位才轉換）"""
+        for column in SCORE_COLUMNS:
+            if column in df.columns:
+                df[column] = self.score_array(df[column].to_numpy())
+        for column, dtype in self.COLUMN_DTYPES.items():
+            if column not in df.columns:
+                continue
+            values = df[column].to_numpy()
+            if values.dtype.kind not in 'iuf':
+                continue
+            if np.dtype(dtype).kind == 'i' and values.dtype.kind == 'f' and np.isnan(values).any():
+                continue  # 有空值，無法轉為整數
+            df[column] = values.astype(dtype, copy=False)
+
+    def categorize_strings(self, df, indexes=None):
+        """字串欄位改以索引（預設為目前的索引）的鍵編號保存（Categorical），不再每列保存一個 Python 字串
+
+        索引的鍵依字串排序，因此 Categorical 的排序與比較結果與字串相同。"""
+        for column in self.CATEGORY_COLUMNS:
+            index = (indexes or self.indexes)[column]
+            df[column] = pd.Categorical.from_codes(index.row_codes, categories=index.keys)
+
+    @staticmethod
+    def total_score(midterm, final, casual):
+        """計算總成績（期中 30%、期末 30%、平時 40%），整欄與單筆共用同一算式
+
+        權重為 np.float64，精簡型別（int16、float32）的成績也以 64 位元計算後再四捨五入。"""
+        return round((midterm * np.float64(0.3) + final * np.float64(0.3) + casual * np.float64(0.4)), 2)
+
+    def build_indexes(self, df):
+        """建立各查詢欄位到列位置的索引，之後的查詢只需 O(結果筆數)"""
+        self.indexes = {column: PositionIndex.build(df[column])
+                        for column in self.INDEX_COLUMNS}
+
+    def lookup(self, column, key):
+        """回傳索引中符合 key 的列位置（依列的先後排序，找不到時為空陣列）"""
+        if column == self.ENROLLMENT_KEY:
+            # 先取出學生的修課紀錄（筆數很少），再比對課程代碼
+            student_id, course_id = key
+            rows = self.indexes['學號'].get(student_id)
+            course_index = self.indexes['課程代碼']
+            return rows[course_index.row_codes[rows] == course_index.code(course_id)]
+        return self.indexes[column].get(key)
+
+    def rows(self, column, key):
+        """以索引取出符合條件的資料列"""
+        return self.all_courses_data.iloc[self.lookup(column, key)]
+
+    def student_rows(self, student_id):
+        """學生所有修課紀錄"""
+        return self.rows('學號', student_id)
+
+    def course_rows(self, course_id):
+        """課程所有學生的資料"""
+        return self.rows('課程代碼', course_id)
+
+    def teacher_rows(self, teacher_name):
+        """教師所有課程的資料"""
+        return self.rows('教師', str(teacher_name).strip())
+
+    def enrollment(self, student_id, course_id):
+        """取得學生在某課程的資料列，未修課時回傳 None"""
+        rows = self.lookup(self.ENROLLMENT_KEY, (student_id, course_id))
+        if len(rows) == 0:
+            return None
+        return self.all_courses_data.iloc[rows[0]]
+
+    def find_course_students(self, course_id, name_or_id):
+        """在課程中以學號或姓名尋找學生；姓名可能重複，因此可能回傳多筆"""
+        rows = self.lookup(self.ENROLLMENT_KEY, (name_or_id, course_id))
+        if len(rows) == 0:
+            rows = self.lookup('姓名', name_or_id)
+            course_index = self.indexes['課程代碼']
+            rows = rows[course_index.row_codes[rows] == course_index.code(course_id)]
+        return self.all_courses_data.iloc[rows]
+
+    def related_courses(self, course_id):
+        """與課程同名的所有課程（GPA 排名以課程名稱分組，修改成績會影響這些課程）"""
+        rows = self.lookup('課程代碼', course_id)
+        if len(rows) == 0:
+            return [course_id]
+        name = self.all_courses_data['課程名稱'].iat[rows[0]]
+        return self.course_codes(self.lookup('課程名稱', name))
+
+    def course_codes(self, rows):
+        """列位置所屬的課程代碼（不重複）"""
+        course_index = self.indexes['課程代碼']
+        return [course_index.keys[code] for code in np.unique(course_index.row_codes[rows])]
+
+    def data_version(self, course_ids):
+        """課程資料的版本，可作為快取鍵的一部分；任一課程重算後版本即不同"""
+        return tuple(self.versions.get(course_id, 0) for course_id in course_ids)
+
+    def bump_versions(self, course_ids):
+        for course_id in course_ids:
+            self.versions[course_id] = self.versions.get(course_id, 0) + 1
+
+    def recompute_courses(self, course_ids):
+        """只重算指定課程的衍生欄位（總成績、GPA、各項排名），結果與 add_column 相同"""
+        df = self.all_courses_data
+        course_ids = list(dict.fromkeys(course_ids))  # 去除重複並保留順序
+        if not course_ids:
+            return
+        rows = np.concatenate([self.lookup('課程代碼', course_id) for course_id in course_ids])
+
+        # 重算總成績與 GPA（與 add_column 相同的算式）
+        part = df.iloc[rows]
+        total = self.total_score(part['期中考'], part['期末考'], part['平時成績'])
+        self.assign(df, rows, '總成績', total.values)
+        self.assign(df, rows, 'GPA', self.grades_to_GPA(total))
+
+        # 只重算受影響課程的排名，總人數不變
+        part = df.iloc[rows]
+        groups = part.groupby('課程代碼', sort=False)
+        for column, rank_column in (('期中考', '期中考排名'), ('期末考', '期末考排名'),
+                                    ('平時成績', '平時成績排名'), ('總成績', '總排名')):
+            ranks = groups[column].rank(ascending=False, method='min')
+            self.assign(df, rows, rank_column, ranks.values)
+        self.assign(df, rows, '總成績排名', df['總排名'].values[rows])
+
+        # GPA 排名以課程名稱分組，重算涉及的課程名稱
+        names = part['課程名稱'].unique()
+        name_rows = np.concatenate([self.lookup('課程名稱', name) for name in names])
+        ranks = df.iloc[name_rows].groupby('課程名稱', sort=False)['GPA'].rank(
+            ascending=False, method='min')
+        self.assign(df, name_rows, 'GPA排名', ranks.values)
+        self.bump_versions(self.course_codes(name_rows))
+
+    @staticmethod
+    def assign(df, rows, column, values):
+        """寫入部分列，先轉為欄位的型別（pandas 不會自動把 float64 存入 float32 欄位）"""
+        df.iloc[rows, df.columns.get_loc(column)] = np.asarray(values).astype(df[column].dtype, copy=False)
+
+    @classmethod
+    def set_scores(cls, df, rows, column, values):
+        """寫入成績，若有小數而欄位為整數型別則先將欄位轉為 float32"""
+        values = np.asarray(values, dtype=float)
+        if df[column].dtype.kind in 'iu' and not np.all(values == np.round(values)):
+            df[column] = df[column].astype(np.float32)
+        cls.assign(df, rows, column, values)
+
+    @staticmethod
+    def same_score(a, b):
+        """成績是否相同：以 float32 比較，保存的值與日誌、檔案中的十進位值才會一致"""
+        return np.float32(a) == np.float32(b)
+
+    def update_grades(self, student_id, course_id, midterm, final, casual):
+        """更新單一學生在單一課程的成績，只重算該列的衍生欄位與該課程的排名"""
+        df = self.all_courses_data
+        matched = self.lookup(self.ENROLLMENT_KEY, (student_id, course_id))
+        if len(matched) == 0:
+            raise KeyError(f"課程 {course_id} 中找不到學號 {student_id}")
+        row = matched[0]
+        old_values = {column: df[column].iat[row] for column in STATS_COLUMNS}
+        self.pending.setdefault((student_id, course_id), {column: old_values[column] for column in SCORE_COLUMNS})
+
+        # 更新成績，只重算該課程
+        for column, value in zip(SCORE_COLUMNS, (midterm, final, casual)):
+            self.set_scores(df, [row], column, [value])
+        self.recompute_courses([course_id])
+        self.course_stats.update(course_id, old_values, {column: df[column].iat[row] for column in STATS_COLUMNS})
+        # 只有這一列的分數改變，在各排序中移動這一列即可
+        for column in self.SORT_COLUMNS[1:]:
+            self.move_in_sort_order(course_id, row, column)
+        return row
+
+    def import_grades(self, course_id, changes):
+        """整批更新一門課程的成績並寫入日誌：只重算、重新排序一次，日誌只 fsync 一次
+
+        changes 為含學號與 SCORE_COLUMNS 欄位的 DataFrame，學號必須都有修這門課程；
+        回傳與其他程式修改衝突的 GradeConflict 串列"""
+        df = self.all_courses_data
+        course_rows = self.lookup('課程代碼', course_id)
+        positions = pd.Index(df['學號'].iloc[course_rows].astype(str)).get_indexer(changes['學號'].astype(str))
+        if np.any(positions < 0):
+            missing = changes['學號'].to_numpy()[positions < 0]
+            raise KeyError(f"課程 {course_id} 中找不到學號 {', '.join(map(str, missing[:5]))}")
+        rows = course_rows[positions]
+
+        before = df.iloc[rows]
+        for student_id, *scores in before[['學號', *SCORE_COLUMNS]].itertuples(index=False, name=None):
+            self.pending.setdefault((student_id, course_id), dict(zip(SCORE_COLUMNS, scores)))
+        for column in SCORE_COLUMNS:
+            self.set_scores(df, rows, column, changes[column].to_numpy(dtype=float))
+        self.recompute_courses([course_id])
+        self.resort_courses([course_id])
+        return self.save_rows(rows)
+
+    def course_slice(self, course_id):
+        """課程在課程索引 order（以及各排序陣列）中的範圍"""
+        course_index = self.indexes['課程代碼']
+        code = course_index.code(course_id)
+        if code < 0:
+            raise KeyError(f"找不到課程 {course_id}")
+        return slice(course_index.offsets[code], course_index.offsets[code + 1])
+
+    def sort_values(self, column):
+        """可排序的數值鍵：數值欄位直接使用，字串欄位改為排序後的編號"""
+        values = self.all_courses_data[column]
+        if values.dtype.kind in 'biuf':
+            return values.to_numpy()
+        index = self.indexes.get(column)
+        if index is None:
+            return pd.factorize(values, sort=True)[0]
+        # 索引的鍵依字串排序，鍵編號即為排序鍵
+        return np.asarray(index.row_codes)
+
+    def build_sort_orders(self):
+        """為每門課程、每個可排序欄位建立遞增的列順序，同值依原本的先後
+
+        sort_orders[欄位] 與課程索引的 order 對齊：課程的排列位於 course_slice(課程代碼)，
+        內容為課程內的相對位置（即 course_rows 結果的第幾列）。
+        """
+        course_index = self.indexes['課程代碼']
+        order, offsets = course_index.order, course_index.offsets
+        # 每一列在所屬課程中的相對位置
+        local = np.empty(len(order), dtype=np.int32)
+        local[order] = np.arange(len(order)) - np.repeat(offsets[:-1], np.diff(offsets))
+        self.sort_orders = {}
+        for column in self.SORT_COLUMNS:
+            # lexsort 為穩定排序：先依課程、再依值，同值依列的先後
+            rows = np.lexsort((self.sort_values(column), course_index.row_codes))
+            self.sort_orders[column] = local[rows]
+
+    def carry_sort_orders(self, old_index):
+        """重建課程索引後沿用各課程原本的排序：未受影響的課程內列的先後不變
+
+        old_index 為重建前的課程索引；新課程與受影響的課程之後須以 resort_courses 重新排序。"""
+        course_index = self.indexes['課程代碼']
+        old_codes = pd.Index(old_index.keys).get_indexer(course_index.keys)
+        # 每門課程在新、舊排序陣列中的起點差；新課程暫時指向開頭
+        shift = np.where(old_codes >= 0, np.asarray(old_index.offsets)[old_codes] - course_index.offsets[:-1], 0)
+        source = np.arange(course_index.offsets[-1]) + np.repeat(shift, np.diff(course_index.offsets))
+        source = np.clip(source, 0, max(len(old_index.order) - 1, 0))
+        self.sort_orders = {column: orders[source] for column, orders in self.sort_orders.items()}
+
+    def resort_courses(self, course_ids):
+        """重新排序指定課程的各欄順序並丟棄其統計（多列一起改變時使用）"""
+        for course_id in dict.fromkeys(course_ids):
+            self.course_stats.discard(course_id)
+            part = self.course_slice(course_id)
+            rows = self.lookup('課程代碼', course_id)
+            for column in self.SORT_COLUMNS:
+                values = self.all_courses_data[column].iloc[rows].to_numpy()
+                self.sort_orders[column][part] = np.argsort(values, kind='stable')
+
+    def move_in_sort_order(self, course_id, row, column):
+        """單一列的值改變後，將它移到排序中的新位置：O(log n) 找位置，O(n) 搬移"""
+        part = self.course_slice(course_id)
+        rows = self.lookup('課程代碼', course_id)
+        order = self.sort_orders[column][part]
+        local = np.int32(np.searchsorted(rows, row))
+        rest = order[order != local]
+        values = self.all_courses_data[column].to_numpy()[rows]
+        sorted_values = values[rest]
+        value = values[local]
+        # 同值時依相對位置排列，與 build_sort_orders 的結果一致
+        left = np.searchsorted(sorted_values, value, side='left')
+        right = np.searchsorted(sorted_values, value, side='right')
+        position = left + np.searchsorted(rest[left:right], local)
+        self.sort_orders[column][part] = np.insert(rest, position, local)
+
+    def tie_groups(self, course_id, column, order):
+        """依遞增順序排列的列，各自所屬的同值組別（0, 1, 2...）"""
+        # 只取出這門課程的值（字串欄位整欄轉為陣列的成本很高）
+        values = self.all_courses_data[column].iloc[self.lookup('課程代碼', course_id)].to_numpy()[order]
+        groups = np.zeros(len(order), dtype=np.int64)
+        np.cumsum(values[1:] != values[:-1], out=groups[1:])
+        return groups
+
+    def course_order(self, course_id, keys):
+        """課程內依 keys 排序的列順序（course_rows 結果中的相對位置）
+
+        keys 為 [(欄位, 是否遞增), ...]，第一個為主要排序鍵，其後的鍵決定同值時的先後；
+        所有鍵都相同時依原本的先後。只有一個鍵時直接取用預先排好的順序，不需要排序。
+        """
+        column, ascending = keys[0]
+        order = self.sort_orders[column][self.course_slice(course_id)]
+        if len(keys) == 1:
+            if ascending:
+                return order.copy()
+            # 反轉後同值的列順序也顛倒，將每一段同值的列再反轉回來
+            order = order[::-1]
+            groups = self.tie_groups(course_id, column, order[::-1])[::-1]
+            bounds = np.concatenate(([0], np.flatnonzero(groups[1:] != groups[:-1]) + 1, [len(order)]))
+            lengths = np.diff(bounds)
+            starts = np.repeat(bounds[:-1], lengths)
+            ends = np.repeat(bounds[1:] - 1, lengths)
+            return order[starts + ends - np.arange(len(order))]
+
+        # 有次要鍵：以各鍵的同值組別作為整數鍵，做一次 lexsort
+        ranks = []
+        for column, ascending in keys:
+            order = self.sort_orders[column][self.course_slice(course_id)]
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = self.tie_groups(course_id, column, order)
+            ranks.append(rank if ascending else -rank)
+        return np.lexsort(ranks[::-1])
+
+    def sorted_course_rows(self, course_id, keys):
+        """依 keys 排序的課程資料，keys 的格式同 course_order"""
+        return self.all_courses_data.iloc[self.lookup('課程代碼', course_id)[self.course_order(course_id, keys)]]
+
+    def load_all_courses_data(self):
+        try:
+            # 取得檔案鎖，避免讀到其他程式寫到一半的 CSV 與日誌
+            with self.lock:
+                return self.load_locked()
+        except Exception as e:
+            raise DataLoadError(f"載入 all_courses_data.csv 檔案失敗：{e}") from e
+
+    def load_locked(self):
+        """（須持有檔案鎖）讀取基底資料並重播日誌"""
+        df, indexes, sort_orders = self.storage.load()
+        if indexes is None:
+            self.check_keys(df)
+            # 由 CSV 匯入：去除教師名稱中的前後空格，避免因空格導致的匹配錯誤
+            df['教師'] = df['教師'].str.strip()
+            df = self.add_column(df)
+            self.build_indexes(df)
+            self.categorize_strings(df)
+            self.all_courses_data = df
+            self.build_sort_orders()
+            self.storage.write_cache(df, self.indexes, self.sort_orders)
+        else:
+            # 由快取載入：衍生欄位、索引與排序都已存在（舊快取沒有排序時重新建立）
+            self.indexes = indexes
+            self.all_courses_data = df
+            if sort_orders is None:
+                self.build_sort_orders()
+            else:
+                self.sort_orders = sort_orders
+        # 重播日誌，只重算並重新排序受影響的課程
+        courses = self.apply_journal(df)
+        self.recompute_courses(courses)
+        self.resort_courses(courses)
+        return df
+
+    def check_keys(self, df):
+        """學號與課程代碼是修課紀錄的鍵，空白時無法查詢與比對，拒絕載入
+
+        其他字串欄位（姓名、課程名稱、教師）可以空白，以空值保存。"""
+        blank = np.flatnonzero(df[list(self.ENROLLMENT_KEY)].isna().any(axis=1).to_numpy())
+        if len(blank):
+            lines = '、'.join(str(row + 2) for row in blank[:5])  # CSV 第 1 行為標題
+            raise DataLoadError(f"all_courses_data.csv 共 {len(blank)} 列的學號或課程代碼空白（第 {lines} 行）")
+
+    def load_student_accounts(self):
+        try:
+            return CredentialStore.load(STUDENT_DATA_PATH, '學號')
+        except Exception as e:
+            raise DataLoadError(f"載入 student_data.csv 檔案失敗：{e}") from e
+
+    def load_teacher_accounts(self):
+        try:
+            return CredentialStore.load(TEACHER_DATA_PATH, '帳號')
+        except Exception as e:
+            raise DataLoadError(f"載入 teacher_data.csv 檔案失敗：{e}") from e
+
+    def journal_rows(self, records):
+        """日誌紀錄（同一筆修課紀錄以最後一次為準）對應的列位置與紀錄，已不存在的修課紀錄略過"""
+        changes = pd.DataFrame(records).drop_duplicates(
+            subset=list(self.ENROLLMENT_KEY), keep='last')
+        rows, found = [], []
+        for i, key in enumerate(zip(changes['學號'], changes['課程代碼'])):
+            positions = self.lookup(self.ENROLLMENT_KEY, key)
+            if len(positions):
+                rows.append(positions[0])
+                found.append(i)
+        return np.array(rows, dtype=np.intp), changes.iloc[found]
+
+    def apply_journal(self, df):
+        """將日誌中的成績修改套用到基底資料；回傳受影響的課程"""
+        records = self.journal.read_since()
+        self.journal_seq = self.journal.seq
+        if not records:
+            return []
+        rows, changes = self.journal_rows(records)
+        for column in SCORE_COLUMNS:
+            self.set_scores(df, rows, column, changes[column].values)
+        return changes['課程代碼'].unique().tolist()
+
+    def merge_journal(self):
+        """（須持有檔案鎖）套用其他程式寫入日誌、本程式尚未看到的修改，衝突記錄在 self.conflicts
+
+        只處理新紀錄涉及的課程，不重新載入整份資料。尚未儲存的修改（pending）以格為單位合併：
+        只有對方改的格採用對方的值，雙方都改且值不同時保留本程式的值並回報衝突。
+        """
+        records = self.journal.read_since(self.journal_seq)
+        if records is None:
+            # 其他程式已把本程式沒看過的紀錄併入 CSV：重新載入，再放回本程式尚未儲存的修改
+            self.reload_keeping_pending()
+            return
+        self.journal_seq = self.journal.seq
+        if not records:
+            return
+        df = self.all_courses_data
+        rows, changes = self.journal_rows(records)
+        values = {column: changes[column].to_numpy(dtype=float, copy=True) for column in SCORE_COLUMNS}
+        for i, (row, key) in enumerate(zip(rows, zip(changes['學號'], changes['課程代碼']))):
+            base = self.pending.get(key)
+            if base is None:
+                continue
+            for column in SCORE_COLUMNS:
+                theirs, mine = values[column][i], float(exact_floats(df[column].iat[row]))
+                if not self.same_score(mine, base[column]):
+                    # 本程式改過這一格：保留本程式的值，對方也改成不同的值時回報
+                    if not self.same_score(theirs, base[column]) and not self.same_score(theirs, mine):
+                        self.conflicts.append(GradeConflict(key[0], key[1], column, theirs, mine))
+                    values[column][i] = mine
+                base[column] = theirs
+        for column in SCORE_COLUMNS:
+            self.set_scores(df, rows, column, values[column])
+        courses = self.course_codes(rows)
+        self.recompute_courses(courses)
+        self.resort_courses(courses)
+
+    def reload_keeping_pending(self):
+        """（須持有檔案鎖）重新載入資料，並重新套用尚未儲存的修改"""
+        pending = {}
+        for key in self.pending:
+            row = self.lookup(self.ENROLLMENT_KEY, key)[0]
+            pending[key] = [self.all_courses_data[column].iat[row] for column in SCORE_COLUMNS]
+        self.course_stats.courses.clear()
+        self.load_locked()
+        rows, keys = [], []
+        for key, scores in pending.items():
+            positions = self.lookup(self.ENROLLMENT_KEY, key)
+            if len(positions):
+                rows.append(positions[0])
+                keys.append(key)
+        if rows:
+            for i, column in enumerate(SCORE_COLUMNS):
+                self.set_scores(self.all_courses_data, rows, column, [pending[key][i] for key in keys])
+            courses = self.course_codes(np.array(rows, dtype=np.intp))
+            self.recompute_courses(courses)
+            self.resort_courses(courses)
+        self.bump_versions(self.indexes['課程代碼'].keys)
+
+    def save_grades(self, enrollments):
+        """將指定修課紀錄 (學號, 課程代碼) 目前的成績追加到日誌，不重寫整個 CSV；回傳 GradeConflict 串列"""
+        rows = [self.lookup(self.ENROLLMENT_KEY, key)[0] for key in enrollments]
+        return self.save_rows(np.array(rows, dtype=np.intp))
+
+    def save_rows(self, rows):
+        """在檔案鎖中先合併其他程式的修改，再將這些列目前的成績追加到日誌（一次 fsync）"""
+        if self.journal is None:  # from_dataframe 建立的 DataManager 不寫檔
+            return []
+        df = self.all_courses_data
+        keys = list(zip(df['學號'].iloc[rows].to_numpy(), df['課程代碼'].iloc[rows].to_numpy()))
+        with self.lock:
+            self.merge_journal()
+            if self.all_courses_data is not df:
+                # 合併時重新載入了資料，列位置可能改變，以鍵重新取得
+                rows = np.array([self.lookup(self.ENROLLMENT_KEY, key)[0] for key in keys], dtype=np.intp)
+            part = self.all_courses_data.iloc[rows][['學號', '課程代碼', *SCORE_COLUMNS]]
+            records = part.assign(**{column: exact_floats(part[column]) for column in SCORE_COLUMNS}).to_dict('records')
+            self.journal.append(records)
+            self.journal_seq = self.journal.seq
+            for key in keys:
+                self.pending.pop(key, None)
+            # 回報這次儲存的修改課程紀錄的衝突，其餘留到那些紀錄儲存時
+            saved = set(keys)
+            conflicts = [c for c in self.conflicts if (c.student_id, c.course_id) in saved]
+            self.conflicts = [c for c in self.conflicts if (c.student_id, c.course_id) not in saved]
+        if len(self.journal) >= self.COMPACT_THRESHOLD:
+            self.compact(background=True)
+        return conflicts
+
+    def compact(self, background=False):
+        """將日誌併回基底 CSV；background=True 時在背景執行緒寫檔
+
+        只有合併其他程式的修改、改名日誌與取得快照時持有資料鎖，寫入的 CSV 因此包含
+        所有已儲存的修改；寫檔（暫存檔再取代）期間不持有資料鎖，儲存不需等待。
+        其他程式正在壓縮時，背景壓縮直接略過，否則等待其完成。
+        """
+        if self.compaction is not None and self.compaction.is_alive():
+            if background:
+                return
+            self.compaction.join()
+        if not self.compaction_lock.acquire(blocking=not background):
+            return
+        try:
+            with self.lock:
+                self.merge_journal()
+                # 基底 CSV 被外部取代時先併入記憶體，避免被壓縮覆寫
+                self.sync_courses_file()
+                folded = self.journal.rotate()
+                # 取得快照（copy-on-write），之後的修改不影響正在寫入的資料
+                snapshot = self.all_courses_data.copy(deep=False)
+                indexes = self.indexes
+                # 排序陣列會被原地修改，複製一份
+                sort_orders = {column: orders.copy() for column, orders in self.sort_orders.items()}
+        except BaseException:
+            self.compaction_lock.release()
+            raise
+        if folded == 0:
+            self.compaction_lock.release()
+            return
+
+        def write():
+            try:
+                self.storage.save(snapshot, indexes, sort_orders)
+                with self.lock:
+                    self.journal.finish_compaction(folded)
+            finally:
+                self.compaction_lock.release()
+
+        if background:
+            self.compaction = threading.Thread(target=write)
+            self.compaction.start()
+        else:
+            write()
+
+    def watched_paths(self):
+        """可能被其他程式修改、需要監看的檔案"""
+        paths = [ALL_COURSES_PATH, JOURNAL_PATH, self.journal.seq_path]
+        if hasattr(self, 'student_accounts'):
+            paths += [STUDENT_DATA_PATH, TEACHER_DATA_PATH]
+        return paths
+
+    def read_courses_file(self, paths):
+        """基底 CSV 在 paths 中且是被外部程式修改時，讀取並與目前的資料比對，回傳 CoursesFileChanges
+
+        檔案未被修改或內容沒有差異時回傳 None。不會修改任何資料，可在背景執行緒中呼叫，
+        再將結果交給 reload_changed；主執行緒只需套用有差異的列。"""
+        if os.path.abspath(ALL_COURSES_PATH) not in {os.path.abspath(path) for path in paths}:
+            return None
+        if self.storage.is_fresh():
+            return None
+        try:
+            new = self.storage.read_csv()
+            self.check_keys(new)
+            new['教師'] = new['教師'].str.strip()
+            return self.diff_courses_file(new)
+        except DataLoadError:
+            raise
+        except Exception as e:
+            raise DataLoadError(f"重新載入 all_courses_data.csv 失敗：{e}") from e
+
+    def reload_changed(self, paths, courses_file=None):
+        """套用被其他程式修改的檔案，回傳資料有變動的課程
+
+        日誌只合併新的紀錄，基底 CSV 被取代時只套用有差異的列，帳號檔則重新讀取。
+        courses_file 為先前以 read_courses_file 取得的比對結果，未提供時在此讀取。"""
+        paths = {os.path.abspath(path) for path in paths}
+
+        def touched(*names):
+            return any(os.path.abspath(name) in paths for name in names)
+
+        versions = dict(self.versions)
+        if touched(ALL_COURSES_PATH, JOURNAL_PATH, self.journal.seq_path):
+            try:
+                with self.lock:
+                    self.merge_journal()
+                    if touched(ALL_COURSES_PATH):
+                        self.sync_courses_file(courses_file)
+            except DataLoadError:
+                raise
+            except Exception as e:
+                raise DataLoadError(f"重新載入 all_courses_data.csv 失敗：{e}") from e
+        if touched(STUDENT_DATA_PATH):
+            self.student_accounts = self.load_student_accounts()
+        if touched(TEACHER_DATA_PATH):
+            self.teacher_accounts = self.load_teacher_accounts()
+        return [course_id for course_id, version in self.versions.items() if versions.get(course_id) != version]
+
+    def enrollment_codes(self, df=None, indexes=None):
+        """每列的 (學號, 課程代碼, 第幾次出現) 編為一個整數，供整欄比對兩份資料
+
+        以索引（預設為目前的索引）的鍵編號計算；資料中可能有重複的修課紀錄，加上出現次序後每列唯一。
+        df 為 None 時為索引所屬的資料，否則學號或課程不在索引中的列編為不重複的負數。"""
+        indexes = indexes or self.indexes
+        student_index, course_index = indexes['學號'], indexes['課程代碼']
+        if df is None:
+            students, courses = np.asarray(student_index.row_codes), np.asarray(course_index.row_codes)
+        else:
+            students = pd.Index(student_index.keys).get_indexer(df['學號'].astype(str))
+            courses = pd.Index(course_index.keys).get_indexer(df['課程代碼'].astype(str))
+        codes = students.astype(np.int64) * len(course_index.keys) + courses
+        occurrence = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+        # 重複次數不會超過 2**16，編號仍在 int64 範圍內
+        codes = (codes << 16) + occurrence
+        unknown = (students < 0) | (courses < 0)
+        codes[unknown] = -1 - np.flatnonzero(unknown)
+        return codes
+
+    def diff_courses_file(self, new):
+        """比對新的基底 CSV 與目前的資料，回傳 CoursesFileChanges；沒有差異時回傳 None
+
+        只讀取目前的資料與索引，不做任何修改，可在背景執行緒中執行（整份資料的比對、
+        新增或刪除列時的新資料表與索引都在此建立）。比對前先以日誌與尚未儲存的修改覆蓋
+        CSV 的成績，它們不算差異；套用時會在檔案鎖中再以最新的日誌與修改覆蓋一次。"""
+        old, indexes = self.all_courses_data, self.indexes
+        columns = [column for column in old.columns if column not in self.DERIVED_COLUMNS]
+        missing = [column for column in columns if column not in new.columns]
+        if missing:
+            raise DataLoadError(f"all_courses_data.csv 缺少欄位：{'、'.join(missing)}")
+        new_keys = pd.Index(self.enrollment_codes(new, indexes))
+        # 字串欄位每次 to_numpy 都會檢查空值，每欄只轉換一次（也不修改傳入的 DataFrame）
+        arrays = {column: new[column].to_numpy(copy=True) for column in columns}
+        olds = {column: old[column].to_numpy() for column in old.columns}
+
+        # 日誌（不取得檔案鎖讀取，可能不完整）與尚未儲存的修改
+        records = list(self.journal.read())
+        overrides = [pd.DataFrame(records)[[*self.ENROLLMENT_KEY, *SCORE_COLUMNS]] if records else None]
+        pending, rows = self.enrollment_rows(list(self.pending), indexes)
+        if pending:
+            overrides.append(pd.DataFrame({**dict(zip(self.ENROLLMENT_KEY, zip(*pending))),
+                                           **{column: olds[column][rows] for column in SCORE_COLUMNS}}))
+        for changes in overrides:
+            if changes is None:
+                continue
+            # 日誌與 lookup 都以第一次出現的修課紀錄為準
+            changes = changes.drop_duplicates(subset=list(self.ENROLLMENT_KEY), keep='last')
+            codes = self.enrollment_codes(changes.reset_index(drop=True), indexes)
+            positions = new_keys.get_indexer(codes)
+            found = (positions >= 0) & (codes >= 0)
+            for column in SCORE_COLUMNS:
+                values = arrays[column].astype(np.result_type(arrays[column], float))
+                values[positions[found]] = changes[column].to_numpy(dtype=float)[found]
+                arrays[column] = values
+
+        # 比對：每列對應到新檔案的位置，找出刪除、新增與內容改變的列
+        new_positions = new_keys.get_indexer(self.enrollment_codes(None, indexes))
+        kept = np.flatnonzero(new_positions >= 0)
+        deleted = np.flatnonzero(new_positions < 0)
+        inserted = np.ones(len(new), dtype=bool)
+        inserted[new_positions[kept]] = False
+        inserted = np.flatnonzero(inserted)
+        changed_columns = {}
+        for column in columns:
+            before = olds[column][kept]
+            after = arrays[column][new_positions[kept]]
+            if column in SCORE_COLUMNS:
+                # 成績以 float32 保存，比較時 CSV 的值也先轉為 float32
+                before, after = before.astype(np.float32), after.astype(np.float32)
+            differs = before != after
+            if differs.any():
+                # 兩邊都是空值的不算改變
+                candidates = np.flatnonzero(differs)
+                differs[candidates[pd.isna(before[candidates]) & pd.isna(after[candidates])]] = False
+            if differs.any():
+                changed_columns[column] = differs
+        changed = kept[np.logical_or.reduce(list(changed_columns.values()))] if changed_columns else kept[:0]
+        if not (len(deleted) or len(inserted) or len(changed)):
+            return None
+
+        changes = CoursesFileChanges(old, indexes, new)
+        changes.deleted, changes.changed = deleted, changed
+        changes.inserted_courses = list(dict.fromkeys(arrays['課程代碼'][inserted]))
+        updates = {column: (kept[differs], arrays[column][new_positions[kept[differs]]])
+                   for column, differs in changed_columns.items()}
+        if not (len(deleted) or len(inserted) or any(column in self.INDEX_COLUMNS for column in changed_columns)):
+            # 列的位置與索引都不變：主執行緒只需寫入改變的格
+            changes.updates = updates
+            return changes
+
+        # 列的位置或索引鍵改變：建立新的資料表與索引（新增列的衍生欄位暫填 0，套用時重算）
+        values = {}
+        for column in old.columns:
+            part = olds[column][kept]
+            if column in updates:
+                rows, updated = updates[column]
+                if part.dtype != object:
+                    part = part.astype(np.result_type(part, updated))
+                part[np.searchsorted(kept, rows)] = updated
+            added = arrays[column][inserted] if column in arrays else np.zeros(len(inserted), dtype=part.dtype)
+            values[column] = np.concatenate([part, added])
+        frame_indexes = {column: PositionIndex.build(values[column]) if column in changed_columns
+                         else indexes[column].take(kept, arrays[column][inserted])
+                         for column in self.INDEX_COLUMNS}
+        frame = pd.DataFrame(values, copy=False)
+        self.categorize_strings(frame, frame_indexes)
+        self.compact_columns(frame)
+        course_index = frame_indexes['課程代碼']
+        frame['總人數'] = np.diff(course_index.offsets)[course_index.row_codes].astype(np.int32)
+        changes.frame, changes.frame_indexes = frame, frame_indexes
+        return changes
+
+    def sync_courses_file(self, changes=None):
+        """（須持有檔案鎖）基底 CSV 被外部程式取代時，以 (學號, 課程代碼) 比對並只套用新增、刪除與變更的列
+
+        changes 為 read_courses_file 的比對結果，未提供時在此讀取與比對；比對後資料或索引
+        已被換掉（例如重新載入）時重新比對。套用後以日誌與本程式尚未儲存的修改覆蓋成績，
+        只重算受影響課程的衍生欄位。CSV 由本系統寫入（壓縮）時內容已在記憶體中，直接略過。
+        """
+        if changes is None:
+            changes = self.read_courses_file([ALL_COURSES_PATH])
+        elif changes.old is not self.all_courses_data or changes.indexes is not self.indexes:
+            changes = self.diff_courses_file(changes.new)
+        if changes is None:
+            return
+        overrides = self.score_overrides()
+
+        # 受影響的課程：變動的列所屬的課程，以及同名課程（GPA 排名以課程名稱分組）
+        touched = set(changes.inserted_courses)
+        for course_id in self.course_codes(np.concatenate([changes.deleted, changes.changed])):
+            touched.update(self.related_courses(course_id))
+
+        if changes.frame is None:
+            df = self.all_courses_data
+            for column, (rows, values) in changes.updates.items():
+                self.set_values(df, rows, column, values)
+            touched.update(self.apply_overrides(overrides))
+            self.recompute_courses(touched)
+            self.resort_courses(touched)
+        else:
+            old_index = self.indexes['課程代碼']
+            self.all_courses_data, self.indexes = changes.frame, changes.frame_indexes
+            # 被刪除的修課紀錄不再有待儲存的修改
+            self.pending = {key: base for key, base in self.pending.items()
+                            if len(self.lookup(self.ENROLLMENT_KEY, key))}
+            touched.update(self.apply_overrides(overrides))
+            remaining = [course_id for course_id in touched if course_id in self.indexes['課程代碼']]
+            self.recompute_courses(remaining)
+            self.carry_sort_orders(old_index)
+            self.resort_courses(remaining)
+            for course_id in touched:
+                self.course_stats.discard(course_id)
+        # 整門課程被刪除時也要通知顯示中的畫面
+        self.bump_versions(touched)
+
+    def enrollment_rows(self, keys, indexes):
+        """(學號, 課程代碼) 串列在 indexes 中對應的列位置（第一次出現的修課紀錄），回傳 (存在的鍵, 列位置)"""
+        course_index = indexes['課程代碼']
+        found, rows = [], []
+        for student_id, course_id in keys:
+            positions = indexes['學號'].get(student_id)
+            positions = positions[course_index.row_codes[positions] == course_index.code(course_id)]
+            if len(positions):
+                found.append((student_id, course_id))
+                rows.append(positions[0])
+        return found, np.array(rows, dtype=np.intp)
+
+    def score_overrides(self):
+        """（須持有檔案鎖）日誌與本程式尚未儲存的修改：[(學號, 課程代碼, 期中考, 期末考, 平時成績)]
+
+        同步基底 CSV 時新檔案的成績須以這些值為準（同一筆以最後一次為準，尚未儲存的修改最優先）。"""
+        records = self.journal.read_since()
+        self.journal_seq = self.journal.seq
+        overrides = {(record['學號'], record['課程代碼']): tuple(record[column] for column in SCORE_COLUMNS)
+                     for record in records}
+        for key in self.pending:
+            row = self.lookup(self.ENROLLMENT_KEY, key)[0]
+            overrides[key] = tuple(float(exact_floats(self.all_courses_data[column].iat[row]))
+                                   for column in SCORE_COLUMNS)
+        return overrides
+
+    def apply_overrides(self, overrides):
+        """把 score_overrides 的成績寫回目前的資料；回傳成績有改變的課程（含同名課程）"""
+        df = self.all_courses_data
+        rows, scores = [], []
+        for key, values in overrides.items():
+            positions = self.lookup(self.ENROLLMENT_KEY, key)
+            if len(positions):
+                rows.append(positions[0])
+                scores.append(values)
+        if not rows:
+            return set()
+        rows, scores = np.array(rows, dtype=np.intp), np.array(scores, dtype=float)
+        differs = np.zeros(len(rows), dtype=bool)
+        for i, column in enumerate(SCORE_COLUMNS):
+            current = df[column].to_numpy()[rows].astype(np.float32)
+            wanted = scores[:, i].astype(np.float32)
+            differs |= (current != wanted) & ~(np.isnan(current) & np.isnan(wanted))
+        rows, scores = rows[differs], scores[differs]
+        for i, column in enumerate(SCORE_COLUMNS):
+            self.set_scores(df, rows, column, scores[:, i])
+        touched = set()
+        for course_id in self.course_codes(rows):
+            touched.update(self.related_courses(course_id))
+        return touched
+
+    def set_values(self, df, rows, column, values):
+        """寫入部分列的值；成績以 set_scores 寫入，其他欄位型別容納不下新值時先轉換整欄"""
+        if column in SCORE_COLUMNS:
+            self.set_scores(df, rows, column, values)
+            return
+        current = df[column].to_numpy()
+        values = np.asarray(values)
+        dtype = np.result_type(current, values) if current.dtype != object else current.dtype
+        if dtype == current.dtype or (dtype.kind in 'iu' and current.dtype.kind in 'iu' and
+                                      np.array_equal(values.astype(current.dtype), values)):
+            self.assign(df, rows, column, values)
+        else:
+            current = current.astype(dtype)
+            current[rows] = values
+            df[column] = current
+
+    def save_all_courses_data(self, df):
+        """完整寫出資料（CSV 與快取），一般儲存請使用 save_grades 寫入日誌"""
+        with self.lock:
+            self.storage.save(df, self.indexes, self.sort_orders)
+        print("save")
+
+    def set_gpa_table(self, gpa_table):
+        """設定 GPA 換算表，並轉換為由低到高排序的分數下限與 GPA 陣列"""
+        table = sorted(gpa_table, key=lambda item: item[0])
+        cutoffs = np.array([lower for lower, _ in table], dtype=float)
+        if len(cutoffs) == 0 or np.any(np.diff(cutoffs) <= 0):
+            raise ValueError("GPA 換算表的分數下限不可為空或重複")
+        self.gpa_cutoffs = cutoffs
+        self.gpa_points = np.array([gpa for _, gpa in table], dtype=float)
+
+    def grades_to_GPA(self, grades):
+        """將整欄成績一次轉換為 GPA（向量化查表），缺值維持 NaN"""
+        grades = np.asarray(grades, dtype=float)
+        # 找出每個分數所落在的區間：最後一個 <= 分數的下限
+        positions = np.searchsorted(self.gpa_cutoffs, grades, side='right') - 1
+        gpa = self.gpa_points[np.clip(positions, 0, None)]
+        return np.where(np.isnan(grades), np.nan, gpa)
+
+    def grade_to_GPA(self, grade):
+        """將單一成績轉換為 GPA"""
+        return float(self.grades_to_GPA([grade])[0])
@@ -0,0 +1,68 @@
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """跨行程的獨佔檔案鎖（Linux/macOS 使用 flock，Windows 使用 msvcrt.locking）
+
+    同時執行的多個程式以同一個鎖檔協調對 save_data 的寫入；
+    同一行程中的執行緒另以 threading.Lock 互斥。不可重入。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.Lock()
+        self.file = None
+
+    def acquire(self, blocking=True):
+        """取得鎖；blocking=False 時若已被占用立即回傳 False"""
+        if not self.thread_lock.acquire(blocking):
+            return False
+        try:
+            self.file = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                # msvcrt 鎖定檔案開頭的 1 個位元組，LK_LOCK 最多重試 10 秒，因此迴圈等待
+                self.file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+        except BaseException as error:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.thread_lock.release()
+            if not blocking and isinstance(error, OSError):
+                return False
+            raise
+        return True
+
+    def release(self):
+        """釋放鎖；可以在取得鎖以外的執行緒呼叫（背景壓縮完成時）"""
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.file.close()
+            self.file = None
+            self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
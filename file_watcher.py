@@ -0,0 +1,57 @@
+import os
+
+try:
+    # 選用：Linux 上有 inotify_simple 時以 inotify 取代輪詢
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+def file_signature(path):
+    """檔案的 (修改時間, 大小)，檔案不存在時回傳 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """偵測檔案是否被修改、取代或刪除
+
+    預設在每次 changed() 時比對各檔案的修改時間與大小；安裝 inotify_simple 時改為讀取
+    inotify 事件，沒有事件時不需 stat 任何檔案。檔案常以「寫入暫存檔再改名」的方式更新，
+    因此 inotify 監看的是所在的資料夾。
+    """
+
+    def __init__(self, paths, use_inotify=True):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.signatures = {path: file_signature(path) for path in self.paths}
+        self.inotify = None
+        if use_inotify and INotify is not None:
+            self.inotify = INotify()
+            self.folders = {}
+            mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+            for folder in {os.path.dirname(path) for path in self.paths}:
+                self.folders[self.inotify.add_watch(folder, mask)] = folder
+
+    def changed(self):
+        """自上次呼叫以來內容有變動的檔案（依建構時的順序）"""
+        if self.inotify is not None:
+            touched = {os.path.join(self.folders[event.wd], event.name)
+                       for event in self.inotify.read(timeout=0) if event.wd in self.folders}
+            candidates = [path for path in self.paths if path in touched]
+        else:
+            candidates = self.paths
+        changed = []
+        for path in candidates:
+            signature = file_signature(path)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                changed.append(path)
+        return changed
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
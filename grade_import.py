@@ -0,0 +1,132 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from grade_journal import SCORE_COLUMNS
+
+# 匯入檔必須包含的欄位
+IMPORT_COLUMNS = ('學號',) + SCORE_COLUMNS
+# 預覽表格的欄位：每項成績顯示原本與匯入後的值
+PREVIEW_COLUMNS = ['學號', '姓名'] + [name for column in SCORE_COLUMNS for name in (f'原{column}', column)]
+# 試算表第一列為標題，資料從第 2 列開始
+FIRST_DATA_LINE = 2
+
+
+# 輸入中的成績文字：最多三位整數、兩位小數（可為輸入到一半的狀態，例如空白或 "85."）
+SCORE_TEXT = re.compile(r'\d{0,3}(\.\d{0,2})?')
+
+
+def valid_score_text(text):
+    """輸入框的文字是否可能成為 0~100 的成績，供 Entry 的 validatecommand 逐鍵檢查"""
+    if not SCORE_TEXT.fullmatch(text):
+        return False
+    return text in ('', '.') or float(text) <= 100
+
+
+class GradeImportError(Exception):
+    """匯入檔無法讀取或缺少必要欄位"""
+
+
+def read_grade_file(path):
+    """讀取 CSV 或 XLSX 成績檔；學號一律以字串讀入，保留開頭的 0"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.csv':
+            table = pd.read_csv(path, dtype={'學號': str}, encoding='utf-8-sig')
+        elif extension in ('.xlsx', '.xlsm'):
+            # 需要 openpyxl
+            table = pd.read_excel(path, dtype={'學號': str})
+        else:
+            raise GradeImportError(f"不支援的檔案格式：{extension}")
+    except GradeImportError:
+        raise
+    except ImportError as e:
+        raise GradeImportError(f"讀取 Excel 檔需要安裝 openpyxl：{e}") from e
+    except Exception as e:
+        raise GradeImportError(f"讀取 {os.path.basename(path)} 失敗：{e}") from e
+
+    table.columns = [str(column).strip() for column in table.columns]
+    missing = [column for column in IMPORT_COLUMNS if column not in table.columns]
+    if missing:
+        raise GradeImportError(f"缺少欄位：{'、'.join(missing)}")
+    return table[list(IMPORT_COLUMNS)]
+
+
+class GradeImport:
+    """一次匯入的檢查結果
+
+    changes：成績有變動的學生（欄位同 PREVIEW_COLUMNS），確認後交給 DataManager.import_grades；
+    errors：有問題而略過的列（列、學號、原因）；unchanged：成績與目前相同的筆數。
+    """
+
+    def __init__(self, course_id, changes, errors, unchanged):
+        self.course_id = course_id
+        self.changes = changes
+        self.errors = errors
+        self.unchanged = unchanged
+
+    def summary(self):
+        return f"變更 {len(self.changes)} 筆，未變更 {self.unchanged} 筆，錯誤 {len(self.errors)} 筆"
+
+
+def prepare_import(datas, course_id, table):
+    """以整欄運算檢查匯入資料並與目前成績比對，不修改任何資料"""
+    ids = table['學號'].astype('string').str.strip()
+    blank = (ids.isna() | (ids == '')).to_numpy()
+    scores = {column: pd.to_numeric(table[column], errors='coerce').to_numpy(dtype=float)
+              for column in SCORE_COLUMNS}
+
+    roster = datas.course_rows(course_id)
+    # 課程中可能有重複的修課紀錄：以第一筆建立對照（get_indexer 需要不重複的鍵），
+    # 重複的學號無法判斷要改哪一筆，列為錯誤
+    roster_ids = roster['學號'].astype(str).to_numpy()
+    first = ~pd.Series(roster_ids).duplicated().to_numpy()
+    positions = pd.Index(roster_ids[first]).get_indexer(ids.fillna(''))
+    positions = np.where(positions >= 0, np.flatnonzero(first)[positions], -1)
+    ambiguous = ids.isin(roster_ids[~first]).to_numpy()
+
+    # (有問題的列, 原因)，同一列可能有多個原因
+    problems = [
+        (blank, '學號空白'),
+        (ids.duplicated(keep=False).to_numpy() & ~blank, '學號重複'),
+        (~blank & (positions < 0), '未修此課程'),
+        (ambiguous, '課程中有多筆此學號的修課紀錄'),
+    ]
+    for column, values in scores.items():
+        problems.append((np.isnan(values), f'{column}不是數字'))
+        problems.append(((values < 0) | (values > 100), f'{column}超出 0~100'))
+
+    lines = np.arange(len(table)) + FIRST_DATA_LINE
+    errors = pd.concat(
+        [pd.DataFrame({'列': lines[mask], '學號': ids.to_numpy()[mask], '原因': reason})
+         for mask, reason in problems if mask.any()] or
+        [pd.DataFrame(columns=['列', '學號', '原因'])],
+        ignore_index=True)
+    # 每一列只列一次，多個原因合併顯示
+    errors = errors.groupby(['列', '學號'], sort=True, dropna=False)['原因'].agg('、'.join).reset_index()
+
+    valid = ~np.logical_or.reduce([mask for mask, _ in problems])
+    current = roster.iloc[positions[valid]]
+    changes = pd.DataFrame({'學號': current['學號'].to_numpy(), '姓名': current['姓名'].to_numpy()})
+    changed = np.zeros(len(changes), dtype=bool)
+    for column, values in scores.items():
+        old = current[column].to_numpy(dtype=float)
+        new = values[valid]
+        changes[f'原{column}'] = old
+        changes[column] = new
+        changed |= old != new
+    changes = changes[changed].reset_index(drop=True)
+    return GradeImport(course_id, changes, errors, int(len(changed) - changed.sum()))
+
+
+def edits_to_changes(values, edits):
+    """將表格的修改 {(列, 欄位): 值} 整理為 import_grades 使用的 DataFrame
+
+    values 為表格的 {欄位: 陣列}；同一列未修改的成績沿用原值"""
+    rows = sorted({row for row, _ in edits})
+    changes = pd.DataFrame({'學號': values['學號'][rows]})
+    for column in SCORE_COLUMNS:
+        changes[column] = [edits.get((row, column), values[column][row]) for row in rows]
+    return changes
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+
+# 日誌中記錄的成績欄位
+SCORE_COLUMNS = ('期中考', '期末考', '平時成績')
+
+
+class GradeJournal:
+    """成績修改日誌：每次儲存只在檔尾追加一行 JSON 並 fsync
+
+    壓縮（compaction）時先把目前的日誌改名為 `<path>.old`，新的修改寫入新的日誌，
+    待基底 CSV 安全寫入後再刪除 `.old`。讀取時依序重播 `.old` 與目前的日誌，
+    因此任何時間點當機都不會遺失已儲存的修改。
+
+    多個程式共用同一份日誌：每筆紀錄帶有遞增的序號 seq，`<path>.seq` 記錄最後的序號
+    與已併入基底 CSV 的序號（folded）。append 與 read_since 須在跨行程的檔案鎖中呼叫。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.old_path = path + '.old'
+        self.seq_path = path + '.seq'
+        self.lock = threading.Lock()
+        self.repair()
+        self.seq = 0  # 最後讀到或寫入的序號
+        self.rotated_seq = 0  # 壓縮開始時的序號
+        self.count = sum(1 for _ in self.read())
+
+    def __len__(self):
+        return self.count
+
+    def append(self, records):
+        """追加多筆修改紀錄（一次 fsync），依序編上序號；呼叫前須先以 read_since 取得最新序號"""
+        if not records:
+            return
+        lines = ''.join(json.dumps({**record, 'seq': self.seq + i}, ensure_ascii=False) + '\n'
+                        for i, record in enumerate(records, start=1))
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self.count += len(records)
+            self.seq += len(records)
+            self.write_seq(folded=self.read_seq()['folded'])
+
+    def read_seq(self):
+        """讀取 `.seq` 檔：{'seq': 最後的序號, 'folded': 已併入基底 CSV 的序號}"""
+        try:
+            with open(self.seq_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        return {'seq': state.get('seq', 0), 'folded': state.get('folded', 0)}
+
+    def write_seq(self, folded):
+        tmp_path = self.seq_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seq': self.seq, 'folded': folded}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.seq_path)
+
+    def read_since(self, seq=None):
+        """序號大於 seq 的紀錄（其他程式寫入的修改）；seq 為 None 時讀出全部，沒有序號的舊紀錄視為 0
+
+        若其中一部分已被其他程式併入基底 CSV 並從日誌刪除，無法只補上差異，回傳 None。"""
+        state = self.read_seq()
+        if seq is None:
+            seq = -1
+        elif seq < state['folded']:
+            return None
+        records, count, last = [], 0, state['seq']
+        for record in self.read():
+            count += 1
+            record_seq = record.get('seq', 0)
+            last = max(last, record_seq)
+            if record_seq > seq:
+                records.append(record)
+        self.count = count
+        self.seq = last
+        return records
+
+    def repair(self):
+        """若上次寫入中途當機使最後一行不完整，補上換行，讓之後的紀錄從新的一行開始"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self):
+        """依寫入順序讀出所有紀錄，略過寫入中途當機而損毀的行"""
+        for path in (self.old_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def rotate(self):
+        """壓縮開始：將目前的日誌併入 `.old`，之後的修改寫入新的日誌；回傳待併入的筆數"""
+        with self.lock:
+            if os.path.exists(self.path):
+                self._rotate()
+            self.rotated_seq = self.seq
+            return self.count
+
+    def _rotate(self):
+        if os.path.exists(self.old_path):
+            # 上次壓縮未完成，把目前日誌接在 .old 之後
+            with open(self.path, encoding='utf-8') as src, open(self.old_path, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.old_path)
+
+    def finish_compaction(self, folded):
+        """壓縮完成：基底檔已包含 `.old` 的內容，記錄已併入的序號後將其刪除"""
+        with self.lock:
+            # 寫檔期間未持有檔案鎖，其他程式可能已追加紀錄，不可把 .seq 的序號改回較小的值
+            self.seq = max(self.seq, self.read_seq()['seq'])
+            self.write_seq(folded=self.rotated_seq)
+            if os.path.exists(self.old_path):
+                os.remove(self.old_path)
+            self.count -= folded
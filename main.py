@@ -1,134 +1,199 @@
+import time
+
+# 程式開始的時間，作為啟動時間報告的基準
+STARTUP_BEGIN = time.perf_counter()
+
 try:
+    import argparse
+    import threading
     import tkinter as tk
-    from tkinter import messagebox
+    from tkinter import filedialog, messagebox
     import tkinter.font as tkFont
-    import pandas as pd
-    import matplotlib.pyplot as plt
-    import numpy as np
-    from PIL import Image, ImageTk
-    from io import BytesIO
-    from matplotlib import rcParams
-
-    # 設定 Matplotlib 字體
-    rcParams['font.sans-serif'] = ['Microsoft JhengHei']
-    rcParams['axes.unicode_minus'] = False
-    
+    from file_watcher import FileWatcher
+    from render_cache import DEFAULT_MAX_BYTES, RenderCache
+    from render_worker import RenderWorker
 except ImportError as e:
     print(f"發生 ImportError: {e}")
     exit(1)
 
-class DataManager:
-    def __init__(self):
-        self.all_courses_data = self.load_all_courses_data()
+# pandas、Matplotlib 與 PIL 載入較慢，由 load_heavy_modules() 在背景載入，登入畫面不需等待
+rendering = None
+ImageTk = None
+VirtualTable = None
+grade_import = None
 
-        self.student_data = self.load_student_data()
-        self.teacher_data = self.load_teacher_data()
 
-    def add_column(self, df):
-        # 計算總成績
-        df['總成績'] = round((df['期中考'] * 0.3 + df['期末考']* 0.3 + df['平時成績'] * 0.4), 2)
+def load_heavy_modules():
+    """載入繪圖模組（rendering 會一併載入 pandas 與 Matplotlib 並設定字體）"""
+    global rendering, ImageTk, VirtualTable, grade_import
+    import rendering
+    from PIL import ImageTk
+    from virtual_table import VirtualTable
+    import grade_import
 
-        # 計算 GPA
-        df['GPA'] = df['總成績'].apply(self.grade_to_GPA)
 
-        # 計算排名
-        df['期中考排名'] = df.groupby('課程代碼')['期中考'].rank(ascending=False, method='min').astype(int)
-        df['期末考排名'] = df.groupby('課程代碼')['期末考'].rank(ascending=False, method='min').astype(int)
-        df['平時成績排名'] = df.groupby('課程代碼')['平時成績'].rank(ascending=False, method='min').astype(int)
-        df['總排名'] = df.groupby('課程代碼')['總成績'].rank(ascending=False, method='min').astype(int)
+# 視窗大小停止變動多久後才重繪圖表（毫秒）
+RESIZE_DELAY_MS = 200
 
-        df['總人數'] = df.groupby('課程代碼')['學號'].transform('count')
 
-        df['期中考排名'] = df['期中考排名'].astype(int)
-        df['期末考排名'] = df['期末考排名'].astype(int)
-        df['平時成績排名'] = df['平時成績排名'].astype(int)
-        df['總成績排名'] = df['總排名'].astype(int)
+def set_options(dropdown, variable, options, command):
+    """替換 OptionMenu 的選項"""
+    menu = dropdown['menu']
+    menu.delete(0, 'end')
+    for option in options:
+        menu.add_command(label=option, command=tk._setit(variable, option, command))
 
-        # 計算 GPA 排名
-        df['GPA排名'] = df.groupby('課程名稱')['GPA'].rank(
-            ascending=False, method='min').astype(int)
-        df['GPA排名'] = df['GPA排名'].astype(int)
 
-        return df
+class StartupReport:
+    """記錄啟動各階段完成的時間（以 --startup-report 開啟）"""
 
-    def load_all_courses_data(self):
-        try:
-            df = pd.read_csv(r'save_data\all_courses_data.csv', encoding='utf-8-sig', dtype={'學號': str})
-            df = self.add_column(df)
-            return df
-        except Exception as e:
-            messagebox.showerror("錯誤", f"載入 all_courses_data.csv 檔案失敗：{e}")
-            exit(1)
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.marks = []
 
-    def load_student_data(self):
-        try:
-            return pd.read_csv(r'save_data\student_data.csv', encoding='utf-8-sig', dtype={'學號': str, '密碼': str})
-        except Exception as e:
-            messagebox.showerror("錯誤", f"載入 student_data.csv 檔案失敗：{e}")
-            exit(1)
+    def mark(self, stage):
+        elapsed = time.perf_counter() - STARTUP_BEGIN
+        self.marks.append((stage, elapsed))
+        if self.enabled:
+            print(f"[啟動] {elapsed * 1000:8.1f} ms  {stage}")
 
-    def load_teacher_data(self):
-        try:
-            return pd.read_csv(r'save_data\teacher_data.csv', encoding='utf-8-sig', dtype={'帳號': str, '密碼': str})
-        except Exception as e:
-            messagebox.showerror("錯誤", f"載入 teacher_data.csv 檔案失敗：{e}")
-            exit(1)
-    def save_all_courses_data(self, df):
-        df=df.drop(columns=['總成績','GPA','期中考排名','期末考排名','平時成績排名','總排名','總人數','總成績排名','GPA排名'])
-
-        df.to_csv(r'save_data\all_courses_data.csv',encoding='utf-8-sig', index=False)
-        print("save")
-
-    @staticmethod
-    def grade_to_GPA(grade):
-        gpa_mapping = {
-            (90, 100): 4.3,
-            (85, 90): 4.0,
-            (80, 85): 3.7,
-            (77, 80): 3.3,
-            (73, 77): 3.0,
-            (70, 73): 2.7,
-            (67, 70): 2.4,
-            (63, 67): 2.0,
-            (60, 63): 1.7,
-            (50, 60): 1.0,
-            (0, 50): 0,
-        }
-        for key, value in gpa_mapping.items():
-            if grade >= key[0] and grade < key[1]:
-                return value
 
 class GradeSystemApp(tk.Tk):
-    def __init__(self):
+    # 背景載入期間，檢查是否完成的間隔（毫秒）
+    LOADING_POLL_MS = 50
+    # 檢查資料檔是否被其他程式修改的間隔（毫秒）
+    WATCH_POLL_MS = 1000
+
+    def __init__(self, backend='csv', report=None, render_cache_bytes=DEFAULT_MAX_BYTES):
         super().__init__()
+        self.report = report or StartupReport()
+        self.report.mark("模組載入")
         self.title("成績查詢與管理系統")
         self.state('zoomed')  # 最大化視窗
 
-        # 存取資料
-        self.datas = DataManager()
-        # 讀取學生和教師帳密資料
-        self.students_df = self.datas.load_student_data()
-        self.teachers_df = self.datas.load_teacher_data()
+        # 資料於背景載入，完成前 datas 為 None
+        self.datas = None
+        self.watcher = None
+        self.load_error = None
+        self.pending_login = False
+        self.start_loading(backend)
+        # 已繪製的圖表，登出後仍保留，供下次登入使用
+        self.render_cache = RenderCache(render_cache_bytes)
+        # 圖表在背景執行緒繪製，視窗不會因繪製而停住
+        self.render_worker = RenderWorker(self)
+
         # 建立並顯示登錄 Frame
-        self.login_frame = LoginFrame(self, self.students_df, self.teachers_df)
+        self.login_frame = LoginFrame(self)
         # 初始化其他 Frame
         self.students_frame = None
         self.teacher_frame = None
 
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.after_idle(self.report.mark, "登入畫面顯示")
+
+    def start_loading(self, backend):
+        """在背景執行緒載入模組與資料（帳號資料只在 DataManager 中讀取一次）"""
+        def load():
+            try:
+                load_heavy_modules()
+                self.report.mark("pandas / Matplotlib / PIL 載入")
+                # 預設為 CSV，--backend sqlite 使用 SQLite 資料庫
+                if backend == 'sqlite':
+                    from sqlite_store import SqliteDataManager
+                    datas = SqliteDataManager()
+                else:
+                    from data_manager import DataManager
+                    datas = DataManager()
+                self.report.mark("成績與帳號資料載入")
+                self.loaded_datas = datas
+            except ImportError as e:
+                self.load_error = f"發生 ImportError: {e}"
+            except Exception as e:
+                self.load_error = str(e)
+
+        self.loaded_datas = None
+        self.loading_thread = threading.Thread(target=load, daemon=True)
+        self.loading_thread.start()
+        self.after(self.LOADING_POLL_MS, self.check_loading)
+
+    def check_loading(self):
+        """Tk 不是執行緒安全的，載入結果一律回到主執行緒處理"""
+        if self.loading_thread.is_alive():
+            self.after(self.LOADING_POLL_MS, self.check_loading)
+            return
+        if self.load_error is not None:
+            messagebox.showerror("錯誤", self.load_error)
+            self.destroy()
+            return
+        self.datas = self.loaded_datas
+        self.start_watching()
+        if self.pending_login:
+            self.pending_login = False
+            self.login_frame.login()
+
+    def start_watching(self):
+        """定期檢查資料檔，其他程式（教務處的修課檔、同時開啟的本系統）修改後自動套用"""
+        paths = self.datas.watched_paths()
+        if not paths:
+            return
+        self.watcher = FileWatcher(paths)
+        self.after(self.WATCH_POLL_MS, self.check_files)
+
+    def check_files(self):
+        if self.watcher is None:
+            return
+        changed = self.watcher.changed()
+        if not changed:
+            self.after(self.WATCH_POLL_MS, self.check_files)
+            return
+        # 被取代的修課檔在背景執行緒讀取並與目前資料比對，主執行緒只套用有差異的列
+        result = {}
+
+        def read():
+            try:
+                result['courses_file'] = self.datas.read_courses_file(changed)
+            except Exception as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=read, daemon=True)
+        thread.start()
+        self.after(self.LOADING_POLL_MS, self.apply_changes, changed, thread, result)
+
+    def apply_changes(self, changed, thread, result):
+        if thread.is_alive():
+            self.after(self.LOADING_POLL_MS, self.apply_changes, changed, thread, result)
+            return
+        try:
+            if 'error' in result:
+                raise result['error']
+            courses = self.datas.reload_changed(changed, result.get('courses_file'))
+        except Exception as e:
+            # 檔案可能還在寫入中，下次變動時會再讀取
+            messagebox.showerror("錯誤", str(e))
+        else:
+            if courses:
+                self.render_cache.invalidate(courses)
+                for frame in (self.students_frame, self.teacher_frame):
+                    if frame is not None:
+                        frame.data_changed(courses)
+        self.after(self.WATCH_POLL_MS, self.check_files)
 
     def show_frame(self, frame):
         frame.tkraise()
 
     def on_closing(self):
         if messagebox.askokcancel("確認退出", "您確定要退出嗎？"):
-            plt.close('all')  # 關閉所有 Matplotlib 圖形
+            if self.watcher is not None:
+                self.watcher.close()
+                self.watcher = None
+            if self.datas is not None:
+                self.datas.compact()  # 將成績修改日誌併回 CSV
             self.destroy()
 
-    def show_student_frame(self, student_name):
+    def show_student_frame(self, student_id, student_name):
         if self.students_frame is not None:
             self.students_frame.destroy()
-        self.students_frame = StudentFrame(self, student_name)
+        self.students_frame = StudentFrame(self, student_id, student_name)
         self.students_frame.place(
             relx=0.5, rely=0.5, anchor='center', relwidth=1, relheight=1)
 
@@ -149,17 +214,15 @@ class GradeSystemApp(tk.Tk):
             self.teacher_frame = None  # 清空變數
 
         # 建立並顯示登錄 Frame
-        self.login_frame = LoginFrame(self, self.students_df, self.teachers_df)
+        self.login_frame = LoginFrame(self)
 
         self.show_frame(self.login_frame)
 
 
 class LoginFrame(tk.Frame):
-    def __init__(self, parent, students_df, teachers_df):
+    def __init__(self, parent):
         super().__init__(parent)
         self.configure(bg='lightgray')
-        self.students_df = students_df  # 存儲學生帳號和密碼資料
-        self.teachers_df = teachers_df  # 存儲教師帳號和密碼資料
         # 設置字體
         font_style_label = tkFont.Font(family="Arial", size=25)
         font_style_button = tkFont.Font(family="Arial", size=25, weight="bold")
@@ -199,6 +262,10 @@ class LoginFrame(tk.Frame):
         tk.Button(self, text="清除", command=self.clear_entries,
                 font=font_style_button).place(relx=0.6, rely=0.7, anchor='center')
 
+        # 資料尚未載入完成時的提示
+        self.status_label = tk.Label(self, text="", bg='lightgray', font=font_style_label)
+        self.status_label.place(relx=0.5, rely=0.85, anchor='center')
+
     def clear_entries(self):
         self.username_entry.delete(0, tk.END)
         self.password_entry.delete(0, tk.END)
@@ -209,30 +276,116 @@ class LoginFrame(tk.Frame):
         role = self.role_var.get()
 
         if username and password:
+            datas = self.master.datas
+            if datas is None:
+                # 帳號資料仍在背景載入，完成後自動重新登入
+                self.master.pending_login = True
+                self.status_label.config(text="資料載入中，請稍候…")
+                return
+            self.status_label.config(text="")
             if role == "student":
-                student_row = self.students_df[self.students_df['學號'] == username]
-                if not student_row.empty and student_row['密碼'].values[0] == password:
-                    student_name = student_row['姓名'].values[0]
-                    self.master.show_student_frame(student_name)
+                student_name = datas.student_accounts.verify(username, password)
+                if student_name is not None:
+                    self.master.show_student_frame(username, student_name)
                 else:
                     messagebox.showerror("錯誤", "帳號或密碼錯誤")
             elif role == 'teacher':
-                teacher_row = self.teachers_df[self.teachers_df['帳號'] == username]
-                if not teacher_row.empty and teacher_row['密碼'].values[0] == password:
-                    teacher_name = teacher_row['姓名'].values[0]
+                teacher_name = datas.teacher_accounts.verify(username, password)
+                if teacher_name is not None:
                     self.master.show_teacher_frame(teacher_name)
                 else:
                     messagebox.showerror("錯誤", "帳號或密碼錯誤")
         else:
             messagebox.showerror("錯誤", "請輸入帳號和密碼")
 
-class StudentFrame(tk.Frame):
-    def __init__(self, parent, student_name):
+class ChartCanvasMixin:
+    """學生與教師畫面共用的圖表顯示：查詢圖片快取、交給背景執行緒繪製、在畫布上置中顯示
+
+    使用的框架需有 canvas、datas、current_view、resize_job 與 image_tk 屬性。"""
+
+    def clear_canvas(self):
+        """清除畫布上的內容"""
+        self.canvas.delete("all")
+        self.image_tk = None
+
+    def show_cached(self, key, courses, render):
+        """圖表已在快取中時直接顯示，否則由 render() 取出資料，交給背景執行緒繪製後存入快取
+
+        render() 回傳繪製函式 build(figures)，沒有資料時回傳 None"""
+        self.current_view = (key, courses, render)
+        worker = self.master.render_worker
+        worker.cancel()  # 換了圖表，先前尚未完成的不再需要
+        cache = self.master.render_cache
+        size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        key += (size, self.datas.data_version(courses))
+        img = cache.get(key)
+        if img is not None:
+            self.show_image(img)
+            return
+        build = render()
+        if build is None:
+            return
+
+        def done(img):
+            cache.put(key, img, courses)
+            self.show_image(img)
+
+        # 直接以畫布大小繪製，不需要再縮放
+        self.show_pending()
+        worker.submit(build, size, done, self.show_render_error)
+
+    def show_pending(self):
+        """繪製中的提示"""
+        self.clear_canvas()
+        self.canvas.create_text(self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2,
+                                text="圖表繪製中…", font=("Arial", 20))
+
+    def show_render_error(self, error):
+        """繪製失敗：把繪製中的提示換成錯誤訊息"""
+        self.clear_canvas()
+        self.canvas.create_text(self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2,
+                                text="圖表繪製失敗", font=("Arial", 20))
+        messagebox.showerror("錯誤", f"圖表繪製失敗：{error}")
+
+    def on_canvas_resize(self, event):
+        """畫布大小改變時，等停止變動一段時間後才以新的大小重繪"""
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(RESIZE_DELAY_MS, self.redraw)
+
+    def redraw(self):
+        self.resize_job = None
+        if self.current_view is not None:
+            self.show_cached(*self.current_view)
+
+    def show_image(self, img):
+        """將圖片置中繪製到 Tkinter 畫布"""
+        img_tk = ImageTk.PhotoImage(img)
+        # 清除畫布內容
+        self.clear_canvas()
+
+        # 獲取畫布中心座標
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        img_width, img_height = img.size
+        x = (canvas_width - img_width) // 2
+        y = (canvas_height - img_height) // 2
+
+        # 顯示圖像
+        self.canvas.create_image(x,y, image=img_tk,anchor=tk.NW)
+        self.canvas.image = img_tk  # 保持對圖像的引用，防止被垃圾回收
+
+
+class StudentFrame(ChartCanvasMixin, tk.Frame):
+    def __init__(self, parent, student_id, student_name):
         super().__init__(parent)
 
+        # 姓名可能重複，查詢一律使用學號
+        self.student_id = student_id
         self.student_name = student_name
-        self.all_course_datas_df = self.master.datas.all_courses_data  # 使用 DataManager 實例
+        self.datas = self.master.datas  # 使用 DataManager 實例
         self.course_list = self.load_courses()
+        self.course_ids = [course.split(' ')[0] for course in self.course_list]
         self.course_list.append("all 所有課程")
         # 設置字體
         font_style_label = tkFont.Font(family="Arial", size=25)
@@ -276,14 +429,17 @@ class StudentFrame(tk.Frame):
         self.canvas = tk.Canvas(self, width=800, height=600, bg='white')
         self.canvas.grid(row=5, column=0,
                          columnspan=20, sticky=tk.NE+tk.SW)
+        # 目前顯示的圖表，畫布大小改變時用來重繪
+        self.current_view = None
+        self.resize_job = None
+        self.canvas.bind('<Configure>', self.on_canvas_resize)
 
         # 儲存圖像對象
         self.image_tk = None
 
     def load_courses(self):
         """從 DataManager 讀取學生選修的課程列表，並顯示為'課程代碼 課程名稱'"""
-        df = self.all_course_datas_df
-        student_courses = df[df['姓名'] == self.student_name][[
+        student_courses = self.datas.student_rows(self.student_id)[[
             '課程代碼', '課程名稱']].drop_duplicates()
         return [f"{row['課程代碼']} {row['課程名稱']}" for _, row in student_courses.iterrows()]
 
@@ -291,40 +447,10 @@ class StudentFrame(tk.Frame):
         """處理課程選擇事件"""
         self.selected_course_id = selected_course.split(' ')[0]  # #課程代碼
         self.selected_course_name = selected_course.split(' ')[1]  # 只取課程
+        self.current_view = None
+        self.master.render_worker.cancel()
         self.clear_canvas()
 
-    def clear_canvas(self):
-        """清除畫布上的內容"""
-        self.canvas.delete("all")
-        self.image_tk = None
-
-    def draw_picture(self, fig):
-        """將 Matplotlib 圖像繪製到 Tkinter 畫布"""
-        # 將圖表保存為圖像
-        buf = BytesIO()
-        fig.savefig(buf, format='png')
-        buf.seek(0)
-        img = Image.open(buf)
-        img_tk = ImageTk.PhotoImage(img)
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        # img = img.resize((400, 300), Image.Resampling.LANCZOS)
-        # 清除畫布內容
-        self.clear_canvas()
-
-        # 獲取畫布中心座標
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        img_width, img_height = img.size
-        print(img_width, img_height)
-        print(canvas_width, canvas_height)
-        x = (canvas_width - img_width) // 2
-        y = (canvas_height - img_height) // 2
-
-        # 顯示圖像
-        self.canvas.create_image(x,y, image=img_tk,anchor=tk.NW)
-        self.canvas.image = img_tk  # 保持對圖像的引用，防止被垃圾回收
-
     def view_grade_table(self):
         if self.selected_course_name == "所有課程":
             self.create_all_courses_table()
@@ -342,222 +468,125 @@ class StudentFrame(tk.Frame):
             messagebox.showwarning("警告", "請選擇課程")
             return 0
         """顯示成績表格"""
+        self.show_cached(('grade_table', self.student_id, self.selected_course_id),
+                         [self.selected_course_id], self.plot_grade_table)
+
+    def plot_grade_table(self):
         # 讀取成績數據
-        df = self.all_course_datas_df
-        course_data = df[(df['姓名'] == self.student_name) & (df['課程代碼'] == self.selected_course_id)]
-
-        # 準備表格數據
-        columns = ["期中考", "期末考", "平時成績", "總成績", "GPA"]
-        values = [course_data[col].values[0] if col in course_data.columns else "未提供" for col in columns]
-        rankings = [course_data[col + "排名"].values[0]
-                    if (col + "排名") in course_data.columns else "未提供" for col in columns]
-        # 使用 Matplotlib 顯示表格
-        fig, ax = plt.subplots(figsize=(20, 20))
-        ax.axis('tight')
-        ax.axis('off')
-        # 設置表格數據
-        table_data = [[columns[i], values[i], rankings[i]] for i in range(len(columns))]
-
-        # 創建表格
-        table = ax.table(cellText=table_data, colLabels=[
-                         "項目", "成績", "排名"], cellLoc='center', loc='center', colColours=['lightgrey'] * 3)
-        
-        # 設定表格字型
-        font_properties = {'family': 'Microsoft JhengHei',
-                           'weight': 'bold', 'size': 14}
-        font_title_properties = {
-            'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
-
-        for key, cell in table.get_celld().items():
-            text = cell._text
-            text.set_fontproperties(font_properties)
-            if key[0] == 0 or key[1] == 0:  # Header row or column
-                text.set_fontsize(16)
-                text.set_fontweight('bold')
-            else:
-                text.set_fontsize(14)
-
-        # 調整單元格的寬度和高度
-        for key, cell in table.get_celld().items():
-            if key[0] == 0:
-                cell.set_edgecolor('black')
-                cell.set_linewidth(1)
-            cell.set_width(0.1)  # 調整單元格寬度
-            cell.set_height(0.05)  # 調整單元格高度
-
-            cell.set_edgecolor('black')  # 設定邊框顏色
-            cell.set_linewidth(1)  # 設定邊框寬度
-            cell.set_facecolor(
-                # 設定單元格背景顏色
-                'lightgrey' if key[0] == 0 or key[1] == 0 else 'white')
-
-        ax.set_title(f'{self.selected_course_name} 成績分析',
-                     fontdict=font_title_properties)
-        # 將圖像顯示在畫布上
-        
-        self.draw_picture(fig)
+        course_data = self.datas.enrollment(self.student_id, self.selected_course_id)
+        if course_data is None:
+            messagebox.showwarning("警告", "該課程沒有數據")
+            return
+        course_name = self.selected_course_name
+        return lambda figures: rendering.grade_table(figures, course_data, course_name)
 
     def create_grade_chart(self):
         if self.selected_course_name == None:
             messagebox.showwarning("警告", "請選擇課程")
             return 0
         """顯示成績圖表"""
+        self.show_cached(('grade_chart', self.student_id, self.selected_course_id),
+                         [self.selected_course_id], self.plot_grade_chart)
+
+    def plot_grade_chart(self):
         # 讀取課程數據
-        df = self.all_course_datas_df
-        course_data = df[(df['姓名'] == self.student_name) &
-                         (df['課程代碼'] == self.selected_course_id)]
+        course_data = self.datas.enrollment(self.student_id, self.selected_course_id)
 
-        if course_data.empty:
+        if course_data is None:
             messagebox.showwarning("警告", "該課程沒有數據")
             return
-
-        # 字型
-        font_title_properties = {
-            'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
-        # 繪製長條圖
-        fig, ax = plt.subplots(figsize=(6, 4))
-        subjects = ["期中考", "期末考", "平時成績", "總成績"]
-        scores = [course_data[subject].values[0] for subject in subjects]
-
-        ax.bar(subjects, scores, color=['blue', 'green', 'orange', '#ba55d3'])
-        ax.set_xlabel('項目')
-        ax.set_ylabel('成績')
-        ax.set_ylim(0, 100)
-        ax.set_title(f'{self.selected_course_name} 成績分析',
-                     fontdict=font_title_properties,pad=0.001)
-
-        # 將圖像顯示在畫布上
-        self.draw_picture(fig)
+        course_name = self.selected_course_name
+        return lambda figures: rendering.grade_chart(figures, course_data, course_name)
 
     def create_all_courses_table(self):
         """顯示所有課程的表格"""
+        self.show_cached(('all_courses_table', self.student_id), self.course_ids,
+                         self.plot_all_courses_table)
+
+    def plot_all_courses_table(self):
         # 讀取學生所有課程的數據
-        df = self.all_course_datas_df
-        student_courses_data = df[df['姓名'] == self.student_name]
+        student_courses_data = self.datas.student_rows(self.student_id)
 
         if student_courses_data.empty:
             messagebox.showwarning("警告", "該學生沒有課程數據")
             return
-        columns = ["課程名稱", "學分", "期中考", "期末考", "平時成績", "總成績", "GPA"]
-        table_data = student_courses_data[columns].values.tolist()
-        # 計算平均GPA
-        average_gpa = 0
-        if 'GPA' in student_courses_data.columns and '學分' in student_courses_data.columns:
-            total_credits = student_courses_data['學分'].sum()
-            weighted_gpa_sum = (
-                student_courses_data['GPA'] * student_courses_data['學分']).sum()
-            average_gpa = weighted_gpa_sum / total_credits if total_credits != 0 else 0
-
-        # 使用 Matplotlib 顯示表格
-        fig, ax = plt.subplots(figsize=(17, len(table_data) +2))  # 調整高度以適應數據行數
-        ax.axis('tight')
-        ax.axis('off')
-
-        # 設置表格數據
-        table = ax.table(cellText=table_data, colLabels=columns,
-                        cellLoc='center', loc='center', colColours=['lightgrey'] * len(columns))
-
-        # 設定字型
-        font_properties = {'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
-        font_title_properties = {'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 24}
-
-        # 設定每個欄位的寬度
-        column_widths = {'課程名稱': 0.2, '學分': 0.05, '期中考': 0.1, '期末考': 0.1, '平時成績': 0.1, '總成績': 0.1, 'GPA': 0.05}
-
-        # 調整單元格的寬度和高度
-        for key, cell in table.get_celld().items():
-            if key[0] == 0:  # Header row
-                cell.set_edgecolor('black')
-                cell.set_linewidth(1)
-            if len(key)<5:
-                h=0.1
-            elif len(key)<7:
-                h=0.05
-            else:
-                h=0.03
-            cell.set_height(h)  # 調整單元格高度
-            # 根據欄位名稱設置寬度
-            col_name = columns[key[1]]
-            cell.set_width(column_widths.get(col_name, 0.15))  # 默認寬度
-            
-            cell.set_edgecolor('black')  # 設定邊框顏色
-            cell.set_linewidth(1)  # 設定邊框寬度
-            cell.set_facecolor('lightgrey' if key[0] == 0 else 'white')  # 設定單元格背景顏色
-        
-        # 設置字型屬性
-        for key, cell in table.get_celld().items():
-            text = cell._text
-            text.set_fontproperties(font_properties)
-            if key[0] == 0:  # Header row
-                text.set_fontsize(20)
-                text.set_fontweight('bold')
-            else:
-                text.set_fontsize(16)
-        
-        # ax.set_title('所有課程成績表', fontdict=font_title_properties,pad=0.001)
-        
-        # 在表格下方顯示平均GPA
-        text_str = f"平均GPA: {average_gpa:.2f}"
-        plt.figtext(0.5, 0.05, text_str, ha='center', va='center',
-                    fontsize=14, fontfamily='Microsoft JhengHei', weight='bold')
-        
-        # 將圖像顯示在畫布上
-        self.draw_picture(fig)
+        return lambda figures: rendering.all_courses_table(figures, student_courses_data)
 
     def create_all_courses_chart(self):
         """顯示所有課程的圖表"""
+        self.show_cached(('all_courses_chart', self.student_id), self.course_ids,
+                         self.plot_all_courses_chart)
+
+    def plot_all_courses_chart(self):
         # 讀取學生所有課程的數據
-        df = self.all_course_datas_df
-        student_courses_data = df[df['姓名'] == self.student_name]
+        student_courses_data = self.datas.student_rows(self.student_id)
 
         if student_courses_data.empty:
             messagebox.showwarning("警告", "該學生沒有課程數據")
             return
-
-        # 字型
-        font_title_properties = {
-            'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
-        # 繪製長條圖
-        fig, ax = plt.subplots(figsize=(10, 6))
-        courses = student_courses_data['課程名稱'].tolist()
-        midterm_scores = student_courses_data['期中考'].tolist()
-        final_scores = student_courses_data['期末考'].tolist()
-        casual_scores = student_courses_data['平時成績'].tolist()
-        total_scores = student_courses_data['總成績'].tolist()
-
-        x = range(len(courses))
-        ax.bar(x, midterm_scores, width=0.2,
-               label='期中考', color='blue', align='center')
-        ax.bar([p + 0.2 for p in x], final_scores, width=0.2,
-               label='期末考', color='green', align='center')
-        ax.bar([p + 0.4 for p in x], casual_scores, width=0.2,
-               label='平時成績', color='orange', align='center')
-        ax.bar([p + 0.6 for p in x], total_scores, width=0.2,
-               label='總成績', color='#ba55d3', align='center')
-
-        ax.set_xticks([p + 0.3 for p in x])
-        ax.set_xticklabels(courses, rotation=45, ha='right')
-        ax.set_xlabel('課程名稱')
-        ax.set_ylabel('成績')
-        ax.set_ylim(0, 100)
-        ax.set_title('所有課程成績分析', fontdict=font_title_properties)
-        ax.legend()
-
-        # 將圖像顯示在畫布上
-        self.draw_picture(fig)
+        return lambda figures: rendering.all_courses_chart(figures, student_courses_data)
+
+    def data_changed(self, courses):
+        """其他程式修改了資料：更新課程選單，顯示中的圖表以新資料重繪"""
+        course_list = self.load_courses() + ["all 所有課程"]
+        list_changed = course_list != self.course_list
+        if list_changed:
+            self.course_list = course_list
+            self.course_ids = [course.split(' ')[0] for course in course_list[:-1]]
+            set_options(self.course_dropdown, self.course_var, self.course_list, self.course_selected)
+        if self.current_view is None:
+            return
+        key, view_courses, render = self.current_view
+        if self.selected_course_name == "所有課程":
+            view_courses = self.course_ids
+        elif self.selected_course_id not in self.course_ids:
+            # 已不再修這門課程
+            self.course_var.set("請選擇")
+            self.selected_course_id = self.selected_course_name = None
+            self.current_view = None
+            self.clear_canvas()
+            return
+        if list_changed or set(view_courses) & set(courses):
+            self.show_cached(key, view_courses, render)
 
     def logout(self):
         """登出並返回登錄界面"""
         if messagebox.askyesno("確認", "是否要登出"):
+            self.master.render_worker.cancel()
             self.destroy()
             app.show_login_frame()
 
-class TeacherFrame(tk.Frame):
+class TeacherFrame(ChartCanvasMixin, tk.Frame):
+    # 學生名單表格的欄位；排名欄顯示目前排序依據的排名
+    ROSTER_COLUMNS = ['排名', '學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
+    # 點選標題時的排序依據與第一次點選的方向（分數由高到低）
+    ROSTER_SORT_KEYS = {
+        '排名': ('總成績', False),
+        '期中考': ('期中考', False),
+        '期末考': ('期末考', False),
+        '平時成績': ('平時成績', False),
+        '總成績': ('總成績', False),
+        'GPA': ('GPA', False),
+    }
+    # 依分數排序時，排名欄顯示 add_column 產生的對應排名
+    RANK_COLUMNS = {'期中考': '期中考排名', '期末考': '期末考排名', '平時成績': '平時成績排名',
+                    '總成績': '總成績排名', 'GPA': 'GPA排名'}
+    ROSTER_DATA_COLUMNS = ROSTER_COLUMNS[1:] + ['期中考排名', '期末考排名', '平時成績排名', '總成績排名', 'GPA排名']
+    # 表格修改模式的欄位，其中的成績欄位可以直接編輯
+    GRID_COLUMNS = ['學號', '姓名', '期中考', '期末考', '平時成績', '總成績']
+    GRID_EDITABLE = ('期中考', '期末考', '平時成績')
+    # 成績分布圖的選項 -> (欄位, 標題)
+    CHART_COLUMNS = {'mid': ('期中考', "期中考成績分布"), 'final': ('期末考', "期末考成績分布"),
+                     'casual': ('平時成績', "平時成績分布"), 'avg': ('總成績', "總成績分布")}
+    # 排序單選按鈕對應的欄位（None 為原本的順序）
+    SORT_ACTIONS = {'default': None, 'id': '學號', 'mid': '期中考', 'final': '期末考',
+                    'casual': '平時成績', 'avg': '總成績'}
+
     def __init__(self, parent, teacher_name):
         super().__init__(parent)
 
         self.teacher_name = teacher_name
-        self.all_course_datas_df = self.master.datas.all_courses_data  # 使用 DataManager 實例
+        self.datas = self.master.datas  # 使用 DataManager 實例
         self.course_list = self.load_courses(self.teacher_name)
 
         # 設置字體
@@ -596,6 +625,10 @@ class TeacherFrame(tk.Frame):
                   command=self.modify_grade).grid(row=1, column=10, columnspan=2, rowspan=1, sticky=tk.NE+tk.SW)
         tk.Button(self, text="查看圖表", font=("Arial", 20),
                   command=self.view_grade_chart).grid(row=1, column=12, columnspan=2, rowspan=1, sticky=tk.NE+tk.SW)
+        tk.Button(self, text="匯入成績", font=("Arial", 20),
+                  command=self.import_grades).grid(row=1, column=14, columnspan=2, rowspan=1, sticky=tk.NE+tk.SW)
+        tk.Button(self, text="表格修改", font=("Arial", 20),
+                  command=self.edit_grid).grid(row=1, column=16, columnspan=2, rowspan=1, sticky=tk.NE+tk.SW)
 
         # 登出按鈕
         self.logout_button = tk.Button(
@@ -604,18 +637,26 @@ class TeacherFrame(tk.Frame):
         self.act_frame = None
         self.table_frame = None
         self.canvas = None
+        # 目前顯示的圖表，畫布大小改變時用來重繪
+        self.current_view = None
+        self.resize_job = None
         self.set_frame()
 
         # 儲存圖像對象
         self.image_tk = None
 
     def set_frame(self, t='frame'):
+        self.frame_type = t
+        self.current_view = None
+        self.master.render_worker.cancel()
         if self.act_frame is not None:
             self.act_frame.destroy()
         if self.table_frame is not None:
             self.table_frame.destroy()
         if self.canvas is not None:
             self.canvas.destroy()
+        self.table_frame = None
+        self.canvas = None
         if t == 'frame':
             # 根據選擇而出現不同的內容
             self.act_frame = tk.Frame(self)
@@ -637,22 +678,33 @@ class TeacherFrame(tk.Frame):
                                 columnspan=20, sticky=tk.NE+tk.SW)
             for i in range(20):
                 self.act_frame.grid_columnconfigure(i, weight=1)
+        if t == 'image':
             self.canvas = tk.Canvas(self, width=800, height=600)
             self.canvas.grid(row=4, column=0, rowspan=15,
                              columnspan=20, sticky=tk.NE+tk.SW)
+            self.canvas.bind('<Configure>', self.on_canvas_resize)
+        if t == 'table':
+            # 學生名單表格：只繪製可見的列，點選標題排序
+            self.table_frame = VirtualTable(self, self.ROSTER_COLUMNS, sort_keys=self.ROSTER_SORT_KEYS,
+                                            sorter=self.roster_order, on_sort=self.roster_sorted)
+            self.table_frame.grid(row=4, column=0, rowspan=15,
+                                  columnspan=20, sticky=tk.NE+tk.SW)
+        if t == 'grid':
+            # 可編輯的成績表格：輸入時即檢查，修改只記錄在表格中，儲存時一次寫入
+            self.table_frame = VirtualTable(self, self.GRID_COLUMNS, editable=self.GRID_EDITABLE,
+                                            validate=grade_import.valid_score_text, on_edit=self.grid_edited)
+            self.table_frame.grid(row=4, column=0, rowspan=15,
+                                  columnspan=20, sticky=tk.NE+tk.SW)
+        if t == 'preview':
+            # 匯入成績的預覽表格
+            self.table_frame = VirtualTable(self, grade_import.PREVIEW_COLUMNS)
+            self.table_frame.grid(row=4, column=0, rowspan=15,
+                                  columnspan=20, sticky=tk.NE+tk.SW)
 
     def load_courses(self, teachername):
-        """從 CSV 文件中加載教師修課的課程列表"""
-        df = self.all_course_datas_df
-
-        # 去除教師名稱中的前後空格，避免因空格導致的匹配錯誤
-        df['教師'] = df['教師'].str.strip()
-
-        # 確保教師名稱為字串並去除前後空格
-        teacher_name = str(teachername).strip()
-
-        # 過濾出符合教師名稱的課程資料
-        student_courses = df[df['教師'].str.strip() == teacher_name][[
+        """從 DataManager 讀取教師授課的課程列表"""
+        # 以教師索引取出符合教師名稱的課程資料
+        student_courses = self.datas.teacher_rows(teachername)[[
             '課程代碼', '課程名稱']].drop_duplicates()
 
         # 返回課程代碼和名稱的列表
@@ -674,113 +726,46 @@ class TeacherFrame(tk.Frame):
         if self.selected_course is None:
             messagebox.showwarning("警告", "請先選擇課程")
             return
-        Radiobuttonfont = tkFont.Font(family="Arial", size=16)
-        self.set_frame("image")
-        self.role_var = tk.StringVar(value="default")
-        # 創建排序選項的單選按鈕，並在command中傳遞action參數
-        tk.Radiobutton(self.act_frame, text="預設", variable=self.role_var, value="default",
-                       command=lambda: self.create_students_table("default"), font=Radiobuttonfont, indicatoron=False).grid(row=0, column=5, columnspan=2, sticky=tk.NE+tk.SW)
-        tk.Radiobutton(self.act_frame, text="依學號排序", variable=self.role_var, value="id",
-                       command=lambda: self.create_students_table("id"), font=Radiobuttonfont, indicatoron=False).grid(row=0, column=7, columnspan=2, sticky=tk.NE+tk.SW)
-        tk.Radiobutton(self.act_frame, text="依期中考成績排序", variable=self.role_var, value="mid",
-                       command=lambda: self.create_students_table("mid"), font=Radiobuttonfont, indicatoron=False).grid(row=0, column=9, columnspan=2, sticky=tk.NE+tk.SW)
-        tk.Radiobutton(self.act_frame, text="依期末考成績排序", font=Radiobuttonfont, variable=self.role_var, value="final",
-                       command=lambda: self.create_students_table("final"), indicatoron=False).grid(row=0, column=11, columnspan=2, sticky=tk.NE+tk.SW)
-        tk.Radiobutton(self.act_frame, text="依平時成績排序", variable=self.role_var, value="casual",
-                       command=lambda: self.create_students_table("casual"), font=Radiobuttonfont, indicatoron=False).grid(row=0, column=13, columnspan=2, sticky=tk.NE+tk.SW)
-        tk.Radiobutton(self.act_frame, text="依總成績排序", variable=self.role_var, value="avg",
-                       command=lambda: self.create_students_table("avg"), font=Radiobuttonfont, indicatoron=False).grid(row=0, column=15, columnspan=2, sticky=tk.NE+tk.SW)
-
-        # 初始表格顯示
-        self.create_students_table("default")
-
-    def create_students_table(self, action):
-        # 從 all_course_datas_df 中篩選出選定課程的數據
-        df = self.all_course_datas_df[self.all_course_datas_df['課程代碼']
-                                      == self.selected_course_id]
-
+        # 從 DataManager 的課程索引取出選定課程的數據
+        df = self.datas.course_rows(self.selected_course_id)
         if df.empty:
             messagebox.showwarning("警告", "該課程沒有數據")
             return
-
-        # 根據選定的排序方式進行排序
-        if action == "id":
-            df = df.sort_values(by="學號")
-            columns = ['學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
-        elif action == "mid":
-            df = df.sort_values(by="期中考", ascending=False)
-            columns = ['期中考排名', '學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
-
-        elif action == "final":
-            df = df.sort_values(by="期末考", ascending=False)
-            columns = ['期末考排名', '學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
-
-        elif action == "casual":
-            df = df.sort_values(by="平時成績", ascending=False)
-            columns = ['平時成績排名', '學號', '姓名',
-                       '期中考', '期末考', '平時成績', '總成績', 'GPA']
-        elif action == "avg":
-            df = df.sort_values(by="總成績", ascending=False)
-            columns = ['總成績排名', '學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
-        elif action == "default":
-            df = df  # 不進行排序，使用原始順序
-            columns = ['學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA']
-        # 將數據分為兩部分
-        df_part1 = df.head(25)
-        df_part2 = df.tail(len(df) - 25) if len(df) > 25 else pd.DataFrame()
-
-        # 創建兩張 Matplotlib 圖像
-        fig, axs = plt.subplots(1, 2, figsize=(20, 8))
-
-        # 繪製第一張圖
-        df_part1 = df_part1[columns]
-        df_part1['學號'] = df_part1['學號'].astype(str)
-
-        table_data = df_part1.values
-        col_labels = df_part1.columns
-
-        # 設置表格樣式
-        axs[0].axis('tight')
-        axs[0].axis('off')
-
-        table = axs[0].table(cellText=table_data, colLabels=col_labels,
-                             cellLoc='center', loc='center', colWidths=[0.1] * len(col_labels))
-        table.auto_set_font_size(False)
-        table.set_fontsize(14)
-        table.scale(1.2, 1.2)
-
-        # 設置標題列顏色
-        for (i, j), cell in table._cells.items():
-            if i == 0:
-                cell.set_facecolor('lightgray')
-
-        # 繪製第二張圖
-        if not df_part2.empty:
-            df_part2 = df_part2[columns]
-            df_part2['學號'] = df_part2['學號'].astype(str)
-
-            table_data = df_part2.values
-            col_labels = df_part2.columns
-
-            # 設置表格樣式
-            axs[1].axis('tight')
-            axs[1].axis('off')
-
-            table = axs[1].table(cellText=table_data, colLabels=col_labels,
-                                 cellLoc='center', loc='center', colWidths=[0.1] * len(col_labels))
-            table.auto_set_font_size(False)
-            table.set_fontsize(14)
-            table.scale(1.2, 1.2)
-
-            # 設置標題列顏色
-            for (i, j), cell in table._cells.items():
-                if i == 0:
-                    cell.set_facecolor('lightgray')
+        Radiobuttonfont = tkFont.Font(family="Arial", size=16)
+        self.set_frame("table")
+        self.role_var = tk.StringVar(value="default")
+        # 排序選項的單選按鈕，與點選表格標題的效果相同
+        for column, (text, value) in enumerate((("預設", "default"), ("依學號排序", "id"),
+                                               ("依期中考成績排序", "mid"), ("依期末考成績排序", "final"),
+                                               ("依平時成績排序", "casual"), ("依總成績排序", "avg"))):
+            tk.Radiobutton(self.act_frame, text=text, variable=self.role_var, value=value,
+                           command=lambda value=value: self.table_frame.sort_by(self.SORT_ACTIONS[value]),
+                           font=Radiobuttonfont, indicatoron=False).grid(
+                               row=0, column=5 + column * 2, columnspan=2, sticky=tk.NE+tk.SW)
+
+        roster = df[[column for column in df.columns if column in self.ROSTER_DATA_COLUMNS]].copy()
+        roster['排名'] = ''
+        self.table_frame.set_data(roster)
+
+    def roster_order(self, column, ascending):
+        """取用 DataManager 預先排好的課程順序，同分時依學號；無法預先排序的欄位回傳 None"""
+        if column not in self.datas.SORT_COLUMNS:
+            return None
+        keys = [(column, ascending)]
+        if column != '學號':
+            keys.append(('學號', True))
+        return self.datas.course_order(self.selected_course_id, keys)
+
+    def roster_sorted(self, column, ascending):
+        """排序後，排名欄顯示目前排序依據的排名，並同步單選按鈕"""
+        key_column = self.ROSTER_SORT_KEYS.get(column, (column,))[0]
+        rank_column = self.RANK_COLUMNS.get(key_column)
+        if rank_column is None:
+            self.table_frame.set_column('排名', [''] * len(self.table_frame))
         else:
-            axs[1].axis('off')  # 如果沒有剩餘的數據，隱藏第二張圖
-
-        plt.tight_layout()
-        self.draw_picture(fig)
+            self.table_frame.set_column('排名', self.table_frame.values[rank_column])
+        actions = {column: action for action, column in self.SORT_ACTIONS.items()}
+        self.role_var.set(actions.get(column, ''))
 
     def view_grade_chart(self):
         if self.selected_course is None:
@@ -807,82 +792,25 @@ class TeacherFrame(tk.Frame):
         if self.selected_course is None:
             messagebox.showwarning("警告", "請先選擇課程")
             return
+        self.show_cached(('course_chart', self.selected_course_id, action), [self.selected_course_id],
+                         lambda: self.plot_grade_chart(action))
 
-        df = self.all_course_datas_df[self.all_course_datas_df['課程代碼']
-                                      == self.selected_course_id]
-
-        if df.empty:
-            messagebox.showwarning("警告", "該課程沒有數據")
-            return
-
+    def plot_grade_chart(self, action):
         # 根據 action 選擇對應的成績列
-        if action == "mid":
-            scores = df["期中考"]
-            title = "期中考成績分布"
-        elif action == "final":
-            scores = df["期末考"]
-            title = "期末考成績分布"
-        elif action == "casual":
-            scores = df["平時成績"]
-            title = "平時成績分布"
-        elif action == "avg":
-            scores = df["總成績"]
-            title = "總成績分布"
-        else:
+        if action not in self.CHART_COLUMNS:
             messagebox.showerror("錯誤", "無效的選擇")
             return
+        column, title = self.CHART_COLUMNS[action]
+        stats = self.datas.course_stats.get(self.selected_course_id, column)
 
-        # 設置圖表
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.hist(scores, bins=10, range=(0, 100), edgecolor='black', alpha=0.7)
-        ax.set_title(title, fontsize=18)
-        ax.set_xlabel("分數", fontsize=14)
-        ax.set_ylabel("人數", fontsize=14)
-        ax.set_xticks(range(0, 101, 10))  # 設置 x 軸的刻度
-
-        # 顯示平均數和中位數
-        mean_score = scores.mean()
-        median_score = scores.median()
-        ax.axvline(mean_score, color='red', linestyle='dashed', linewidth=1)
-        ax.axvline(median_score, color='green',
-                   linestyle='dashed', linewidth=1)
-        ax.text(mean_score + 1, max(ax.get_ylim()) * 0.9,
-                f'平均數: {mean_score:.1f}', color='red')
-        ax.text(median_score + 1, max(ax.get_ylim()) * 0.8,
-                f'中位數: {median_score:.1f}', color='green')
-
-        plt.tight_layout()
-
-        self.draw_picture(fig)
-
-    def draw_picture(self, fig):
-        """將 Matplotlib 圖像繪製到 Tkinter 畫布"""
-        # 將圖表保存為圖像
-        buf = BytesIO()
-        fig.savefig(buf, format='png')
-        buf.seek(0)
-        img = Image.open(buf)
-        img_tk = ImageTk.PhotoImage(img)
-        # 獲取畫布大小
-        canvas_width = 1550
-        canvas_height = 600
-        # 縮放圖片以符合畫布大小
-        img_width, img_height = img.size
-        scale_width = canvas_width / img_width
-        scale_height = canvas_height / img_height
-        scale = min(scale_width, scale_height)
+        if len(stats) == 0:
+            messagebox.showwarning("警告", "該課程沒有數據")
+            return
+
+        # 統計會隨成績修改而變動，背景繪製使用當下的複本
+        stats = stats.copy()
+        return lambda figures: rendering.score_histogram(figures, stats, title)
 
-        new_width = int(img_width * scale)
-        new_height = int(img_height * scale)
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        img_tk = ImageTk.PhotoImage(img)
-        # 計算中心位置
-        x_center = (canvas_width - new_width) // 2
-        y_center = (canvas_height - new_height) // 2
-        # 顯示圖像
-        self.canvas.create_image(
-            x_center, y_center, anchor=tk.NW, image=img_tk)
-        self.canvas.image = img_tk  # 保持對圖像的引用，防止被垃圾回收
     def modify_grade(self):
         if self.selected_course == None:
             messagebox.showwarning("警告", "請先選擇課程")
@@ -897,27 +825,23 @@ class TeacherFrame(tk.Frame):
         student_name_entry.grid(row=0, column=9, columnspan=2)
 
         def on_confirm():
-            student_name_or_id = student_name_entry.get()
-            student_data = self.get_student_data(student_name_or_id)
+            student_name_or_id = student_name_entry.get().strip()
+            matches = self.datas.find_course_students(
+                self.selected_course_id, student_name_or_id)
 
-            if student_data is None:
+            if matches.empty:
                 messagebox.showerror("錯誤", "找不到該學生")
                 return
+            if len(matches) > 1:
+                messagebox.showerror("錯誤", "此課程有多位同名學生，請改輸入學號")
+                return
+
+            student_data = matches.iloc[0]
 
             self.display_student_grades(student_data)
         tk.Button(self.act_frame, text="確認", font=font_style_button,
                   command=on_confirm).grid(row=0, column=11, columnspan=2)
 
-    def get_student_data(self, student_name_or_id):
-        df = self.all_course_datas_df
-        student_data = df[(df['課程代碼'] == self.selected_course_id) & (
-            (df['學號'] == student_name_or_id) | (df['姓名'] == student_name_or_id))]
-
-        if not student_data.empty:
-            return student_data.iloc[0]  # 返回第一筆找到的資料
-        else:
-            return None
-
     def display_student_grades(self, student_data):
         font_style_label = tkFont.Font(family="Arial", size=25)
 
@@ -947,31 +871,163 @@ class TeacherFrame(tk.Frame):
         casual_entry.grid(row=8, column=11, columnspan=2)
 
         def on_save():
-            # 更新資料
-            self.all_course_datas_df.loc[self.all_course_datas_df['學號']
-                                         == student_data['學號'], '期中考'] = float(midterm_entry.get())
-            self.all_course_datas_df.loc[self.all_course_datas_df['學號']
-                                         == student_data['學號'], '期末考'] = float(final_entry.get())
-            self.all_course_datas_df.loc[self.all_course_datas_df['學號']
-                                         == student_data['學號'], '平時成績'] = float(casual_entry.get())
-
-            self.all_course_datas_df = self.master.datas.add_column(self.all_course_datas_df)
-            self.save_data()  # 儲存數據
+            try:
+                midterm = float(midterm_entry.get())
+                final = float(final_entry.get())
+                casual = float(casual_entry.get())
+            except ValueError:
+                messagebox.showerror("錯誤", "成績必須為數字")
+                return
+            # 只更新該學生在此課程的成績，並局部重算排名
+            self.datas.update_grades(
+                student_data['學號'], self.selected_course_id, midterm, final, casual)
+            # 排名改變的只有同名課程，只移除這些課程的圖表快取
+            self.master.render_cache.invalidate(self.datas.related_courses(self.selected_course_id))
+            conflicts = self.save_data(student_data['學號'])  # 儲存數據
             messagebox.showinfo("成功", "成績已更新")
+            self.show_conflicts(conflicts)
 
         tk.Button(self.table_frame, text="儲存", font=font_style_label,
                   command=on_save).grid(row=10, column=9, columnspan=4)
 
-    def save_data(self):
-        # 儲存更新後的數據
-        self.master.datas.save_all_courses_data(self.all_course_datas_df)
+    def import_grades(self):
+        """由 CSV/XLSX 整批匯入選定課程的成績：先檢查並預覽差異，確認後一次寫入"""
+        if self.selected_course is None:
+            messagebox.showwarning("警告", "請先選擇課程")
+            return
+        path = filedialog.askopenfilename(
+            title="選擇成績檔（學號、期中考、期末考、平時成績）",
+            filetypes=[("成績檔", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")])
+        if not path:
+            return
+        try:
+            table = grade_import.read_grade_file(path)
+        except grade_import.GradeImportError as e:
+            messagebox.showerror("錯誤", str(e))
+            return
+        preview = grade_import.prepare_import(self.datas, self.selected_course_id, table)
+        if len(preview.errors):
+            # 只列出前幾筆，其餘以筆數表示
+            shown = preview.errors.head(10)
+            lines = [f"第 {line} 列 {student_id}：{reason}"
+                     for line, student_id, reason in shown.itertuples(index=False)]
+            if len(preview.errors) > len(shown):
+                lines.append(f"……共 {len(preview.errors)} 筆")
+            messagebox.showwarning("警告", "以下資料有誤，將略過：\n" + "\n".join(lines))
+        if preview.changes.empty:
+            messagebox.showinfo("匯入成績", f"沒有需要更新的成績（{preview.summary()}）")
+            return
+        self.show_import_preview(preview)
+
+    def show_import_preview(self, preview):
+        """顯示匯入前後的成績差異，確認後才寫入"""
+        font_style = tkFont.Font(family="Arial", size=16)
+        self.set_frame('preview')
+        self.table_frame.set_data(preview.changes)
+        tk.Label(self.act_frame, text=preview.summary(), font=font_style).grid(
+            row=0, column=4, columnspan=6, sticky=tk.NE+tk.SW)
+
+        def on_confirm():
+            # 整批更新只重算、重新排序一次，日誌也只寫入一次
+            conflicts = self.datas.import_grades(preview.course_id, preview.changes)
+            self.master.render_cache.invalidate(self.datas.related_courses(preview.course_id))
+            messagebox.showinfo("成功", f"已匯入 {len(preview.changes)} 筆成績")
+            self.show_conflicts(conflicts)
+            self.set_frame()
+
+        tk.Button(self.act_frame, text="確認匯入", font=font_style, command=on_confirm).grid(
+            row=0, column=10, columnspan=2, sticky=tk.NE+tk.SW)
+        tk.Button(self.act_frame, text="取消", font=font_style, command=self.set_frame).grid(
+            row=0, column=12, columnspan=2, sticky=tk.NE+tk.SW)
+
+    def edit_grid(self):
+        """以表格一次修改多位學生的成績，雙擊儲存格編輯，Enter 往下、Tab 往右"""
+        if self.selected_course is None:
+            messagebox.showwarning("警告", "請先選擇課程")
+            return
+        df = self.datas.course_rows(self.selected_course_id)
+        if df.empty:
+            messagebox.showwarning("警告", "該課程沒有數據")
+            return
+        font_style = tkFont.Font(family="Arial", size=16)
+        self.set_frame('grid')
+        self.grid_status = tk.Label(self.act_frame, text="雙擊成績即可修改", font=font_style)
+        self.grid_status.grid(row=0, column=4, columnspan=6, sticky=tk.NE+tk.SW)
+        tk.Button(self.act_frame, text="儲存修改", font=font_style, command=self.commit_grid).grid(
+            row=0, column=10, columnspan=2, sticky=tk.NE+tk.SW)
+        tk.Button(self.act_frame, text="放棄修改", font=font_style, command=self.edit_grid).grid(
+            row=0, column=12, columnspan=2, sticky=tk.NE+tk.SW)
+        self.table_frame.set_data(df[self.GRID_COLUMNS])
+
+    def grid_edited(self, row, column, value):
+        edits = self.table_frame.edits
+        students = len({row for row, _ in edits})
+        self.grid_status.config(text=f"已修改 {len(edits)} 格（{students} 位學生），尚未儲存")
+
+    def commit_grid(self):
+        """將表格中的所有修改一次寫入：整批更新、重算一次排名、寫入日誌一次"""
+        self.table_frame.finish_edit()
+        edits = self.table_frame.edits
+        if not edits:
+            messagebox.showinfo("表格修改", "沒有修改的成績")
+            return
+        changes = grade_import.edits_to_changes(self.table_frame.values, edits)
+        conflicts = self.datas.import_grades(self.selected_course_id, changes)
+        self.master.render_cache.invalidate(self.datas.related_courses(self.selected_course_id))
+        messagebox.showinfo("成功", f"已更新 {len(changes)} 位學生的成績")
+        self.show_conflicts(conflicts)
+        # 重新載入，顯示重算後的總成績
+        self.table_frame.set_data(self.datas.course_rows(self.selected_course_id)[self.GRID_COLUMNS])
+        self.grid_status.config(text="雙擊成績即可修改")
+
+    def data_changed(self, courses):
+        """其他程式修改了資料：更新課程選單，重新顯示目前課程的名單或圖表"""
+        course_list = self.load_courses(self.teacher_name)
+        if course_list != self.course_list:
+            self.course_list = course_list
+            set_options(self.course_dropdown, self.course_var, self.course_list, self.course_selected)
+            if self.selected_course not in course_list:
+                self.course_var.set("請選擇")
+                self.selected_course = self.selected_course_id = self.selected_course_name = None
+                self.clear()
+                return
+        if self.selected_course_id not in courses:
+            return
+        if self.frame_type == 'image':
+            self.redraw()
+        elif self.frame_type == 'table':
+            self.view_students_table()
+        elif self.frame_type == 'grid':
+            # 不打斷正在進行的修改，儲存時會與其他使用者的修改合併
+            self.grid_status.config(text="其他使用者已修改此課程，儲存時會合併")
+
+    def save_data(self, student_id):
+        # 將修改追加到成績日誌（同時合併其他程式已儲存的修改）
+        return self.datas.save_grades([(student_id, self.selected_course_id)])
+
+    def show_conflicts(self, conflicts):
+        """其他程式同時修改了相同的成績時，列出以本程式的值覆蓋的格子"""
+        if not conflicts:
+            return
+        lines = [str(conflict) for conflict in conflicts[:10]]
+        if len(conflicts) > 10:
+            lines.append(f"……共 {len(conflicts)} 筆")
+        messagebox.showwarning("成績衝突", "其他使用者同時修改了以下成績：\n" + "\n".join(lines))
 
     def logout(self):
         if messagebox.askyesno("確認", "是否要登出"):
+            self.master.render_worker.cancel()
             self.destroy()
             app.show_login_frame()
 
 
 if __name__ == "__main__":
-    app = GradeSystemApp()
+    parser = argparse.ArgumentParser(description="成績查詢與管理系統")
+    parser.add_argument('--backend', choices=('csv', 'sqlite'), default='csv',
+                        help="資料儲存方式（sqlite 需先執行 python sqlite_store.py migrate）")
+    parser.add_argument('--startup-report', action='store_true', help="顯示啟動各階段花費的時間")
+    parser.add_argument('--render-cache-mb', type=int, default=DEFAULT_MAX_BYTES // 2**20,
+                        help="圖表快取的記憶體上限（MB）")
+    args = parser.parse_args()
+    app = GradeSystemApp(args.backend, StartupReport(args.startup_report), args.render_cache_mb * 2**20)
     app.mainloop()
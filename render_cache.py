@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+# 預設的快取記憶體上限（位元組）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def image_bytes(image):
+    """估計 PIL 圖片佔用的記憶體"""
+    return image.width * image.height * len(image.getbands())
+
+
+class RenderCache:
+    """已繪製圖表的 LRU 快取，以總位元組數限制記憶體用量
+
+    鍵由呼叫端決定（畫面類型、課程或學生、排序方式、畫布大小、資料版本），
+    每筆資料另外記錄相關的課程，成績修改時只移除這些課程的圖片。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # 鍵 -> (圖片, 位元組數, 相關課程)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """取得快取的圖片並標記為最近使用，沒有時回傳 None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, image, courses=()):
+        """加入圖片，超過上限時由最久未使用的開始移除"""
+        size = image_bytes(image)
+        if size > self.max_bytes:
+            return
+        self.discard(key)
+        self.entries[key] = (image, size, frozenset(courses))
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, old_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def invalidate(self, courses):
+        """移除與指定課程相關的圖片"""
+        courses = set(courses)
+        for key in [key for key, entry in self.entries.items() if entry[2] & courses]:
+            self.discard(key)
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
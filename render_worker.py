@@ -0,0 +1,94 @@
+import queue
+import threading
+from tkinter import messagebox
+
+
+class RenderWorker:
+    """在背景執行緒繪製圖表，完成的圖片再以 after() 交回 Tk 主執行緒
+
+    Figure 的建立與點陣化都在背景執行緒中進行（rendering 的函式不使用 pyplot，
+    沒有執行緒限制），主執行緒只負責取資料與顯示圖片，繪製期間視窗仍可操作。
+    一次只有最新的要求有效：送出新的要求或呼叫 cancel() 後，
+    尚未開始的舊要求直接略過，已在繪製中的舊要求完成後也會被丟棄。
+    """
+
+    # 等待繪製結果時，檢查是否完成的間隔（毫秒）
+    POLL_MS = 30
+
+    def __init__(self, root):
+        self.root = root  # 用來呼叫 after() 的 Tk 物件
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.ticket = 0  # 最新要求的編號，只在主執行緒中修改
+        self.pending = 0  # 已送出但結果尚未取回的要求數
+        self.poll_job = None
+        self.thread = None
+        self.rendered = 0
+        self.dropped = 0
+
+    def submit(self, build, size, on_done, on_error=None):
+        """送出繪製要求：build(figures) 回傳 Figure，以 size 點陣化後在主執行緒呼叫 on_done(圖片)
+
+        build 只能使用呼叫前已取出的資料，不可再讀取 DataManager 或操作 Tk。
+        繪製失敗時在主執行緒呼叫 on_error(例外)（例如把「繪製中」的提示換成錯誤訊息），
+        未提供時以訊息框顯示。回傳這次要求的編號。"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.ticket += 1
+        self.pending += 1
+        self.jobs.put((self.ticket, build, size, on_done, on_error))
+        if self.poll_job is None:
+            self.poll_job = self.root.after(self.POLL_MS, self.poll)
+        return self.ticket
+
+    def cancel(self):
+        """丟棄所有尚未完成的要求（切換畫面或登出時呼叫）"""
+        self.ticket += 1
+
+    def is_current(self, ticket):
+        return ticket == self.ticket
+
+    def run(self):
+        """背景執行緒：依序處理要求，已被取代的直接略過"""
+        from rendering import FigureManager
+        figures = FigureManager()  # 只在此執行緒中使用
+        while True:
+            ticket, build, size, on_done, on_error = self.jobs.get()
+            if ticket != self.ticket:
+                self.results.put((ticket, None, None, None, None))
+                continue
+            try:
+                fig = build(figures)
+                image = figures.rasterize(fig, size) if fig is not None else None
+                error = None
+            except Exception as e:
+                image, error = None, e
+            self.results.put((ticket, image, on_done, on_error, error))
+
+    def poll(self):
+        """主執行緒：取回繪製結果，只顯示最新要求的圖片"""
+        self.poll_job = None
+        while True:
+            try:
+                ticket, image, on_done, on_error, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if not self.is_current(ticket) or on_done is None:
+                self.dropped += 1
+                continue
+            if error is not None:
+                # 不在 after() 的回呼中拋出（Tk 只會印出錯誤，畫面停在「繪製中」）：
+                # 這次要求已結束，交給 on_error 顯示
+                self.cancel()
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    messagebox.showerror("錯誤", f"圖表繪製失敗：{error}")
+                continue
+            self.rendered += 1
+            if image is not None:
+                on_done(image)
+        if self.pending:
+            self.poll_job = self.root.after(self.POLL_MS, self.poll)
@@ -0,0 +1,275 @@
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from data_manager import exact_values
+
+# 設定 Matplotlib 字體
+matplotlib.rcParams['font.sans-serif'] = ['Microsoft JhengHei']
+matplotlib.rcParams['axes.unicode_minus'] = False
+
+# 每個畫面保留的閒置 Figure 數量
+DEFAULT_POOL_SIZE = 2
+
+
+class FigureManager:
+    """管理繪圖用的 Figure
+
+    Figure 直接以 Agg 建立，不經過 pyplot，因此不會登記在 pyplot 的全域清單中而累積；
+    轉為圖片後以 release() 清空並放回池中重複使用，池滿時直接丟棄。
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self.free = []
+        self.created = 0  # 建立過的 Figure 數量，供測試觀察
+
+    def subplots(self, nrows=1, ncols=1, figsize=None):
+        """取得一個 Figure 並建立子圖，用法與 plt.subplots 相同"""
+        fig = self.free.pop() if self.free else self.new_figure()
+        fig.set_size_inches(figsize or matplotlib.rcParams['figure.figsize'])
+        return fig, fig.subplots(nrows, ncols)
+
+    def new_figure(self):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        self.created += 1
+        return fig
+
+    def release(self, fig):
+        """清空 Figure 並放回池中"""
+        fig.clear()
+        fig.set_dpi(matplotlib.rcParams['figure.dpi'])
+        # tight_layout 會改變子圖邊距，清空時一併還原為預設值
+        fig.subplots_adjust(**{name: matplotlib.rcParams[f'figure.subplot.{name}']
+                               for name in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')})
+        if len(self.free) < self.pool_size:
+            self.free.append(fig)
+
+    def rasterize(self, fig, size=None):
+        """將 Figure 轉為 PIL 圖片，並釋放 Figure
+
+        直接取用 Agg 的 RGBA 緩衝區，不經過 PNG 編碼與解碼。size 為 (寬, 高) 像素時，
+        以調整 DPI 的方式依原本比例縮放到其中，版面與原尺寸相同且不需要再重新取樣。
+        """
+        try:
+            if size is not None:
+                fig.set_dpi(fit_dpi(fig, size))
+            fig.canvas.draw()
+            buf = fig.canvas.buffer_rgba()
+            # 緩衝區屬於 Figure，下次繪製時會被覆寫，因此複製一份
+            return Image.frombuffer('RGBA', (buf.shape[1], buf.shape[0]), buf, 'raw', 'RGBA', 0, 1).copy()
+        finally:
+            self.release(fig)
+
+
+def fit_dpi(fig, size):
+    """讓 Figure 依原比例放進 size（寬, 高）像素所需的 DPI"""
+    width_inches, height_inches = fig.get_size_inches()
+    width, height = size
+    if width <= 1 or height <= 1:
+        # 畫布尚未顯示，大小未知
+        return matplotlib.rcParams['figure.dpi']
+    return min(width / width_inches, height / height_inches)
+
+
+def grade_table(figures, course_data, course_name):
+    """學生單一課程的成績與排名表格"""
+    # 準備表格數據
+    columns = ["期中考", "期末考", "平時成績", "總成績", "GPA"]
+    values = [course_data[col] if col in course_data.index else "未提供" for col in columns]
+    rankings = [course_data[col + "排名"]
+                if (col + "排名") in course_data.index else "未提供" for col in columns]
+    # 使用 Matplotlib 顯示表格
+    fig, ax = figures.subplots(figsize=(20, 20))
+    ax.axis('tight')
+    ax.axis('off')
+    # 設置表格數據
+    table_data = [[columns[i], values[i], rankings[i]] for i in range(len(columns))]
+
+    # 創建表格
+    table = ax.table(cellText=table_data, colLabels=[
+                     "項目", "成績", "排名"], cellLoc='center', loc='center', colColours=['lightgrey'] * 3)
+
+    # 設定表格字型
+    font_properties = {'family': 'Microsoft JhengHei',
+                       'weight': 'bold', 'size': 14}
+    font_title_properties = {
+        'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
+
+    for key, cell in table.get_celld().items():
+        text = cell._text
+        text.set_fontproperties(font_properties)
+        if key[0] == 0 or key[1] == 0:  # Header row or column
+            text.set_fontsize(16)
+            text.set_fontweight('bold')
+        else:
+            text.set_fontsize(14)
+
+    # 調整單元格的寬度和高度
+    for key, cell in table.get_celld().items():
+        if key[0] == 0:
+            cell.set_edgecolor('black')
+            cell.set_linewidth(1)
+        cell.set_width(0.1)  # 調整單元格寬度
+        cell.set_height(0.05)  # 調整單元格高度
+
+        cell.set_edgecolor('black')  # 設定邊框顏色
+        cell.set_linewidth(1)  # 設定邊框寬度
+        cell.set_facecolor(
+            # 設定單元格背景顏色
+            'lightgrey' if key[0] == 0 or key[1] == 0 else 'white')
+
+    ax.set_title(f'{course_name} 成績分析',
+                 fontdict=font_title_properties)
+    return fig
+
+
+def grade_chart(figures, course_data, course_name):
+    """學生單一課程的成績長條圖"""
+    # 字型
+    font_title_properties = {
+        'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
+    # 繪製長條圖
+    fig, ax = figures.subplots(figsize=(6, 4))
+    subjects = ["期中考", "期末考", "平時成績", "總成績"]
+    scores = [course_data[subject] for subject in subjects]
+
+    ax.bar(subjects, scores, color=['blue', 'green', 'orange', '#ba55d3'])
+    ax.set_xlabel('項目')
+    ax.set_ylabel('成績')
+    ax.set_ylim(0, 100)
+    ax.set_title(f'{course_name} 成績分析',
+                 fontdict=font_title_properties,pad=0.001)
+    return fig
+
+
+def all_courses_table(figures, student_courses_data):
+    """學生所有課程的成績表格與平均 GPA"""
+    columns = ["課程名稱", "學分", "期中考", "期末考", "平時成績", "總成績", "GPA"]
+    table_data = exact_values(student_courses_data[columns]).values.tolist()
+    # 計算平均GPA
+    average_gpa = 0
+    if 'GPA' in student_courses_data.columns and '學分' in student_courses_data.columns:
+        total_credits = student_courses_data['學分'].sum()
+        weighted_gpa_sum = (
+            student_courses_data['GPA'] * student_courses_data['學分']).sum()
+        average_gpa = weighted_gpa_sum / total_credits if total_credits != 0 else 0
+
+    # 使用 Matplotlib 顯示表格
+    fig, ax = figures.subplots(figsize=(17, len(table_data) +2))  # 調整高度以適應數據行數
+    ax.axis('tight')
+    ax.axis('off')
+
+    # 設置表格數據
+    table = ax.table(cellText=table_data, colLabels=columns,
+                    cellLoc='center', loc='center', colColours=['lightgrey'] * len(columns))
+
+    # 設定字型
+    font_properties = {'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
+    font_title_properties = {'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 24}
+
+    # 設定每個欄位的寬度
+    column_widths = {'課程名稱': 0.2, '學分': 0.05, '期中考': 0.1, '期末考': 0.1, '平時成績': 0.1, '總成績': 0.1, 'GPA': 0.05}
+
+    # 調整單元格的寬度和高度
+    for key, cell in table.get_celld().items():
+        if key[0] == 0:  # Header row
+            cell.set_edgecolor('black')
+            cell.set_linewidth(1)
+        if len(key)<5:
+            h=0.1
+        elif len(key)<7:
+            h=0.05
+        else:
+            h=0.03
+        cell.set_height(h)  # 調整單元格高度
+        # 根據欄位名稱設置寬度
+        col_name = columns[key[1]]
+        cell.set_width(column_widths.get(col_name, 0.15))  # 默認寬度
+
+        cell.set_edgecolor('black')  # 設定邊框顏色
+        cell.set_linewidth(1)  # 設定邊框寬度
+        cell.set_facecolor('lightgrey' if key[0] == 0 else 'white')  # 設定單元格背景顏色
+
+    # 設置字型屬性
+    for key, cell in table.get_celld().items():
+        text = cell._text
+        text.set_fontproperties(font_properties)
+        if key[0] == 0:  # Header row
+            text.set_fontsize(20)
+            text.set_fontweight('bold')
+        else:
+            text.set_fontsize(16)
+
+    # ax.set_title('所有課程成績表', fontdict=font_title_properties,pad=0.001)
+
+    # 在表格下方顯示平均GPA
+    text_str = f"平均GPA: {average_gpa:.2f}"
+    fig.text(0.5, 0.05, text_str, ha='center', va='center',
+             fontsize=14, fontfamily='Microsoft JhengHei', weight='bold')
+    return fig
+
+
+def all_courses_chart(figures, student_courses_data):
+    """學生所有課程的成績長條圖"""
+    # 字型
+    font_title_properties = {
+        'family': 'Microsoft JhengHei', 'weight': 'bold', 'size': 20}
+    # 繪製長條圖
+    fig, ax = figures.subplots(figsize=(10, 6))
+    courses = student_courses_data['課程名稱'].tolist()
+    midterm_scores = student_courses_data['期中考'].tolist()
+    final_scores = student_courses_data['期末考'].tolist()
+    casual_scores = student_courses_data['平時成績'].tolist()
+    total_scores = student_courses_data['總成績'].tolist()
+
+    x = range(len(courses))
+    ax.bar(x, midterm_scores, width=0.2,
+           label='期中考', color='blue', align='center')
+    ax.bar([p + 0.2 for p in x], final_scores, width=0.2,
+           label='期末考', color='green', align='center')
+    ax.bar([p + 0.4 for p in x], casual_scores, width=0.2,
+           label='平時成績', color='orange', align='center')
+    ax.bar([p + 0.6 for p in x], total_scores, width=0.2,
+           label='總成績', color='#ba55d3', align='center')
+
+    ax.set_xticks([p + 0.3 for p in x])
+    ax.set_xticklabels(courses, rotation=45, ha='right')
+    ax.set_xlabel('課程名稱')
+    ax.set_ylabel('成績')
+    ax.set_ylim(0, 100)
+    ax.set_title('所有課程成績分析', fontdict=font_title_properties)
+    ax.legend()
+    return fig
+
+
+def score_histogram(figures, stats, title):
+    """課程成績分布直方圖，標示平均數與中位數；資料取自 course_stats 的 ScoreStats"""
+    # 設置圖表
+    fig, ax = figures.subplots(figsize=(10, 6))
+    counts, edges = stats.histogram()
+    # 各組人數已事先統計，以組的左界加上權重畫出相同的直方圖
+    ax.hist(edges[:-1], bins=edges, weights=counts, edgecolor='black', alpha=0.7)
+    ax.set_title(title, fontsize=18)
+    ax.set_xlabel("分數", fontsize=14)
+    ax.set_ylabel("人數", fontsize=14)
+    ax.set_xticks(range(0, 101, 10))  # 設置 x 軸的刻度
+
+    # 顯示平均數和中位數
+    mean_score = stats.mean()
+    median_score = stats.median()
+    ax.axvline(mean_score, color='red', linestyle='dashed', linewidth=1)
+    ax.axvline(median_score, color='green',
+               linestyle='dashed', linewidth=1)
+    ax.text(mean_score + 1, max(ax.get_ylim()) * 0.9,
+            f'平均數: {mean_score:.1f}', color='red')
+    ax.text(median_score + 1, max(ax.get_ylim()) * 0.8,
+            f'中位數: {median_score:.1f}', color='green')
+    # 標準差與及格率
+    ax.text(0.01, 0.97, f'標準差: {stats.std():.1f}  及格率: {stats.pass_rate():.0%}',
+            transform=ax.transAxes, va='top')
+
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,328 @@
+import argparse
+import json
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data_manager import exact_values
+from file_watcher import FileWatcher
+from grade_journal import SCORE_COLUMNS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# 檢查資料檔是否被其他程式修改的間隔（秒）
+WATCH_INTERVAL = 2
+# 登入 token 的有效時間（秒），過期後須重新登入
+SESSION_TTL = 8 * 60 * 60
+# 名單回傳的欄位
+ROSTER_COLUMNS = ['學號', '姓名', '期中考', '期末考', '平時成績', '總成績', 'GPA',
+                  '期中考排名', '期末考排名', '平時成績排名', '總成績排名', 'GPA排名']
+# 學生課程回傳的欄位
+STUDENT_COLUMNS = ['課程代碼', '課程名稱', '學分', '教師', '期中考', '期末考', '平時成績', '總成績', 'GPA',
+                   '期中考排名', '期末考排名', '平時成績排名', '總成績排名', 'GPA排名', '總人數']
+
+
+class ReadWriteLock:
+    """讀寫鎖：多個讀取可同時進行，寫入時獨佔
+
+    有寫入在等待時，新的讀取先等候，避免大量讀取讓寫入一直無法進行。
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writing = False
+        self.waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self.condition:
+            while self.writing or self.waiting_writers:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if self.readers == 0:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self.condition:
+            self.waiting_writers += 1
+            while self.writing or self.readers:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
+class ApiError(Exception):
+    """回傳給用戶端的錯誤（HTTP 狀態碼與訊息）"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def json_value(value):
+    """numpy 純量轉為 Python 值，NaN 轉為 null"""
+    if isinstance(value, np.float32):
+        value = float(str(value))  # 最短的十進位表示
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def records(df, columns):
+    """DataFrame 轉為 JSON 可用的 [{欄位: 值}, ...]"""
+    columns = [column for column in columns if column in df.columns]
+    return [{column: json_value(value) for column, value in zip(columns, row)}
+            for row in exact_values(df[columns]).itertuples(index=False, name=None)]
+
+
+class GradeServer(ThreadingHTTPServer):
+    """以 HTTP/JSON 提供 DataManager 的查詢與成績修改
+
+    每個連線一個執行緒；查詢在讀取鎖中同時進行，修改成績在寫入鎖中依序進行。
+    登入後取得 token，之後的要求以 `Authorization: Bearer <token>` 帶入；
+    token 在 SESSION_TTL 秒後過期，也可以 POST /logout 提前作廢。
+    """
+
+    daemon_threads = True
+    # 大量用戶端同時連線時，預設的 5 太小
+    request_queue_size = 1024
+
+    def __init__(self, address, datas):
+        super().__init__(address, RequestHandler)
+        self.datas = datas
+        self.lock = ReadWriteLock()
+        # token -> (角色, 學號或教師姓名, 登入時間)，依登入先後排列，過期的都在前面
+        self.sessions = OrderedDict()
+        self.sessions_lock = threading.Lock()
+
+    def login(self, body):
+        role, account, password = body.get('role'), body.get('account'), body.get('password')
+        if role not in ('student', 'teacher') or not account or not password:
+            raise ApiError(400, "需要 role（student 或 teacher）、account 與 password")
+        # 帳號資料不會改變，驗證密碼不需要鎖
+        accounts = self.datas.student_accounts if role == 'student' else self.datas.teacher_accounts
+        name = accounts.verify(account, password)
+        if name is None:
+            raise ApiError(401, "帳號或密碼錯誤")
+        token = secrets.token_urlsafe(24)
+        # 學生以學號查詢，教師以姓名查詢（與畫面相同）
+        with self.sessions_lock:
+            self.evict_sessions()
+            self.sessions[token] = (role, account if role == 'student' else name, time.monotonic())
+        return {'token': token, 'name': name}
+
+    def evict_sessions(self):
+        """（須持有 sessions_lock）由最早登入的開始移除過期的 token，每個 token 只會被移除一次"""
+        deadline = time.monotonic() - SESSION_TTL
+        while self.sessions:
+            token, (_, _, issued) = next(iter(self.sessions.items()))
+            if issued > deadline:
+                break
+            del self.sessions[token]
+
+    def session(self, token):
+        """token 對應的 (角色, 學號或教師姓名)，不存在或已過期時回傳 None"""
+        with self.sessions_lock:
+            self.evict_sessions()
+            entry = self.sessions.get(token)
+        return entry[:2] if entry is not None else None
+
+    def logout(self, token):
+        with self.sessions_lock:
+            self.sessions.pop(token, None)
+        return {}
+
+    def check_student(self, session, student_id):
+        role, user = session
+        if role == 'student' and user != student_id:
+            raise ApiError(403, "只能查詢自己的成績")
+
+    def check_course(self, session, course_id):
+        """學生只能查詢有修的課程，教師只能查詢自己的課程"""
+        role, user = session
+        rows = self.datas.course_rows(course_id)
+        if rows.empty:
+            raise ApiError(404, f"找不到課程 {course_id}")
+        if role == 'teacher' and (rows['教師'] != user).all():
+            raise ApiError(403, "只能查詢自己的課程")
+        if role == 'student' and (rows['學號'] != user).all():
+            raise ApiError(403, "只能查詢自己修的課程")
+        return rows
+
+    def student_courses(self, session, student_id):
+        self.check_student(session, student_id)
+        with self.lock.read():
+            return {'學號': student_id, 'courses': records(self.datas.student_rows(student_id), STUDENT_COLUMNS)}
+
+    def roster(self, session, course_id, query):
+        column = query.get('sort', '總成績')
+        if column not in self.datas.SORT_COLUMNS:
+            raise ApiError(400, f"無法依 {column} 排序")
+        ascending = query.get('order', 'asc' if column == '學號' else 'desc') == 'asc'
+        keys = [(column, ascending)] + ([('學號', True)] if column != '學號' else [])
+        with self.lock.read():
+            self.check_course(session, course_id)
+            return {'課程代碼': course_id, 'students': records(self.datas.sorted_course_rows(course_id, keys),
+                                                            ROSTER_COLUMNS)}
+
+    def stats(self, session, course_id):
+        from course_reports import course_summary
+        with self.lock.read():
+            self.check_course(session, course_id)
+            summary = course_summary(self.datas, course_id)
+        return {'課程代碼': course_id,
+                '統計': {column: {name: json_value(value) for name, value in values.items()}
+                       for column, values in summary.items()}}
+
+    def update_grades(self, session, course_id, body):
+        """body 為 {學號, 期中考, 期末考, 平時成績}，或 {"grades": [...]} 一次修改多位學生"""
+        if session[0] != 'teacher':
+            raise ApiError(403, "只有教師可以修改成績")
+        grades = body.get('grades', [body])
+        try:
+            grades = [(str(grade['學號']), *(float(grade[column]) for column in SCORE_COLUMNS))
+                      for grade in grades]
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "每筆成績需要學號、期中考、期末考與平時成績（數字）")
+        if any(not 0 <= score <= 100 for grade in grades for score in grade[1:]):
+            raise ApiError(400, "成績必須介於 0 到 100")
+        with self.lock.write():
+            rows = self.check_course(session, course_id)
+            missing = {student_id for student_id, *_ in grades} - set(rows['學號'])
+            if missing:
+                raise ApiError(404, f"課程 {course_id} 中找不到學號 {', '.join(sorted(missing))}")
+            if len(grades) == 1:
+                student_id, midterm, final, casual = grades[0]
+                self.datas.update_grades(student_id, course_id, midterm, final, casual)
+                conflicts = self.datas.save_grades([(student_id, course_id)])
+            else:
+                # 多筆時與匯入成績相同：一次更新、一次重算、一次寫入日誌
+                changes = pd.DataFrame(grades, columns=['學號', *SCORE_COLUMNS])
+                conflicts = self.datas.import_grades(course_id, changes.drop_duplicates('學號', keep='last'))
+        # 其他程式（例如桌面版）同時修改了相同的成績時，列出以此次要求的值覆蓋的格子
+        return {'updated': len(grades), 'conflicts': [str(conflict) for conflict in conflicts]}
+
+    def watch_files(self, interval=WATCH_INTERVAL):
+        """背景執行緒：資料檔被其他程式修改時，讀取與比對只需讀取鎖，套用差異時才取得寫入鎖"""
+        watcher = FileWatcher(self.datas.watched_paths())
+        while True:
+            time.sleep(interval)
+            changed = watcher.changed()
+            if not changed:
+                continue
+            try:
+                with self.lock.read():
+                    courses_file = self.datas.read_courses_file(changed)
+                with self.lock.write():
+                    self.datas.reload_changed(changed, courses_file)
+            except Exception as e:
+                print(f"重新載入資料失敗：{e}")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """不逐筆輸出存取紀錄（壓力測試時會拖慢伺服器）"""
+
+    def do_GET(self):
+        self.handle_api('GET')
+
+    def do_POST(self):
+        self.handle_api('POST')
+
+    def handle_api(self, method):
+        try:
+            url = urlsplit(self.path)
+            parts = [unquote(part) for part in url.path.strip('/').split('/')]
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            body = self.read_body() if method == 'POST' else {}
+            self.send_json(200, self.route(method, parts, query, body))
+        except ApiError as e:
+            self.send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            self.send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def route(self, method, parts, query, body):
+        server = self.server
+        if method == 'POST' and parts == ['login']:
+            return server.login(body)
+        token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+        session = server.session(token)
+        if session is None:
+            raise ApiError(401, "請先登入")
+        if method == 'POST' and parts == ['logout']:
+            return server.logout(token)
+        if method == 'GET' and len(parts) == 3 and parts[0] == 'students' and parts[2] == 'courses':
+            return server.student_courses(session, parts[1])
+        if len(parts) == 3 and parts[0] == 'courses':
+            if method == 'GET' and parts[2] == 'roster':
+                return server.roster(session, parts[1], query)
+            if method == 'GET' and parts[2] == 'stats':
+                return server.stats(session, parts[1])
+            if method == 'POST' and parts[2] == 'grades':
+                return server.update_grades(session, parts[1], body)
+        raise ApiError(404, "沒有這個 API")
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(400, "內容不是 JSON")
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以本機 HTTP/JSON 服務提供成績查詢與修改")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    from data_manager import DataManager
+    datas = DataManager()
+    server = GradeServer((args.host, args.port), datas)
+    threading.Thread(target=server.watch_files, daemon=True).start()
+    print(f"成績服務：http://{args.host}:{args.port}（Ctrl+C 結束）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with server.lock.write():
+            datas.compact()  # 將成績修改日誌併回 CSV
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import argparse
+import csv
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from credentials import (DEFAULT_ITERATIONS, HASH_COLUMN, PLAIN_COLUMN,
+                         STUDENT_DATA_PATH, TEACHER_DATA_PATH, hash_iterations, hash_password,
+                         verify_password)
+from course_stats import STATS_COLUMNS, CourseStats
+from data_manager import DataManager, exact_values
+
+DATABASE_PATH = os.path.join('save_data', 'grades.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS students (
+    學號 TEXT PRIMARY KEY,
+    姓名 TEXT NOT NULL,
+    密碼雜湊 TEXT
+);
+CREATE TABLE IF NOT EXISTS teachers (
+    帳號 TEXT PRIMARY KEY,
+    姓名 TEXT NOT NULL,
+    密碼雜湊 TEXT
+);
+CREATE TABLE IF NOT EXISTS courses (
+    課程代碼 TEXT PRIMARY KEY,
+    課程名稱 TEXT NOT NULL,
+    學分 INTEGER NOT NULL,
+    教師 TEXT  -- 與 DataManager 相同，空白的教師為空值（NULL）
+);
+CREATE TABLE IF NOT EXISTS enrollments (
+    序號 INTEGER PRIMARY KEY,
+    學號 TEXT NOT NULL REFERENCES students(學號),
+    課程代碼 TEXT NOT NULL REFERENCES courses(課程代碼),
+    期中考 REAL,
+    期末考 REAL,
+    平時成績 REAL,
+    總成績 REAL,
+    GPA REAL,
+    UNIQUE (學號, 課程代碼)
+);
+CREATE INDEX IF NOT EXISTS idx_enrollments_student ON enrollments(學號);
+CREATE INDEX IF NOT EXISTS idx_enrollments_course ON enrollments(課程代碼);
+CREATE INDEX IF NOT EXISTS idx_courses_teacher ON courses(教師);
+CREATE INDEX IF NOT EXISTS idx_courses_name ON courses(課程名稱);
+CREATE INDEX IF NOT EXISTS idx_students_name ON students(姓名);
+'''
+
+# 與 DataManager.add_column 相同的排名規則：分數高者在前，同分同名次（method='min'）
+RANKED_QUERY = '''
+WITH scope AS (
+    SELECT e.序號, e.學號, e.課程代碼, c.課程名稱, c.學分, c.教師,
+           e.期中考, e.期末考, e.平時成績, e.總成績, e.GPA
+    FROM enrollments e JOIN courses c ON c.課程代碼 = e.課程代碼
+    WHERE c.課程名稱 IN (SELECT 課程名稱 FROM courses WHERE {course_filter})
+), ranked AS (
+    SELECT scope.*,
+           RANK() OVER (PARTITION BY 課程代碼 ORDER BY 期中考 DESC) AS 期中考排名,
+           RANK() OVER (PARTITION BY 課程代碼 ORDER BY 期末考 DESC) AS 期末考排名,
+           RANK() OVER (PARTITION BY 課程代碼 ORDER BY 平時成績 DESC) AS 平時成績排名,
+           RANK() OVER (PARTITION BY 課程代碼 ORDER BY 總成績 DESC) AS 總排名,
+           COUNT(*) OVER (PARTITION BY 課程代碼) AS 總人數,
+           RANK() OVER (PARTITION BY 課程名稱 ORDER BY GPA DESC) AS GPA排名
+    FROM scope
+)
+SELECT r.學號, s.姓名, r.課程代碼, r.課程名稱, r.學分, r.教師,
+       r.期中考, r.期末考, r.平時成績, r.總成績, r.GPA,
+       r.期中考排名, r.期末考排名, r.平時成績排名, r.總排名, r.總人數,
+       r.總排名 AS 總成績排名, r.GPA排名
+FROM ranked r JOIN students s ON s.學號 = r.學號
+WHERE {row_filter}
+ORDER BY r.序號
+'''
+
+
+class SqliteCredentialStore:
+    """以資料庫查詢帳號（主鍵索引），介面與 CredentialStore 相同"""
+
+    def __init__(self, conn, table, account_column):
+        self.conn = conn
+        self.query = f'SELECT 姓名, 密碼雜湊 FROM {table} WHERE {account_column} = ?'
+        self.sample_query = f'SELECT 密碼雜湊 FROM {table} WHERE 密碼雜湊 IS NOT NULL LIMIT 1'
+        self._dummy_hash = None
+
+    @property
+    def iterations(self):
+        """資料庫中雜湊的迭代次數（以第一筆為準），與 CredentialStore.iterations 相同"""
+        row = self.conn.execute(self.sample_query).fetchone()
+        return hash_iterations(row[0]) if row else DEFAULT_ITERATIONS
+
+    def verify(self, account, password):
+        """驗證帳號密碼，成功時回傳姓名，失敗回傳 None"""
+        row = self.conn.execute(self.query, (account,)).fetchone()
+        if row is None or not row[1]:
+            # 帳號不存在時以資料庫相同的成本計算一次雜湊，避免由回應時間判斷帳號是否存在
+            if self._dummy_hash is None:
+                self._dummy_hash = hash_password('', iterations=self.iterations)
+            verify_password(password, self._dummy_hash)
+            return None
+        name, encoded = row
+        return name if verify_password(password, encoded) else None
+
+
+class SqliteDataManager(DataManager):
+    """以 sqlite3 保存資料的 DataManager
+
+    不把整張選課表載入記憶體：查詢使用索引，排名與統計由 SQL 視窗函式計算，
+    教師修改成績是交易中的單列 UPDATE。提供畫面使用的同一組查詢介面。
+    """
+
+    def __init__(self, path=DATABASE_PATH, gpa_table=None):
+        self.set_gpa_table(gpa_table or self.GPA_TABLE)
+        self.path = path
+        # 在背景執行緒開啟後交給主執行緒使用，同一時間只有一個執行緒存取
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+        self.versions = {}
+        self.course_stats = CourseStats(self)
+        self.student_accounts = SqliteCredentialStore(self.conn, 'students', '學號')
+        self.teacher_accounts = SqliteCredentialStore(self.conn, 'teachers', '帳號')
+
+    def query_ranked(self, course_filter, row_filter, params):
+        """查詢含衍生欄位的資料列；course_filter 決定需要計算排名的課程範圍"""
+        sql = RANKED_QUERY.format(course_filter=course_filter, row_filter=row_filter)
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def student_rows(self, student_id):
+        """學生所有修課紀錄"""
+        return self.query_ranked(
+            '課程代碼 IN (SELECT 課程代碼 FROM enrollments WHERE 學號 = ?)', 'r.學號 = ?',
+            (student_id, student_id))
+
+    def course_rows(self, course_id):
+        """課程所有學生的資料"""
+        return self.query_ranked('課程代碼 = ?', 'r.課程代碼 = ?', (course_id, course_id))
+
+    def teacher_rows(self, teacher_name):
+        """教師所有課程的資料"""
+        teacher_name = str(teacher_name).strip()
+        return self.query_ranked('教師 = ?', 'r.教師 = ?', (teacher_name, teacher_name))
+
+    def enrollment(self, student_id, course_id):
+        """取得學生在某課程的資料列，未修課時回傳 None"""
+        rows = self.query_ranked('課程代碼 = ?', 'r.課程代碼 = ? AND r.學號 = ?',
+                                 (course_id, course_id, student_id))
+        if rows.empty:
+            return None
+        return rows.iloc[0]
+
+    def find_course_students(self, course_id, name_or_id):
+        """在課程中以學號或姓名尋找學生；姓名可能重複，因此可能回傳多筆"""
+        rows = self.query_ranked('課程代碼 = ?', 'r.課程代碼 = ? AND r.學號 = ?',
+                                 (course_id, course_id, name_or_id))
+        if rows.empty:
+            rows = self.query_ranked('課程代碼 = ?', 'r.課程代碼 = ? AND s.姓名 = ?',
+                                     (course_id, course_id, name_or_id))
+        return rows
+
+    def course_order(self, course_id, keys):
+        """課程內依 keys 排序的列順序；資料庫沒有預先排序的順序，以查詢結果排序"""
+        return self.order_rows(self.course_rows(course_id), keys)
+
+    def sorted_course_rows(self, course_id, keys):
+        """依 keys 排序的課程資料"""
+        rows = self.course_rows(course_id)
+        return rows.iloc[self.order_rows(rows, keys)]
+
+    @staticmethod
+    def order_rows(rows, keys):
+        ranks = [rows[column].rank(method='dense', ascending=ascending).to_numpy()
+                 for column, ascending in reversed(keys)]
+        return np.lexsort(ranks)
+
+    def update_grades(self, student_id, course_id, midterm, final, casual):
+        """在交易中更新單一修課紀錄；總成績與 GPA 與 add_column 使用相同算式"""
+        total = self.total_score(pd.Series([midterm]), pd.Series([final]), pd.Series([casual]))
+        gpa = self.grade_to_GPA(total.iloc[0])
+        columns = ', '.join(STATS_COLUMNS)
+        old_row = self.conn.execute(f'SELECT {columns} FROM enrollments WHERE 學號 = ? AND 課程代碼 = ?',
+                                    (student_id, course_id)).fetchone()
+        with self.conn:
+            cursor = self.conn.execute(
+                'UPDATE enrollments SET 期中考 = ?, 期末考 = ?, 平時成績 = ?, 總成績 = ?, GPA = ? '
+                'WHERE 學號 = ? AND 課程代碼 = ?',
+                (midterm, final, casual, float(total.iloc[0]), gpa, student_id, course_id))
+        if cursor.rowcount == 0:
+            raise KeyError(f"課程 {course_id} 中找不到學號 {student_id}")
+        self.course_stats.update(course_id, dict(zip(STATS_COLUMNS, old_row)),
+                                 dict(zip(STATS_COLUMNS, (midterm, final, casual, float(total.iloc[0])))))
+        self.bump_versions(self.related_courses(course_id))
+
+    def import_grades(self, course_id, changes):
+        """在一個交易中整批更新一門課程的成績；總成績與 GPA 以整欄運算"""
+        total = self.total_score(changes['期中考'].astype(float), changes['期末考'].astype(float),
+                                 changes['平時成績'].astype(float))
+        gpa = self.grades_to_GPA(total)
+        params = zip(changes['期中考'].astype(float), changes['期末考'].astype(float),
+                     changes['平時成績'].astype(float), total.astype(float), gpa.astype(float),
+                     changes['學號'].astype(str), [course_id] * len(changes))
+        with self.conn:
+            cursor = self.conn.executemany(
+                'UPDATE enrollments SET 期中考 = ?, 期末考 = ?, 平時成績 = ?, 總成績 = ?, GPA = ? '
+                'WHERE 學號 = ? AND 課程代碼 = ?', params)
+            if cursor.rowcount != len(changes):
+                # 交易回復，不留下部分更新
+                raise KeyError(f"課程 {course_id} 中有 {len(changes) - cursor.rowcount} 位學生找不到")
+        self.course_stats.discard(course_id)
+        self.bump_versions(self.related_courses(course_id))
+        return []  # 資料庫的交易已處理多個程式同時寫入，不會有衝突
+
+    def related_courses(self, course_id):
+        """與課程同名的所有課程"""
+        rows = self.conn.execute(
+            'SELECT 課程代碼 FROM courses WHERE 課程名稱 = '
+            '(SELECT 課程名稱 FROM courses WHERE 課程代碼 = ?)', (course_id,)).fetchall()
+        return [row[0] for row in rows] or [course_id]
+
+    def save_grades(self, enrollments):
+        """update_grades 已在交易中寫入資料庫，不需另外儲存"""
+        return []
+
+    def compact(self, background=False):
+        """資料庫不需要壓縮日誌"""
+
+    def watched_paths(self):
+        """資料與帳號都在資料庫中，其他程式的修改由交易處理，不需監看檔案"""
+        return []
+
+
+def read_accounts(path, account_column, iterations):
+    """讀取帳號檔，回傳 (帳號, 姓名, 密碼雜湊)；明文密碼在此轉換為雜湊"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            encoded = row.get(HASH_COLUMN) or hash_password(row[PLAIN_COLUMN], iterations)
+            yield row[account_column], row['姓名'], encoded
+
+
+def migrate(path=DATABASE_PATH, iterations=DEFAULT_ITERATIONS):
+    """將 save_data 的 CSV（含尚未壓縮的成績日誌）匯入資料庫"""
+    df = DataManager().all_courses_data
+    if os.path.exists(path):
+        os.remove(path)
+    manager = SqliteDataManager(path)
+    conn = manager.conn
+    with conn:
+        conn.executemany('INSERT OR IGNORE INTO students (學號, 姓名, 密碼雜湊) VALUES (?, ?, ?)',
+                         read_accounts(STUDENT_DATA_PATH, '學號', iterations))
+        # 選課資料中的學生姓名以選課資料為準，不在帳號檔中的學生沒有密碼
+        conn.executemany('INSERT INTO students (學號, 姓名) VALUES (?, ?) '
+                         'ON CONFLICT(學號) DO UPDATE SET 姓名 = excluded.姓名',
+                         df[['學號', '姓名']].drop_duplicates('學號').itertuples(index=False))
+        conn.executemany('INSERT INTO teachers (帳號, 姓名, 密碼雜湊) VALUES (?, ?, ?)',
+                         read_accounts(TEACHER_DATA_PATH, '帳號', iterations))
+        courses = df[['課程代碼', '課程名稱', '學分', '教師']].drop_duplicates('課程代碼')
+        conn.executemany('INSERT INTO courses (課程代碼, 課程名稱, 學分, 教師) VALUES (?, ?, ?, ?)',
+                         ((c, n, int(credit), None if pd.isna(t) else t)
+                          for c, n, credit, t in courses.itertuples(index=False)))
+        # float32 欄位以最短的十進位值寫入，與 update_grades 寫入的值相同（排名比較同分時才一致）
+        enrollments = exact_values(df[['學號', '課程代碼', '期中考', '期末考', '平時成績', '總成績', 'GPA']])
+        conn.executemany('INSERT INTO enrollments (學號, 課程代碼, 期中考, 期末考, 平時成績, 總成績, GPA) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         ((s, c, float(m), float(f), float(p), float(t), float(g))
+                          for s, c, m, f, p, t, g in enrollments.itertuples(index=False)))
+    return len(df)
+
+
+def check_parity(path=DATABASE_PATH, edits=20, seed=42):
+    """比對資料庫查詢結果與 DataManager.add_column 的結果，並隨機修改成績後再比對一次"""
+    manager = DataManager()
+    # 複製到記憶體中的資料庫再修改，不影響資料庫檔案
+    sqlite_manager = SqliteDataManager(':memory:')
+    source = sqlite3.connect(path)
+    source.backup(sqlite_manager.conn)
+    source.close()
+    rng = np.random.default_rng(seed)
+
+    def compare(course_ids):
+        for course_id in course_ids:
+            # DataManager 的字串欄位以 Categorical 保存，資料庫查詢結果為一般字串（全為 NULL 時為 object）；
+            # 兩邊都轉為字串型別再比較，空值維持空值
+            as_str = {column: str for column in manager.CATEGORY_COLUMNS}
+            expected = manager.course_rows(course_id).reset_index(drop=True).astype(as_str)
+            actual = sqlite_manager.course_rows(course_id).astype(as_str)
+            pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+
+    course_ids = manager.all_courses_data['課程代碼'].unique()
+    compare(course_ids)
+    touched = []
+    for row in rng.choice(len(manager.all_courses_data), size=edits, replace=False):
+        record = manager.all_courses_data.iloc[row]
+        scores = rng.integers(0, 101, size=3).tolist()
+        manager.update_grades(record['學號'], record['課程代碼'], *scores)
+        sqlite_manager.update_grades(record['學號'], record['課程代碼'], *scores)
+        touched.append(record['課程代碼'])
+    compare(touched)
+    return len(course_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 資料庫工具")
+    parser.add_argument('--db', default=DATABASE_PATH, help="資料庫檔案")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help="由 save_data 的 CSV 建立資料庫")
+    migrate_parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                                help="明文密碼轉換為雜湊時的 PBKDF2 迭代次數")
+    subparsers.add_parser('parity', help="比對資料庫與 DataManager 的計算結果（不會寫入資料庫）")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        count = migrate(args.db, args.iterations)
+        print(f"已匯入 {count} 筆選課資料到 {args.db}")
+    elif args.command == 'parity':
+        count = check_parity(args.db)
+        print(f"{count} 門課程的資料與排名皆與 DataManager 相同")
+
+
+if __name__ == "__main__":
+    main()
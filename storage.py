@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# 快取格式版本，格式改變時遞增以使舊快取失效
+CACHE_FORMAT = 2
+
+
+def remap_codes(remap, row_codes):
+    """依 remap 轉換鍵編號，空值的編號 -1 維持 -1（不可直接索引，否則會對應到最後一個鍵）"""
+    row_codes = np.asarray(row_codes)
+    return np.where(row_codes >= 0, remap[row_codes], -1)
+
+
+class PositionIndex:
+    """鍵 -> 列位置 的索引
+
+    以 CSR 方式保存：order 為依鍵排序後的列位置，offsets[i]:offsets[i + 1] 為第 i 個鍵
+    在 order 中的範圍；row_codes 為每一列的鍵編號。三者皆為 numpy 陣列，可直接寫入快取。
+    keys 依字串順序排列，因此 row_codes 可直接作為排序鍵，也可作為 Categorical 的編號。
+    空值（NaN）的列編號為 -1（與 Categorical 相同），不在 order 中，也查詢不到。
+    """
+
+    def __init__(self, keys, row_codes, order, offsets):
+        self.keys = keys
+        self.row_codes = row_codes
+        self.order = order
+        self.offsets = offsets
+        self.codes = {key: i for i, key in enumerate(keys)}
+
+    @classmethod
+    def build(cls, values):
+        """由一整欄的值建立索引"""
+        row_codes, keys = pd.factorize(values)
+        # 只排序不重複的鍵並重新編號；以定長字串陣列排序比 factorize(sort=True) 排序物件快
+        keys = np.asarray(keys, dtype=object)
+        order = np.argsort(keys.astype(str), kind='stable')
+        remap = np.empty(len(keys), dtype=np.int32)
+        remap[order] = np.arange(len(keys), dtype=np.int32)
+        return cls.from_codes(list(keys[order]), remap_codes(remap, row_codes).astype(np.int32))
+
+    @classmethod
+    def from_codes(cls, keys, row_codes):
+        """由鍵編號建立索引（鍵編號需介於 -1 與 len(keys) - 1 之間，-1 為空值）"""
+        order = np.argsort(row_codes, kind='stable')
+        # 空值的列排在最前面，不放入 order
+        order = order[np.count_nonzero(row_codes < 0):]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_codes[row_codes >= 0], minlength=len(keys)), out=offsets[1:])
+        return cls(keys, row_codes, order, offsets)
+
+    def take(self, rows, new_values):
+        """保留 rows 的列（依此順序）並在後面接上新的列，回傳新的索引；不需重新對所有值雜湊
+
+        新鍵加入後重新依字串順序編號（只排序不重複的鍵），已沒有任何列的鍵則移除。"""
+        codes = np.asarray(self.row_codes)[rows]
+        added = pd.Index(self.keys).get_indexer(new_values)
+        unknown = (added < 0) & pd.notna(np.asarray(new_values, dtype=object))
+        extra_codes, extra_keys = pd.factorize(np.asarray(new_values, dtype=object)[unknown])
+        added[unknown] = len(self.keys) + extra_codes
+        keys = np.array(list(self.keys) + list(extra_keys), dtype=object)
+        row_codes = np.concatenate([codes, added])
+        # 舊編號 -> 新編號：移除沒有列的鍵，其餘依字串排序
+        used = np.flatnonzero(np.bincount(row_codes[row_codes >= 0], minlength=len(keys)) > 0)
+        used = used[np.argsort(keys[used].astype(str), kind='stable')]
+        remap = np.full(len(keys), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        return self.from_codes(list(keys[used]), remap_codes(remap, row_codes).astype(np.int32))
+
+    def code(self, key):
+        """鍵的編號，不存在時回傳 -1"""
+        return self.codes.get(key, -1)
+
+    def get(self, key):
+        """符合鍵的列位置（依列的先後排序），找不到時回傳空陣列"""
+        i = self.codes.get(key)
+        if i is None:
+            return np.empty(0, dtype=np.intp)
+        return self.order[self.offsets[i]:self.offsets[i + 1]]
+
+    def __contains__(self, key):
+        return key in self.codes
+
+
+class CsvStorage:
+    """以 CSV 保存基底欄位（原本的格式），衍生欄位於載入後重新計算"""
+
+    def __init__(self, path, derived_columns=()):
+        self.path = path
+        self.derived_columns = list(derived_columns)
+
+    def load(self):
+        """讀取資料，回傳 (DataFrame, 索引, 課程內排序)；CSV 不含衍生欄位與索引，後兩者回傳 None"""
+        return self.read_csv(), None, None
+
+    def read_csv(self):
+        """讀取 CSV 的基底欄位"""
+        return pd.read_csv(self.path, encoding='utf-8-sig', dtype={'學號': str})
+
+    def is_fresh(self):
+        """CSV 是否由本系統寫入；沒有快取記錄可比對，一律視為可能被外部修改"""
+        return False
+
+    def save(self, df, indexes=None, sort_orders=None):
+        """完整寫出基底欄位（不含衍生欄位）：先寫入暫存檔並 fsync，再取代原檔"""
+        df = df.drop(columns=self.derived_columns, errors='ignore')
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def write_cache(self, df, indexes, sort_orders=None):
+        """CSV 沒有快取，不需處理"""
+
+
+class ColumnarStorage(CsvStorage):
+    """欄位式二進位快取：每個欄位一個 .npy 檔，開啟時以 memory map 讀取
+
+    CSV 仍是匯入與匯出的格式；快取記錄來源 CSV 的修改時間與大小，
+    CSV 被外部修改後快取即視為過期，改由 CSV 重新匯入。
+    快取同時保存衍生欄位、查詢索引與課程內的排序，載入時不需重新計算。
+    每次寫入快取都使用新的子目錄，最後才替換 meta.json，
+    因此正在被 memory map 的舊檔案不會被覆寫（Windows 無法刪除開啟中的檔案）。
+    """
+
+    def __init__(self, path, cache_dir, derived_columns=()):
+        super().__init__(path, derived_columns)
+        self.cache_dir = cache_dir
+        self.meta_path = os.path.join(cache_dir, 'meta.json')
+
+    def source_signature(self):
+        stat = os.stat(self.path)
+        return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+    def read_meta(self):
+        """讀取快取資訊，快取不存在、格式不符或已過期時回傳 None"""
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('format') != CACHE_FORMAT or meta.get('source') != self.source_signature():
+            return None
+        return meta
+
+    def is_fresh(self):
+        """快取與 CSV 一致：CSV 是由本系統寫入，而不是被外部程式修改"""
+        return self.read_meta() is not None
+
+    def load(self):
+        meta = self.read_meta()
+        if meta is None:
+            return super().load()
+        data_dir = os.path.join(self.cache_dir, meta['dir'])
+
+        def load_array(file_name, mode):
+            # 以一般 ndarray 檢視 memmap，避免 memmap 類別出現在 DataFrame 中
+            return np.asarray(np.load(os.path.join(data_dir, file_name), mmap_mode=mode))
+
+        columns = {}
+        for column in meta['columns']:
+            # mmap_mode='c'：共用檔案頁面，寫入時才複製，不會改到快取檔
+            values = load_array(column['file'], 'c')
+            if column['kind'] in ('category', 'string'):
+                keys = column['keys'] if 'keys' in column else meta['indexes'][column['index']]['keys']
+                if column['kind'] == 'category':
+                    # 直接以保存的編號建立 Categorical，不需展開成每列一個字串
+                    values = pd.Categorical.from_codes(values, categories=keys)
+                else:
+                    # 編號 -1 為空值
+                    values = np.array(keys + [None], dtype=object)[values]
+            columns[column['name']] = values
+        df = pd.DataFrame(columns, copy=False)
+        indexes = {}
+        for name, index in meta['indexes'].items():
+            indexes[name] = PositionIndex(index['keys'], load_array(index['row_codes'], 'r'),
+                                          load_array(index['order'], 'r'), load_array(index['offsets'], 'r'))
+        # 排序會隨成績修改而原地更新，以寫入時複製的方式開啟；舊快取沒有排序時回傳 None
+        sort_orders = None
+        if 'sort_orders' in meta:
+            sort_orders = {name: load_array(file_name, 'c') for name, file_name in meta['sort_orders'].items()}
+        return df, indexes, sort_orders
+
+    def save(self, df, indexes=None, sort_orders=None):
+        """匯出基底欄位到 CSV，並將完整資料（含衍生欄位、索引與排序）寫入快取"""
+        super().save(df)
+        self.write_cache(df, indexes or {}, sort_orders)
+
+    def write_cache(self, df, indexes, sort_orders=None):
+        data_name = f'data-{time.time_ns()}'
+        data_dir = os.path.join(self.cache_dir, data_name)
+        os.makedirs(data_dir, exist_ok=True)
+        meta = {'format': CACHE_FORMAT, 'dir': data_name, 'rows': len(df), 'columns': [], 'indexes': {}}
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            entry = {'name': name, 'file': f'column{i}.npy'}
+            if series.dtype.kind in 'biuf':
+                values = series.to_numpy()
+                entry['kind'] = 'numeric'
+            else:
+                # 字串欄位以編號保存，鍵清單記在 meta.json（有索引的欄位共用索引的鍵清單）；
+                # 載入時依原本的型別還原為 Categorical 或字串
+                entry['kind'] = 'category' if isinstance(series.dtype, pd.CategoricalDtype) else 'string'
+                index = indexes.get(name)
+                if index is not None:
+                    values = index.row_codes
+                    entry['index'] = name
+                else:
+                    # 空值的編號為 -1，載入時還原為空值
+                    values, keys = pd.factorize(series)
+                    entry['keys'] = [str(key) for key in keys]
+            np.save(os.path.join(data_dir, entry['file']), np.asarray(values))
+            meta['columns'].append(entry)
+        for i, (name, index) in enumerate(indexes.items()):
+            entry = {'keys': [str(key) for key in index.keys]}
+            for part in ('row_codes', 'order', 'offsets'):
+                entry[part] = f'index{i}_{part}.npy'
+                np.save(os.path.join(data_dir, entry[part]), np.asarray(getattr(index, part)))
+            meta['indexes'][name] = entry
+        if sort_orders is not None:
+            meta['sort_orders'] = {}
+            for i, (name, orders) in enumerate(sort_orders.items()):
+                meta['sort_orders'][name] = f'sort{i}.npy'
+                np.save(os.path.join(data_dir, f'sort{i}.npy'), np.asarray(orders))
+
+        # 記錄來源 CSV 的狀態，最後替換 meta.json 表示新快取完整可用
+        meta['source'] = self.source_signature()
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+        # 刪除舊的快取資料，仍被開啟的檔案留待下次再刪
+        for name in os.listdir(self.cache_dir):
+            if name.startswith('data-') and name != data_name:
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+# 成績單使用的欄位（與學生畫面的「所有課程」表格與圖表相同）
+TRANSCRIPT_COLUMNS = ['課程名稱', '學分', '期中考', '期末考', '平時成績', '總成績', 'GPA']
+MANIFEST_NAME = 'manifest.jsonl'
+# 每次交給工作行程的學生數，減少行程間往返的次數
+DEFAULT_CHUNKSIZE = 8
+
+# 工作行程中重複使用的 Figure（由 init_worker 建立）
+figures = None
+
+
+def init_worker():
+    """工作行程初始化：載入繪圖模組，每個行程只保留一個 Agg Figure"""
+    global figures
+    import rendering
+    figures = rendering.FigureManager(pool_size=1)
+
+
+def transcript_path(output_dir, student_id, file_format):
+    return os.path.join(output_dir, f"{student_id}.{file_format}")
+
+
+def render_transcript(task):
+    """工作行程：繪製一位學生的成績單（所有課程的表格與長條圖），回傳 (學號, 檔名)"""
+    import rendering
+    student_id, student_name, rows, output_dir, file_format = task
+    path = transcript_path(output_dir, student_id, file_format)
+    temp_path = path + '.tmp'
+    if file_format == 'pdf':
+        # 表格與圖表各一頁
+        from matplotlib.backends.backend_pdf import PdfPages
+        with PdfPages(temp_path, metadata={'Title': f"{student_id} {student_name} 成績單"}) as pdf:
+            for draw in (rendering.all_courses_table, rendering.all_courses_chart):
+                fig = draw(figures, rows)
+                try:
+                    pdf.savefig(fig)
+                finally:
+                    figures.release(fig)
+    else:
+        # 表格在上、圖表在下，合成一張 PNG
+        from PIL import Image
+        images = [figures.rasterize(draw(figures, rows))
+                  for draw in (rendering.all_courses_table, rendering.all_courses_chart)]
+        width = max(image.width for image in images)
+        page = Image.new('RGB', (width, sum(image.height for image in images)), 'white')
+        y = 0
+        for image in images:
+            page.paste(image, ((width - image.width) // 2, y), image)
+            y += image.height
+        page.save(temp_path, format='PNG')
+    # 寫完才改名，中斷時不會留下不完整的檔案
+    os.replace(temp_path, path)
+    return student_id, os.path.basename(path)
+
+
+def read_manifest(output_dir, file_format):
+    """已完成的學號（同格式且檔案仍存在者），中斷後重新執行時略過"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 中斷時寫到一半的行
+            file_name = record['file']
+            if file_name.endswith('.' + file_format) and os.path.exists(os.path.join(output_dir, file_name)):
+                done.add(record['學號'])
+    return done
+
+
+def make_tasks(datas, output_dir, file_format, student_ids=None):
+    """依學號分組，每位學生一個工作（只傳送成績單需要的欄位）"""
+    df = datas.all_courses_data
+    if student_ids is not None:
+        df = df[df['學號'].isin(student_ids)]
+    # 課程名稱為 Categorical，每個工作都會帶上全部課程的鍵清單，先轉回字串
+    df = df.astype({'課程名稱': str})
+    for student_id, rows in df.groupby('學號', sort=True):
+        yield (student_id, rows['姓名'].iat[0], rows[TRANSCRIPT_COLUMNS].reset_index(drop=True),
+               output_dir, file_format)
+
+
+def generate(datas, output_dir, file_format='png', workers=None, student_ids=None, restart=False,
+             chunksize=DEFAULT_CHUNKSIZE):
+    """以行程池產生成績單；每完成一位即寫入 manifest，回傳 (本次產生數, 略過數)"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if restart and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    done = read_manifest(output_dir, file_format)
+    tasks = list(make_tasks(datas, output_dir, file_format, student_ids))
+    skipped = len(tasks)
+    tasks = [task for task in tasks if task[0] not in done]
+    skipped -= len(tasks)
+    if not tasks:
+        return 0, skipped
+
+    workers = workers or os.cpu_count() or 1
+    count = 0
+    start = time.perf_counter()
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+            multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        for student_id, file_name in pool.imap_unordered(render_transcript, tasks, chunksize=chunksize):
+            manifest.write(json.dumps({'學號': student_id, 'file': file_name}, ensure_ascii=False) + '\n')
+            manifest.flush()
+            count += 1
+            if count % 100 == 0 or count == len(tasks):
+                elapsed = time.perf_counter() - start
+                print(f"{count}/{len(tasks)}，每秒 {count / elapsed:.1f} 位")
+    return count, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="不開啟視窗，批次產生每位學生的成績單")
+    parser.add_argument('--output', default='transcripts', help="輸出資料夾")
+    parser.add_argument('--format', choices=('png', 'pdf'), default='png')
+    parser.add_argument('--workers', type=int, default=None, help="工作行程數（預設為 CPU 核心數）")
+    parser.add_argument('--students', nargs='*', help="只產生這些學號的成績單")
+    parser.add_argument('--restart', action='store_true', help="忽略 manifest，全部重新產生")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    from data_manager import DataManager
+    datas = DataManager(load_accounts=False)
+    start = time.perf_counter()
+    count, skipped = generate(datas, args.output, args.format, args.workers, args.students,
+                              args.restart, args.chunksize)
+    print(f"產生 {count} 份成績單（略過已完成的 {skipped} 份），耗時 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import tkinter as tk
+import tkinter.font as tkFont
+
+import numpy as np
+
+
+def format_cell(value):
+    """表格中的顯示文字：整數值的浮點數不顯示小數點"""
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ''
+        if value == int(value):
+            return str(int(value))
+        return f'{value:.2f}'.rstrip('0')
+    return str(value)
+
+
+class VirtualTable(tk.Frame):
+    """只繪製可見列的表格
+
+    畫布上只保留可見列數的文字物件，捲動時改寫文字內容而不新增物件，
+    因此資料有幾千列時捲動與排序的成本仍只與可見列數有關。
+    點選欄位標題依該欄排序，再點一次反向；排序只改變列的順序，不重新建立物件。
+    可編輯的欄位雙擊儲存格即在原處開啟輸入框，修改的值只記錄在 edits 中，不會寫回資料。
+    """
+
+    HEADER_BG = 'lightgray'
+    STRIPE_BG = ('white', '#f2f2f2')
+    EDITED_FG = 'blue'
+
+    def __init__(self, parent, columns, sort_keys=None, sorter=None, on_sort=None, font=None,
+                 editable=(), validate=None, on_edit=None, **kwargs):
+        """columns：顯示的欄位；sort_keys：欄位 -> (排序依據的欄位, 第一次點選時是否遞增)，
+        未列出的欄位依自身的值遞增排序；sorter(排序依據的欄位, 是否遞增)：回傳已排好的列順序，
+        回傳 None 時由表格自行排序；on_sort(column, ascending)：排序後呼叫；
+        editable：可編輯的欄位；validate(text)：輸入時檢查目前的文字，回傳 False 則不接受這次按鍵；
+        on_edit(row, column, value)：儲存格修改後呼叫"""
+        super().__init__(parent, **kwargs)
+        self.columns = list(columns)
+        self.sort_keys = sort_keys or {}
+        self.sorter = sorter
+        self.on_sort = on_sort
+        self.editable = set(editable)
+        self.validate = validate
+        self.on_edit = on_edit
+        self.edits = {}  # (資料列位置, 欄位) -> 修改後的值
+        self.editor = None  # 編輯中的輸入框
+        self.editing = None  # 編輯中的 (資料列位置, 欄位)
+        self.font = font or tkFont.Font(family="Arial", size=14)
+        self.row_height = self.font.metrics('linespace') + 10
+
+        self.values = {}  # 欄位 -> numpy 陣列
+        self.order = np.empty(0, dtype=np.intp)  # 顯示順序 -> 資料列位置
+        self.top = 0  # 最上方可見列在顯示順序中的位置
+        self.sort_column = None
+        self.ascending = True
+        self.slots = []  # 每個可見列的 (底色, [各欄文字物件])
+
+        self.header = tk.Canvas(self, height=self.row_height, bg=self.HEADER_BG, highlightthickness=0)
+        self.body = tk.Canvas(self, bg='white', highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.header.grid(row=0, column=0, sticky=tk.NE+tk.SW)
+        self.body.grid(row=1, column=0, sticky=tk.NE+tk.SW)
+        self.scrollbar.grid(row=0, column=1, rowspan=2, sticky=tk.NS)
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.body.bind('<Configure>', self.on_resize)
+        self.header.bind('<Button-1>', self.on_header_click)
+        self.body.bind('<Double-Button-1>', self.on_double_click)
+        # Windows 與 macOS 使用 MouseWheel，X11 使用 Button-4/5
+        for widget in (self.body, self.header):
+            widget.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1, 'units'))
+            widget.bind('<Button-4>', lambda e: self.scroll(-1, 'units'))
+            widget.bind('<Button-5>', lambda e: self.scroll(1, 'units'))
+
+    def set_data(self, df):
+        """設定表格資料（DataFrame），保留目前的排序方式；尚未儲存的修改一併清除"""
+        self.close_editor()
+        self.edits = {}
+        self.values = {column: df[column].to_numpy() for column in df.columns}
+        self.order = np.arange(len(df))
+        if self.sort_column is not None:
+            self.sort_by(self.sort_column, self.ascending)
+        else:
+            self.top = 0
+            self.refresh()
+
+    def set_column(self, column, values):
+        """更換一個欄位的值（不改變列的順序）"""
+        self.values[column] = np.asarray(values)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.order)
+
+    @property
+    def visible_rows(self):
+        return max(1, self.body.winfo_height() // self.row_height)
+
+    def sort_by(self, column, ascending=None):
+        """依欄位排序；column 為 None 時回到資料原本的順序。同值的列維持原本的先後"""
+        self.finish_edit()
+        key_column, default_ascending = self.sort_keys.get(column, (column, True))
+        if ascending is None:
+            ascending = default_ascending
+        if column is None:
+            self.order = np.arange(len(self.order))
+        else:
+            order = self.sorter(key_column, ascending) if self.sorter is not None else None
+            if order is None:
+                keys = self.values[key_column]
+                if ascending:
+                    order = np.argsort(keys, kind='stable')
+                else:
+                    # 將資料反轉後做穩定排序再反轉回來，同值的列仍維持原本的先後
+                    order = len(keys) - 1 - np.argsort(keys[::-1], kind='stable')[::-1]
+            self.order = order
+        self.sort_column = column
+        self.ascending = ascending
+        self.top = 0
+        self.draw_header()
+        self.refresh()
+        if self.on_sort is not None:
+            self.on_sort(column, ascending)
+
+    def column_bounds(self):
+        """各欄的 (左, 右) x 座標，欄寬平均分配"""
+        width = max(self.body.winfo_width(), 1)
+        step = width / len(self.columns)
+        return [(i * step, (i + 1) * step) for i in range(len(self.columns))]
+
+    def on_resize(self, event):
+        self.finish_edit()
+        self.build_slots()
+        self.draw_header()
+        self.refresh()
+
+    def build_slots(self):
+        """依可見列數建立底色與文字物件，之後捲動只改寫內容"""
+        self.body.delete('all')
+        self.slots = []
+        bounds = self.column_bounds()
+        width = max(self.body.winfo_width(), 1)
+        for i in range(self.visible_rows + 1):
+            y = i * self.row_height
+            background = self.body.create_rectangle(0, y, width, y + self.row_height, width=0,
+                                                    fill=self.STRIPE_BG[i % 2])
+            texts = [self.body.create_text((left + right) / 2, y + self.row_height / 2,
+                                           text='', font=self.font)
+                     for left, right in bounds]
+            self.slots.append((background, texts))
+
+    def draw_header(self):
+        self.header.delete('all')
+        for column, (left, right) in zip(self.columns, self.column_bounds()):
+            label = column
+            if column == self.sort_column:
+                label += ' ▲' if self.ascending else ' ▼'
+            self.header.create_text((left + right) / 2, self.row_height / 2, text=label, font=self.font)
+            self.header.create_line(right, 0, right, self.row_height, fill='gray')
+
+    def refresh(self):
+        """以目前的捲動位置改寫可見列的內容"""
+        total = len(self.order)
+        self.top = max(0, min(self.top, total - self.visible_rows))
+        for i, (background, texts) in enumerate(self.slots):
+            position = self.top + i
+            if position < total:
+                row = self.order[position]
+                for column, item in zip(self.columns, texts):
+                    value = self.edits.get((row, column), self.values[column][row])
+                    self.body.itemconfigure(item, text=format_cell(value),
+                                            fill=self.EDITED_FG if (row, column) in self.edits else 'black')
+                self.body.itemconfigure(background, state=tk.NORMAL)
+            else:
+                for item in texts:
+                    self.body.itemconfigure(item, text='')
+                self.body.itemconfigure(background, state=tk.HIDDEN)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll(self, amount, unit):
+        self.finish_edit()
+        step = self.visible_rows if unit == 'pages' else 1
+        self.top += int(amount) * step
+        self.refresh()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        self.finish_edit()
+        if action == 'moveto':
+            self.top = int(float(amount) * len(self.order))
+            self.refresh()
+        elif action == 'scroll':
+            self.scroll(amount, unit)
+
+    def on_header_click(self, event):
+        for column, (left, right) in zip(self.columns, self.column_bounds()):
+            if left <= event.x < right:
+                if column == self.sort_column:
+                    self.sort_by(column, not self.ascending)
+                else:
+                    self.sort_by(column)
+                return
+
+    def cell_at(self, x, y):
+        """座標所在的 (顯示順序位置, 欄位)，沒有資料時回傳 None"""
+        position = self.top + int(y // self.row_height)
+        if position >= len(self.order):
+            return None
+        for column, (left, right) in zip(self.columns, self.column_bounds()):
+            if left <= x < right:
+                return position, column
+        return None
+
+    def on_double_click(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None and cell[1] in self.editable:
+            self.begin_edit(*cell)
+
+    def begin_edit(self, position, column):
+        """在儲存格上開啟輸入框；position 為顯示順序中的位置"""
+        self.finish_edit()
+        # 確保該列可見
+        if not self.top <= position < self.top + self.visible_rows:
+            self.top = position
+            self.refresh()
+        row = self.order[position]
+        left, right = self.column_bounds()[self.columns.index(column)]
+        y = (position - self.top) * self.row_height
+
+        self.editing = (row, column)
+        self.editor = tk.Entry(self.body, font=self.font, justify=tk.CENTER)
+        self.editor.insert(0, format_cell(self.edits.get((row, column), self.values[column][row])))
+        if self.validate is not None:
+            # 輸入時即檢查，不合格的按鍵不會出現在輸入框中
+            self.editor.configure(validate='key', validatecommand=(self.register(self.validate), '%P'))
+        self.editor_window = self.body.create_window(left, y, window=self.editor, anchor=tk.NW,
+                                                     width=right - left, height=self.row_height)
+        self.editor.select_range(0, tk.END)
+        self.editor.focus_set()
+        self.editor.bind('<Return>', lambda e: self.move_edit(position, column, 1, 0))
+        self.editor.bind('<Tab>', lambda e: self.move_edit(position, column, 0, 1))
+        self.editor.bind('<Escape>', lambda e: self.close_editor())
+        self.editor.bind('<FocusOut>', lambda e: self.finish_edit())
+
+    def move_edit(self, position, column, down, right):
+        """儲存目前的儲存格，移到下方（Enter）或右方（Tab）的可編輯儲存格"""
+        self.finish_edit()
+        editable = [name for name in self.columns if name in self.editable]
+        index = editable.index(column) + right
+        if index >= len(editable):
+            index, down = 0, 1
+        position += down
+        if position < len(self.order):
+            self.begin_edit(position, editable[index])
+        return 'break'
+
+    def finish_edit(self):
+        """儲存輸入框的值（空白或不完整時捨棄，與原值相同時取消修改）並關閉輸入框"""
+        if self.editor is None:
+            return
+        row, column = self.editing
+        text = self.editor.get().strip()
+        self.close_editor()
+        try:
+            value = float(text)
+        except ValueError:
+            return
+        original = self.values[column][row]
+        if value == float(str(original)):  # float32 以最短的十進位表示比較
+            self.edits.pop((row, column), None)
+        else:
+            self.edits[(row, column)] = value
+        self.refresh()
+        if self.on_edit is not None:
+            self.on_edit(row, column, value)
+
+    def close_editor(self):
+        """關閉輸入框，不儲存"""
+        if self.editor is None:
+            return
+        editor, self.editor, self.editing = self.editor, None, None
+        self.body.delete(self.editor_window)
+        editor.destroy()
+        self.body.focus_set()